@@ -148,3 +148,52 @@ def cloud_input(label, section, key, input_type="number", step=None, **kwargs):
         )
         
     return st.session_state[widget_id]
+
+# --- 6. PINNED MARKET INTEL ---
+def load_pinned_intel(section, fallback=None):
+    """
+    Returns the market intel snapshot pinned in app_db[section]['intel_snapshot'].
+    First visit pins the latest snapshot, so re-opening a saved scenario always
+    reproduces it with the same rates.
+    """
+    from intel_handler import load_snapshot, latest_snapshot_id, LATEST_PATH
+    import json, os
+
+    init_session_state()
+    if section not in st.session_state.app_db:
+        st.session_state.app_db[section] = {}
+    store = st.session_state.app_db[section]
+
+    snap_id = store.get('intel_snapshot')
+    intel = load_snapshot(snap_id)
+    if intel is None:
+        snap_id = latest_snapshot_id()
+        intel = load_snapshot(snap_id)
+        if intel is not None:
+            store['intel_snapshot'] = snap_id
+            trigger_auto_save()
+
+    if intel is None and os.path.exists(LATEST_PATH):
+        try:
+            with open(LATEST_PATH, "r") as f: intel = json.load(f)
+        except: pass
+    return intel if intel is not None else (fallback or {})
+
+def repin_latest_intel(section):
+    from intel_handler import latest_snapshot_id
+    st.session_state.app_db.setdefault(section, {})['intel_snapshot'] = latest_snapshot_id()
+    trigger_auto_save()
+
+def show_intel_pin(section):
+    """Small caption + button showing which rate snapshot this page is pinned to."""
+    from intel_handler import latest_snapshot_id
+    pinned = st.session_state.app_db.get(section, {}).get('intel_snapshot')
+    latest = latest_snapshot_id()
+    if not pinned:
+        return
+    if latest and pinned != latest:
+        c1, c2 = st.columns([3, 1])
+        with c1: st.caption(f"📌 Market rates pinned to snapshot `{pinned}` (latest: `{latest}`)")
+        with c2: st.button("🔄 Use Latest Rates", key=f"{section}_repin_intel", on_click=repin_latest_intel, args=(section,))
+    else:
+        st.caption(f"📌 Market rates pinned to snapshot `{pinned}`")
@@ -0,0 +1,60 @@
+import numpy as np
+
+# ==========================================
+# 📐 SHARED FINANCE HELPERS
+# ==========================================
+# Amortization, discounting and return math used by more than one page
+# engine. Everything broadcasts; for cash-flow series time runs along the last
+# axis and any leading axes are independent scenarios.
+def monthly_payment(principal, annual_rate_pct, amort_years):
+    r = np.asarray(annual_rate_pct, dtype=float) / 100 / 12
+    n = np.asarray(amort_years, dtype=float) * 12
+    principal = np.asarray(principal, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pmt = principal * (r * (1 + r)**n) / ((1 + r)**n - 1)
+    return np.where(r > 0, pmt, principal / n)
+
+def npv(cash_flows, annual_rate_pct):
+    """NPV of monthly cash flows (time on the last axis, month 0 undiscounted)."""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    r = (1 + np.asarray(annual_rate_pct, dtype=float)[..., None] / 100) ** (1 / 12) - 1
+    t = np.arange(cash_flows.shape[-1])
+    return np.sum(cash_flows / (1 + r) ** t, axis=-1)
+
+def irr(cash_flows, lo=-0.99, hi=1.0, iters=60, tol=1e-12):
+    """
+    Annualized IRR (%) of monthly cash flows; NaN where NPV has no sign change
+    on [lo, hi]. Newton steps on every row at once, falling back to bisection
+    whenever a step leaves the current bracket, so it converges in a handful
+    of passes yet can't diverge.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    t = np.arange(cash_flows.shape[-1])
+
+    def f(r):
+        disc = np.exp(-t * np.log1p(r)[..., None])
+        return np.sum(cash_flows * disc, axis=-1), np.sum(-t * cash_flows * disc, axis=-1) / (1 + r)
+
+    shape = cash_flows.shape[:-1]
+    a, b = np.full(shape, lo), np.full(shape, hi)
+    # near r = lo the latest non-zero flow dominates (and long series overflow)
+    nonzero = cash_flows != 0
+    last = cash_flows.shape[-1] - 1 - np.argmax(nonzero[..., ::-1], axis=-1)
+    with np.errstate(over="ignore", invalid="ignore"):
+        fa = np.sign(np.take_along_axis(cash_flows, last[..., None], axis=-1)[..., 0])
+        bracketed = (fa != 0) & (fa != np.sign(f(b)[0]))
+        x = (a + b) / 2
+        for _ in range(iters):
+            fx, dfx = f(x)
+            left = np.sign(fx) == np.sign(fa)
+            a, fa = np.where(left, x, a), np.where(left, fx, fa)
+            b = np.where(left, b, x)
+            with np.errstate(divide="ignore"):
+                step = x - fx / dfx
+            x_new = np.where(np.isfinite(step) & (step > a) & (step < b), step, (a + b) / 2)
+            done = (np.abs(x_new - x) < tol) | (fx == 0) | ~bracketed
+            x = x_new
+            if done.all():
+                break
+    monthly = np.where(bracketed, x, np.nan)
+    return ((1 + monthly) ** 12 - 1) * 100
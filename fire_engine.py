@@ -0,0 +1,242 @@
+import os
+import json
+import numpy as np
+
+# ==========================================
+# 🔥 FIRE TIMELINE ENGINE
+# ==========================================
+# Balance after n months of growth at r with a month-end contribution c is
+#   B(n) = P(1+r)^n + c((1+r)^n - 1)/r
+# so the month the portfolio first reaches a target F is the annuity
+# future-value inverse  n = log((F r + c) / (P r + c)) / log(1 + r), rounded up.
+# Every function broadcasts, so a whole return x SWR grid is one call.
+MAX_MONTHS = 1200  # 100 years; anything longer is reported as unreachable
+
+def fire_number(annual_spend, swr_pct):
+    swr = np.asarray(swr_pct, dtype=float) / 100
+    with np.errstate(divide="ignore"):
+        return np.where(swr > 0, np.asarray(annual_spend, dtype=float) / swr, np.inf)
+
+def months_to_target(start, monthly_contribution, annual_return_pct, target, max_months=MAX_MONTHS):
+    """Whole months until the balance first reaches `target` (0 if already there, inf if never / past max_months)."""
+    P, c, F = (np.asarray(v, dtype=float) for v in (start, monthly_contribution, target))
+    r = np.asarray(annual_return_pct, dtype=float) / 100 / 12
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth_ratio = (F * r + c) / (P * r + c)
+        n_growth = np.log(growth_ratio) / np.log1p(r)
+        n_flat = (F - P) / c
+    n = np.where(r == 0, np.where(c > 0, n_flat, np.inf), np.where(growth_ratio > 0, n_growth, np.inf))
+    n = np.where(np.isnan(n) | (n < 0), np.inf, n)
+    n = np.ceil(n - 1e-9)  # the loop counts whole months; don't let float noise add one
+    n = np.where(P >= F, 0.0, n)
+    return np.where(n > max_months, np.inf, n)
+
+def balance_at(start, monthly_contribution, annual_return_pct, months):
+    """Portfolio value after `months` months (broadcasts over every argument)."""
+    P, c, n = (np.asarray(v, dtype=float) for v in (start, monthly_contribution, months))
+    r = np.asarray(annual_return_pct, dtype=float) / 100 / 12
+    g = (1 + r) ** n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(r != 0, (g - 1) / r, n)
+    return P * g + c * annuity
+
+def fire_age_grid(current_age, start, monthly_contribution, annual_spend, return_values, swr_values, max_months=MAX_MONTHS):
+    """
+    FIRE age over returns (columns) x safe withdrawal rates (rows).
+    Returns (fire_numbers[len(swr)], ages[len(swr), len(return)]); unreachable cells are inf.
+    """
+    rets = np.asarray(return_values, dtype=float)[None, :]
+    target = fire_number(annual_spend, np.asarray(swr_values, dtype=float))
+    months = months_to_target(start, monthly_contribution, rets, target[:, None], max_months)
+    return target, current_age + months / 12
+
+# ==========================================
+# 🎲 DECUMULATION SIMULATOR
+# ==========================================
+# Paths are a (n_paths, n_years) array of real annual returns, either
+# resampled in blocks from the bundled history (keeps crashes and recoveries
+# in sequence) or drawn lognormal. Spending comes out at the start of each
+# year, so with G_t the cumulative growth factor:
+#   B_t = G_t * (P - W * sum_{s<t} 1/G_s)
+# and a path has failed once the bracket goes non-positive.
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "historical_returns.json")
+SIM_SHARD_PATHS = 20000
+
+_history_cache = {}
+
+def load_real_returns(path=HISTORY_PATH):
+    """Inflation-adjusted annual stock returns (decimal) from the bundled dataset."""
+    if path not in _history_cache:
+        with open(path, "r") as f:
+            data = json.load(f)
+        nominal = np.asarray(data["stock_return"], dtype=float) / 100
+        cpi = np.asarray(data["inflation"], dtype=float) / 100
+        _history_cache[path] = ((1 + nominal) / (1 + cpi) - 1, (data["years"][0], data["years"][-1]))
+    return _history_cache[path]
+
+def bootstrap_returns(history, n_paths, n_years, rng, block_years=10):
+    """Circular block bootstrap: random start years, `block_years` consecutive years per draw."""
+    n_blocks = -(-n_years // block_years)
+    starts = rng.integers(0, len(history), size=(n_paths, n_blocks, 1))
+    idx = (starts + np.arange(block_years)).reshape(n_paths, -1)[:, :n_years] % len(history)
+    return history[idx]
+
+def parametric_returns(mean_pct, vol_pct, n_paths, n_years, rng):
+    """Lognormal annual returns whose arithmetic mean is `mean_pct`."""
+    sig = np.log1p((vol_pct / 100) ** 2 / (1 + mean_pct / 100) ** 2) ** 0.5
+    mu = np.log1p(mean_pct / 100) - 0.5 * sig**2
+    return np.expm1(mu + sig * rng.standard_normal((n_paths, n_years)))
+
+def run_decumulation(start_balance, annual_spend, returns):
+    """
+    Balances (n_paths, n_years + 1) starting at year 0, plus the failure year per
+    path (1-based year the money runs out, 0 if it never does).
+    """
+    growth = np.cumprod(1 + returns, axis=1)
+    prior_growth = np.concatenate([np.ones((len(returns), 1)), growth[:, :-1]], axis=1)
+    funded = start_balance - annual_spend * np.cumsum(1 / prior_growth, axis=1)
+    balances = np.concatenate([np.full((len(returns), 1), float(start_balance)), np.maximum(growth * funded, 0.0)], axis=1)
+
+    failed = funded <= 0
+    fail_year = np.where(failed.any(axis=1), failed.argmax(axis=1) + 1, 0)
+    return balances, fail_year
+
+def _decumulation_shard(job):
+    start_balance, annual_spend, n_years, n_paths, mode, market, seed = job
+    rng = np.random.default_rng(seed)
+    if mode == "historical":
+        history, _ = load_real_returns()
+        returns = bootstrap_returns(history, n_paths, n_years, rng, market["block_years"])
+    else:
+        returns = parametric_returns(market["mean"], market["vol"], n_paths, n_years, rng)
+    return run_decumulation(start_balance, annual_spend, returns)
+
+def simulate_decumulation(start_balance, annual_spend, n_years=50, n_paths=10000, mode="historical",
+                          mean=7.0, vol=15.0, block_years=10, seed=None, workers=None):
+    """
+    Runs `n_paths` retirements of `n_years`. mode is "historical" (block
+    bootstrap of real S&P 500 returns) or "parametric" (lognormal with the
+    given real mean / vol in %). Shards of SIM_SHARD_PATHS go to a process
+    pool when workers > 1.
+    """
+    market = {"mean": mean, "vol": vol, "block_years": int(block_years)}
+    sizes = [SIM_SHARD_PATHS] * (n_paths // SIM_SHARD_PATHS) + ([n_paths % SIM_SHARD_PATHS] if n_paths % SIM_SHARD_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(float(start_balance), float(annual_spend), int(n_years), n, mode, market, s) for n, s in zip(sizes, seeds)]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_decumulation_shard, jobs))
+    else:
+        parts = [_decumulation_shard(j) for j in jobs]
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+def summarize_decumulation(balances, fail_year):
+    """Success probability, median terminal wealth, failure-year histogram and P10/P50/P90 bands."""
+    n_years = balances.shape[1] - 1
+    return {
+        "success_rate": float((fail_year == 0).mean()),
+        "median_terminal": float(np.median(balances[:, -1])),
+        "p10_terminal": float(np.percentile(balances[:, -1], 10)),
+        "fail_counts": np.bincount(fail_year, minlength=n_years + 1)[1:],
+        "median_fail_year": float(np.median(fail_year[fail_year > 0])) if (fail_year > 0).any() else None,
+        "bands": np.percentile(balances, [10, 50, 90], axis=0),
+    }
+
+# ==========================================
+# ⛵ COAST FIRE FRONTIER
+# ==========================================
+# Coast number at retirement age R is the FIRE number discounted back at the
+# annual return: F / (1+r)^(R - age). Saving c a month (effective monthly
+# growth g = (1+r)^(1/12)), the balance at month m clears the coast number of
+# that month when
+#   P + c(1 - g^-m)/(g - 1) >= F g^-N        (N = months to retirement)
+# so the first coast month is closed form: m = -log(1 - (F g^-N - P)(g-1)/c) / log g.
+# Without contributions the ratio of balance to coast number never changes:
+# you are either coasting today or not before retirement.
+
+def coast_number(annual_spend, swr_pct, annual_return_pct, years):
+    """Portfolio needed today to compound into the FIRE number in `years` with no new money. Broadcasts."""
+    growth = (1 + np.asarray(annual_return_pct, dtype=float) / 100) ** np.maximum(np.asarray(years, dtype=float), 0.0)
+    return fire_number(annual_spend, swr_pct) / growth
+
+def coast_age(current_age, retire_age, start, monthly_contribution, annual_return_pct, target):
+    """
+    Earliest age the portfolio (saving `monthly_contribution` until then) hits
+    Coast FIRE for reaching `target` by `retire_age`; inf if not before
+    retirement. Broadcasts over every argument.
+    """
+    age, R, P, c, F = (np.asarray(v, dtype=float) for v in (current_age, retire_age, start, monthly_contribution, target))
+    g = (1 + np.asarray(annual_return_pct, dtype=float) / 100) ** (1 / 12)
+    N = np.maximum(R - age, 0.0) * 12
+    need_today = F * g ** -N
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inner = 1 - (need_today - P) * np.where(g != 1, g - 1, 0.0) / c
+        m = np.where(g != 1, -np.log(inner) / np.log(g), (need_today - P) / c)
+    m = np.where(np.isnan(m) | (c <= 0), np.inf, m)
+    m = np.ceil(m - 1e-9)
+    m = np.where(P >= need_today, 0.0, m)
+    return np.where(m > N, np.inf, age + m / 12)
+
+def coast_frontier(current_ages, retire_ages, return_values, spend_values, swr_pct, start, monthly_contribution):
+    """
+    Coast number and earliest coast age over current age x retirement age x
+    return x spend in one broadcast. Both arrays are shaped
+    (len(current_ages), len(retire_ages), len(return_values), len(spend_values)).
+    """
+    ages = np.asarray(current_ages, dtype=float)[:, None, None, None]
+    retire = np.asarray(retire_ages, dtype=float)[None, :, None, None]
+    rets = np.asarray(return_values, dtype=float)[None, None, :, None]
+    spends = np.asarray(spend_values, dtype=float)[None, None, None, :]
+    numbers = coast_number(spends, swr_pct, rets, retire - ages)
+    return numbers, coast_age(ages, retire, start, monthly_contribution, rets, fire_number(spends, swr_pct))
+
+# ==========================================
+# ☕ BARISTA FIRE SIMULATOR
+# ==========================================
+# Three monthly phases per scenario: full-time saving until the quit age,
+# part-time income against spending until the barista end age, then full
+# drawdown. Every quit age and every return path is a column of one state
+# array, so the month loop runs once for the whole (quit ages x paths) grid.
+# Everything is in today's dollars (real returns).
+BARISTA_SAFE_SUCCESS = 0.9
+
+def simulate_barista(start, current_age, quit_ages, barista_end_age, plan_to_age, monthly_contribution,
+                     annual_spend, part_time_income, annual_return_pct=7.0, returns=None):
+    """
+    Year-end balances (n_quit, n_paths, n_years + 1) and the age each scenario
+    runs out of money (inf if it never does). `returns`, if given, is an
+    (n_paths, n_years) array of real annual returns; otherwise one path at
+    `annual_return_pct`.
+    """
+    quit = np.asarray(quit_ages, dtype=float)[:, None]
+    n_years = max(int(np.ceil(plan_to_age - current_age)), 1)
+    if returns is None:
+        returns = np.full((1, n_years), annual_return_pct / 100)
+    monthly_growth = (1 + returns[:, :n_years]) ** (1 / 12)
+
+    balance = np.full((len(quit), len(returns)), float(start))
+    depleted = np.full(balance.shape, np.inf)
+    out = np.empty(balance.shape + (n_years + 1,))
+    out[:, :, 0] = balance
+    draw, part_time_gap = annual_spend / 12, (part_time_income - annual_spend) / 12
+
+    for month in range(n_years * 12):
+        age = current_age + month / 12
+        flow = np.where(age < quit, monthly_contribution, part_time_gap if age < barista_end_age else -draw)
+        balance = balance * monthly_growth[:, month // 12] + flow
+        newly = (balance < 0) & np.isinf(depleted)
+        depleted = np.where(newly, age + 1 / 12, depleted)
+        balance = np.maximum(balance, 0.0)
+        if month % 12 == 11:
+            out[:, :, month // 12 + 1] = balance
+    return out, depleted
+
+def barista_quit_ages(depleted, quit_ages, min_success=BARISTA_SAFE_SUCCESS):
+    """Success rate per quit age and the earliest quit age at or above `min_success` (None if none)."""
+    success = np.isinf(depleted).mean(axis=1)
+    ok = np.flatnonzero(success >= min_success)
+    return success, (float(np.asarray(quit_ages)[ok[0]]) if len(ok) else None)
@@ -0,0 +1,427 @@
+import os
+import re
+import json
+import time
+import threading
+import requests
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# 📍 GEOCODE CACHE
+# ==========================================
+# normalized address -> {"lat", "lon", "address", "ts"} persisted to disk.
+# Misses are cached too ("lat": None) with a shorter TTL, so a typo isn't
+# re-sent to Nominatim on every click.
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ROOT_DIR, "data", "cache")
+GEOCODE_CACHE_PATH = os.path.join(CACHE_DIR, "geocode_cache.json")
+
+GEOCODE_TTL = 90 * 86400        # 90 days for hits
+GEOCODE_NEG_TTL = 86400         # 1 day for "not found"
+NOMINATIM_MIN_INTERVAL = 1.0    # Nominatim usage policy: max 1 request / second
+
+def normalize_address(addr):
+    """'  123 Main St.,  Vancouver ' -> '123 main st vancouver'"""
+    addr = re.sub(r"[^\w\s]", " ", str(addr or "").lower())
+    return re.sub(r"\s+", " ", addr).strip()
+
+def clean_location_address(location):
+    """Short '<number> <road>, <city>' label from a geopy Location."""
+    raw_addr = location.raw.get('address', {})
+    h_num = raw_addr.get('house_number', '')
+    road = raw_addr.get('road', '')
+    city = raw_addr.get('city', raw_addr.get('town', raw_addr.get('suburb', raw_addr.get('municipality', ''))))
+    return f"{h_num} {road}, {city}".strip() if road and city else ", ".join(location.address.split(",")[:2])
+
+class GeocodeCache:
+    def __init__(self, path=GEOCODE_CACHE_PATH, ttl=GEOCODE_TTL, neg_ttl=GEOCODE_NEG_TTL):
+        self.path, self.ttl, self.neg_ttl = path, ttl, neg_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f: self._entries = json.load(f)
+            except Exception:
+                self._entries = {}
+
+    def get(self, addr):
+        """Returns (hit, value). value is (lat, lon, clean_addr) or None for a cached miss."""
+        entry = self._entries.get(normalize_address(addr))
+        if not entry:
+            return False, None
+        ttl = self.ttl if entry.get("lat") is not None else self.neg_ttl
+        if time.time() - entry.get("ts", 0) > ttl:
+            return False, None
+        if entry.get("lat") is None:
+            return True, None
+        return True, (entry["lat"], entry["lon"], entry["address"])
+
+    def put(self, addr, value):
+        lat, lon, clean = value if value else (None, None, None)
+        with self._lock:
+            self._entries[normalize_address(addr)] = {"lat": lat, "lon": lon, "address": clean, "ts": time.time()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w") as f: json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+
+_cache = None
+def get_geocode_cache():
+    global _cache
+    if _cache is None:
+        _cache = GeocodeCache()
+    return _cache
+
+class RateLimiter:
+    """Spaces calls at least `min_interval` seconds apart across threads."""
+    def __init__(self, min_interval=NOMINATIM_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_limiter = RateLimiter()
+
+def _lookup(geolocator, addr):
+    _limiter.wait()
+    location = geolocator.geocode(addr, addressdetails=True)
+    if not location:
+        return None
+    return (location.latitude, location.longitude, clean_location_address(location))
+
+def geocode_cached(geolocator, addr, cache=None, save=True):
+    """Single address: cache first, Nominatim on a miss. Returns (lat, lon, clean_addr) or None."""
+    cache = cache or get_geocode_cache()
+    hit, value = cache.get(addr)
+    if hit:
+        return value
+    value = _lookup(geolocator, addr)
+    cache.put(addr, value)
+    if save: cache.save()
+    return value
+
+def batch_geocode(geolocator, addresses, max_workers=4, cache=None, progress=None):
+    """
+    Resolves many addresses at once. Duplicates (after normalization) and cache
+    hits never touch the network; the rest run on a small thread pool that
+    shares one RateLimiter, so total throughput stays inside Nominatim's budget.
+    `progress(done, total)` is called after each network lookup.
+    Returns {address: (lat, lon, clean_addr) or None}.
+    """
+    cache = cache or get_geocode_cache()
+    results, pending = {}, {}
+    for addr in addresses:
+        if not addr: continue
+        hit, value = cache.get(addr)
+        if hit:
+            results[addr] = value
+        else:
+            pending.setdefault(normalize_address(addr), []).append(addr)
+
+    def work(addrs):
+        try:
+            value = _lookup(geolocator, addrs[0])
+        except Exception:
+            return addrs, None, False
+        return addrs, value, True
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for done, (addrs, value, ok) in enumerate(pool.map(work, pending.values()), 1):
+                if ok: cache.put(addrs[0], value)  # don't negative-cache transient errors
+                for a in addrs: results[a] = value
+                if progress: progress(done, len(pending))
+        cache.save()
+    return results
+
+# ==========================================
+# 🚇 LOCAL POI EXTRACT + SPATIAL INDEX
+# ==========================================
+# One Overpass pull over the whole Metro Vancouver bbox is stored in
+# data/poi_extract.json (committed, refreshed by the monthly workflow). Radius /
+# nearest queries are answered in-process from a grid hash instead of a live
+# Overpass call per map view. A stale or seed extract keeps serving while a
+# background thread re-pulls it; points outside its bbox (or any point, for a
+# POI type the seed doesn't carry) fall back to a live pull of just the area
+# around them, cached in memory (failures never are).
+
+POI_EXTRACT_PATH = os.path.join(ROOT_DIR, "data", "poi_extract.json")
+POI_MAX_AGE = 35 * 86400
+POI_RETRY_INTERVAL = 3600       # after a failed background refresh
+POI_LIVE_TTL = 86400
+POI_BBOX = (49.00, -123.30, 49.45, -122.45)  # south, west, north, east (Metro Vancouver)
+POI_ICONS = {"SkyTrain": "T", "Grocery": "G"}
+EARTH_RADIUS_M = 6371008.8
+M_PER_DEG_LAT = 111320.0
+
+def _overpass_query(poi_type, bbox):
+    b = ",".join(str(v) for v in bbox)
+    if poi_type == "SkyTrain":
+        # SkyTrains are often relations/ways, Groceries are usually nodes.
+        return f"""
+        [out:json][timeout:60];
+        (
+          nwr["railway"="station"]({b});
+          nwr["station"="subway"]({b});
+        );
+        out center;
+        """
+    if poi_type == "Grocery":
+        return f"""
+        [out:json][timeout:60];
+        nwr["shop"="supermarket"]({b});
+        out center;
+        """
+    return None
+
+def fetch_pois(bbox, timeout=90):
+    """Every POI type inside the bbox from Overpass, as [{"type", "name", "lat", "lon"}]. Raises on failure."""
+    headers = {"User-Agent": "AnalystInAPocket/1.0"}
+    pois = []
+    for poi_type in POI_ICONS:
+        response = requests.get("https://overpass-api.de/api/interpreter", params={'data': _overpass_query(poi_type, bbox)}, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        seen = set()
+        for el in response.json().get('elements', []):
+            p_lat = el.get('lat', el.get('center', {}).get('lat'))
+            p_lon = el.get('lon', el.get('center', {}).get('lon'))
+            if p_lat and p_lon and el.get('id') not in seen:
+                seen.add(el.get('id'))
+                pois.append({"type": poi_type, "name": el.get('tags', {}).get('name', poi_type), "lat": p_lat, "lon": p_lon})
+    return pois
+
+def refresh_poi_extract(path=POI_EXTRACT_PATH, bbox=POI_BBOX):
+    """Pulls every POI type for the bbox from Overpass and rewrites the local extract."""
+    extract = {"last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "bbox": list(bbox), "pois": fetch_pois(bbox)}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f: json.dump(extract, f)
+    os.replace(tmp, path)
+    return extract
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres. Broadcasts over NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _encode_cell(ci, cj):
+    return (np.asarray(ci, dtype=np.int64) + 100000) * 1000000 + (np.asarray(cj, dtype=np.int64) + 100000)
+
+class POIIndex:
+    """Uniform lat/lon grid hash: cell -> array of point ids. Queries only scan the covering cells."""
+    def __init__(self, lats, lons, names, cell_deg=0.01):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.names = np.asarray(names, dtype=object)
+        self.cell_deg = cell_deg
+        self.cells = {}
+        self._order = np.empty(0, dtype=np.int64)
+        self._sorted_keys = np.empty(0, dtype=np.int64)
+        if len(self.lats):
+            keys = np.stack([np.floor(self.lats / cell_deg), np.floor(self.lons / cell_deg)], axis=1).astype(np.int64)
+            order = np.lexsort((keys[:, 1], keys[:, 0]))
+            uniq, starts = np.unique(keys[order], axis=0, return_index=True)
+            bounds = list(starts[1:]) + [len(order)]
+            for (ci, cj), s, e in zip(uniq, starts, bounds):
+                self.cells[(int(ci), int(cj))] = order[s:e]
+            self._order = order
+            self._sorted_keys = _encode_cell(keys[order, 0], keys[order, 1])
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _candidates(self, lat, lon, radius_m):
+        dlat = radius_m / M_PER_DEG_LAT
+        dlon = radius_m / (M_PER_DEG_LAT * max(np.cos(np.radians(lat)), 1e-6))
+        i0, i1 = int(np.floor((lat - dlat) / self.cell_deg)), int(np.floor((lat + dlat) / self.cell_deg))
+        j0, j1 = int(np.floor((lon - dlon) / self.cell_deg)), int(np.floor((lon + dlon) / self.cell_deg))
+        hits = [self.cells[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self.cells]
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.int64)
+
+    def query_radius(self, lat, lon, radius_m):
+        """Returns (ids, distances_m) of every point within radius_m, nearest first."""
+        cand = self._candidates(lat, lon, radius_m)
+        if not len(cand):
+            return cand, np.empty(0)
+        dist = haversine_m(lat, lon, self.lats[cand], self.lons[cand])
+        keep = dist <= radius_m
+        ids, dist = cand[keep], dist[keep]
+        order = np.argsort(dist)
+        return ids[order], dist[order]
+
+    def proximity(self, lats, lons, radius_m):
+        """
+        Nearest-point distance and count-within-radius for many query points at once.
+        Every (query, cell) pair covering the radius is joined against the sorted cell
+        keys with searchsorted, expanded to candidate pairs, and measured in a single
+        haversine pass. Queries with nothing inside the radius fall back to a chunked
+        scan of all points for their nearest distance. Returns (nearest_m, count).
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        n = len(lats)
+        nearest = np.full(n, np.inf)
+        count = np.zeros(n, dtype=np.int64)
+        if n == 0 or len(self) == 0:
+            return nearest, count
+
+        # Cell offsets covering the radius (lon span widens with latitude)
+        k_lat = int(np.ceil(radius_m / M_PER_DEG_LAT / self.cell_deg))
+        cos_min = max(np.cos(np.radians(np.abs(lats).max())), 1e-6)
+        k_lon = int(np.ceil(radius_m / (M_PER_DEG_LAT * cos_min) / self.cell_deg))
+        di, dj = np.meshgrid(np.arange(-k_lat, k_lat + 1), np.arange(-k_lon, k_lon + 1), indexing="ij")
+        ci = np.floor(lats / self.cell_deg).astype(np.int64)[:, None] + di.ravel()[None, :]
+        cj = np.floor(lons / self.cell_deg).astype(np.int64)[:, None] + dj.ravel()[None, :]
+        keys = _encode_cell(ci, cj).ravel()
+        rows = np.repeat(np.arange(n), di.size)
+
+        lo = np.searchsorted(self._sorted_keys, keys, side="left")
+        hi = np.searchsorted(self._sorted_keys, keys, side="right")
+        cnt = hi - lo
+        hit = cnt > 0
+        rows, lo, cnt = rows[hit], lo[hit], cnt[hit]
+        if len(rows):
+            total = int(cnt.sum())
+            offsets = np.cumsum(cnt) - cnt
+            pair_rows = np.repeat(rows, cnt)
+            pair_pos = np.arange(total) - np.repeat(offsets, cnt) + np.repeat(lo, cnt)
+            pair_ids = self._order[pair_pos]
+            dist = haversine_m(lats[pair_rows], lons[pair_rows], self.lats[pair_ids], self.lons[pair_ids])
+            inside = dist <= radius_m
+            count = np.bincount(pair_rows[inside], minlength=n)
+            np.minimum.at(nearest, pair_rows, dist)
+
+        # Nearest for the rest: pick the candidate on a flat projection, then measure it exactly
+        far = np.flatnonzero(count == 0)
+        if len(far):
+            kx = np.cos(np.radians(lats[far].mean()))
+            px, py = self.lons * kx, self.lats
+            for start in range(0, len(far), 2048):
+                blk = far[start:start + 2048]
+                d2 = (lons[blk, None] * kx - px[None, :])**2 + (lats[blk, None] - py[None, :])**2
+                best = d2.argmin(axis=1)
+                nearest[blk] = haversine_m(lats[blk], lons[blk], self.lats[best], self.lons[best])
+        return nearest, count
+
+def build_poi_indexes(pois):
+    """{poi_type: POIIndex} from a list of extract rows."""
+    indexes = {}
+    for poi_type in POI_ICONS:
+        rows = [p for p in pois if p.get("type") == poi_type]
+        indexes[poi_type] = POIIndex([p["lat"] for p in rows], [p["lon"] for p in rows], [p.get("name", poi_type) for p in rows])
+    return indexes
+
+_refresh = {"thread": None, "failed_at": 0.0, "error": None}
+def _refresh_in_background(path):
+    if (_refresh["thread"] is not None and _refresh["thread"].is_alive()) or time.time() - _refresh["failed_at"] < POI_RETRY_INTERVAL:
+        return
+    def run():
+        try:
+            refresh_poi_extract(path)
+            _refresh["error"] = None
+        except Exception as e:
+            _refresh["failed_at"], _refresh["error"] = time.time(), e
+    _refresh["thread"] = threading.Thread(target=run, daemon=True)
+    _refresh["thread"].start()
+
+def poi_refresh_error():
+    """The exception from the last background refresh, or None if it worked (or hasn't run)."""
+    return _refresh["error"]
+
+_poi_cache = {}
+def _read_extract(path):
+    """(indexes, bbox, seed) for the file on disk, re-read only when it changes."""
+    if not os.path.exists(path):
+        return {}, None, False
+    mtime = os.path.getmtime(path)
+    cached = _poi_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r") as f:
+        extract = json.load(f)
+    loaded = (build_poi_indexes(extract.get("pois", [])), extract.get("bbox"), bool(extract.get("seed")))
+    _poi_cache[path] = (mtime, loaded)
+    return loaded
+
+def load_poi_indexes(path=POI_EXTRACT_PATH, auto_refresh=False):
+    """
+    {poi_type: POIIndex} from a local extract (any file in the same format works,
+    e.g. a fixture for offline tests). Re-reads only when the file changes; with
+    auto_refresh, a missing, stale or seed extract is re-pulled from Overpass in
+    a background thread while the current one keeps answering queries.
+    """
+    indexes, _, seed = _read_extract(path)
+    stale = not os.path.exists(path) or seed or (time.time() - os.path.getmtime(path) > POI_MAX_AGE)
+    if auto_refresh and stale:
+        _refresh_in_background(path)
+    return indexes
+
+def extract_covers(lats, lons, poi_types=POI_ICONS, path=POI_EXTRACT_PATH):
+    """
+    True where a point lies inside the local extract's bbox and the extract has
+    every one of `poi_types`. A seed extract with no points of a type doesn't
+    cover it (an empty type in a real pull just means there are none).
+    """
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    indexes, bbox, seed = _read_extract(path)
+    if isinstance(poi_types, str):
+        poi_types = [poi_types]
+    missing = seed and any(len(indexes.get(p, ())) == 0 for p in poi_types)
+    if not bbox or missing:
+        return np.zeros(lats.shape, dtype=bool)
+    south, west, north, east = bbox
+    return (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+
+def radius_bbox(lat, lon, radius_m):
+    """(south, west, north, east) around a point, snapped outward to 0.01 deg so nearby views share a pull."""
+    dlat = radius_m / M_PER_DEG_LAT
+    dlon = radius_m / (M_PER_DEG_LAT * max(np.cos(np.radians(lat)), 1e-6))
+    return (float(np.floor((lat - dlat) * 100) / 100), float(np.floor((lon - dlon) * 100) / 100),
+            float(np.ceil((lat + dlat) * 100) / 100), float(np.ceil((lon + dlon) * 100) / 100))
+
+_live_cache = {}
+def live_poi_indexes(bbox):
+    """{poi_type: POIIndex} for an area outside the extract, pulled live and kept for POI_LIVE_TTL. Raises on failure."""
+    key = tuple(round(float(v), 4) for v in bbox)
+    hit = _live_cache.get(key)
+    if hit and time.time() - hit[0] < POI_LIVE_TTL:
+        return hit[1]
+    indexes = build_poi_indexes(fetch_pois(key, timeout=30))
+    _live_cache[key] = (time.time(), indexes)
+    return indexes
+
+def outside_poi_areas(lats, lons, pad_m, poi_types=POI_ICONS, cell_deg=0.5, path=POI_EXTRACT_PATH):
+    """
+    Points the extract doesn't cover (see extract_covers) grouped into cell_deg
+    cells: [(bbox, row ids)], each bbox covering its points plus pad_m, for
+    live_poi_indexes.
+    """
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    far = np.flatnonzero(~extract_covers(lats, lons, poi_types, path))
+    areas = {}
+    for i in far:
+        areas.setdefault((int(np.floor(lats[i] / cell_deg)), int(np.floor(lons[i] / cell_deg))), []).append(i)
+    out = []
+    for rows in areas.values():
+        rows = np.asarray(rows)
+        s, w, _, _ = radius_bbox(lats[rows].min(), lons[rows].min(), pad_m)
+        _, _, n, e = radius_bbox(lats[rows].max(), lons[rows].max(), pad_m)
+        out.append(((s, w, n, e), rows))
+    return out
+
+if __name__ == "__main__":
+    extract = refresh_poi_extract()
+    print(f"✅ POI Extract Refreshed. {len(extract['pois'])} points.")
@@ -0,0 +1,309 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from finance_engine import monthly_payment
+
+# ==========================================
+# 🏠 BUY VS RENT ENGINE
+# ==========================================
+# Owner and renter paths advance one year at a time for every scenario at
+# once; the 12 months inside a year are closed form. The mortgage balance is
+# the annuity recurrence  B' = B G - pmt (G - 1)/m  with G = (1+m)^12, and the
+# renter invests the monthly outlay gap at the start of each month, so
+#   P' = P Q + gap q (Q - 1)/(q - 1)        (q = 1 + r/12, Q = q^12).
+# Any input may be a scalar or an array (broadcast together); rate, apprec,
+# rent_inc and stock_ret may also be (S, years) per-year paths.
+SELLING_COST_PCT = 0.05
+AMORT_YEARS = 30
+
+WEALTH_COLUMNS = ["Owner Net Wealth", "Renter Wealth", "Owner Unrecoverable", "Renter Unrecoverable", "Mortgage Balance"]
+
+def _year_growth(annual_rate_pct):
+    """Monthly growth q and its 12-month compound Q for an annual rate in %."""
+    q = 1 + np.asarray(annual_rate_pct, dtype=float) / 100 / 12
+    return q, q**12
+
+def _annuity(q, Q):
+    """sum_{k=0}^{11} q^k, safe at q == 1."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(q != 1, (Q - 1) / (q - 1), 12.0)
+
+def simulate_buy_rent(price, dp, rate, apprec, ann_tax, mo_maint, rent, rent_inc, stock_ret, years,
+                      amort_years=AMORT_YEARS, reset_years=None):
+    """
+    Year-end owner / renter wealth and cumulative sunk costs for every
+    scenario: {column: (S, years)} for WEALTH_COLUMNS. With `reset_years`, the
+    mortgage payment is re-amortized at the year's `rate` every reset_years
+    (a fixed-term renewal); otherwise the first year's rate is locked in.
+    """
+    years = max(int(years), 1)
+    paths = {k: np.asarray(v, dtype=float) for k, v in
+             (("rate", rate), ("apprec", apprec), ("rent_inc", rent_inc), ("stock_ret", stock_ret))}
+    scalars = [np.atleast_1d(np.asarray(v, dtype=float)) for v in (price, dp, ann_tax, mo_maint, rent)]
+    scalars += [p[:, 0] if p.ndim == 2 else np.atleast_1d(p) for p in paths.values()]
+    shape = np.broadcast_shapes(*(s.shape for s in scalars))
+    price, dp, ann_tax, mo_maint, rent = (np.broadcast_to(s, shape).ravel() for s in scalars[:5])
+    S = len(price)
+    per_year = {k: (p if p.ndim == 2 else np.broadcast_to(p, shape).ravel()[:, None]) for k, p in paths.items()}
+
+    def at(name, y):
+        p = per_year[name]
+        return np.broadcast_to(p[:, min(y, p.shape[1] - 1)], (S,))
+
+    balance = price - dp
+    pmt = monthly_payment(balance, at("rate", 0), amort_years)
+    home = price.copy()
+    portfolio = dp.copy()
+    curr_rent = rent.copy()
+    owner_sunk = np.zeros(S)
+    renter_sunk = np.zeros(S)
+    out = {col: np.empty((S, years)) for col in WEALTH_COLUMNS}
+
+    for y in range(years):
+        months_left = amort_years * 12 - 12 * y
+        term_start = y - y % reset_years if reset_years else 0
+        if months_left <= 0:
+            pmt = np.zeros(S)
+        elif y > 0 and term_start == y:
+            pmt = monthly_payment(balance, at("rate", y), months_left / 12)
+
+        m, G = _year_growth(at("rate", term_start))
+        new_balance = np.maximum(balance * G - pmt * _annuity(m, G), 0.0)
+        annual_int = 12 * pmt - (balance - new_balance)
+        balance = new_balance
+
+        owner_sunk += annual_int + ann_tax + mo_maint * 12
+        home = home * (1 + at("apprec", y) / 100)
+
+        renter_sunk += curr_rent * 12
+        gap = pmt + ann_tax / 12 + mo_maint - curr_rent
+        q, Q = _year_growth(at("stock_ret", y))
+        portfolio = portfolio * Q + gap * q * _annuity(q, Q)
+        curr_rent = curr_rent * (1 + at("rent_inc", y) / 100)
+
+        out["Owner Net Wealth"][:, y] = home * (1 - SELLING_COST_PCT) - balance
+        out["Renter Wealth"][:, y] = portfolio
+        out["Owner Unrecoverable"][:, y] = owner_sunk
+        out["Renter Unrecoverable"][:, y] = renter_sunk
+        out["Mortgage Balance"][:, y] = balance
+    return out
+
+def wealth_frame(result, scenario=0):
+    """One scenario of a simulate_buy_rent result as the page's year-by-year DataFrame."""
+    years = result["Renter Wealth"].shape[1]
+    df = pd.DataFrame({col: result[col][scenario] for col in WEALTH_COLUMNS})
+    df.insert(0, "Year", np.arange(1, years + 1))
+    return df
+
+def break_even_year(result):
+    """First year the owner's net wealth beats the renter's, per scenario (inf if never)."""
+    ahead = result["Owner Net Wealth"] > result["Renter Wealth"]
+    return np.where(ahead.any(axis=1), ahead.argmax(axis=1) + 1.0, np.inf)
+
+def break_even_appreciation(result, price, horizon):
+    """
+    Appreciation (%) at which owner and renter tie at `horizon`, per scenario
+    (-100 if the owner wins even if the home is worthless). Renter wealth and
+    the loan don't depend on appreciation and the home is worth price (1+a)^N,
+    so the tie is closed form.
+    """
+    n = int(horizon)
+    ratio = (result["Renter Wealth"][:, n - 1] + result["Mortgage Balance"][:, n - 1]) / (np.asarray(price, dtype=float) * (1 - SELLING_COST_PCT))
+    with np.errstate(invalid="ignore"):
+        return np.where(ratio > 0, (np.abs(ratio) ** (1 / n) - 1) * 100, -100.0)
+
+def sweep_buy_rent(base, apprec_values, stock_values, rent_inc_values, years):
+    """
+    Every appreciation x stock return x rent growth combination in one run.
+    Returns (break-even year, break-even appreciation at `years`), both shaped
+    (len(rent_inc), len(stock), len(apprec)); the second doesn't vary along apprec.
+    """
+    G, K, A = np.meshgrid(np.asarray(rent_inc_values, dtype=float), np.asarray(stock_values, dtype=float),
+                          np.asarray(apprec_values, dtype=float), indexing="ij")
+    params = dict(base, apprec=A.ravel(), stock_ret=K.ravel(), rent_inc=G.ravel())
+    result = simulate_buy_rent(years=years, **params)
+    be_year = break_even_year(result).reshape(A.shape)
+    be_apprec = break_even_appreciation(result, base["price"], years).reshape(A.shape)
+    return be_year, be_apprec
+
+# ==========================================
+# 🎲 STOCHASTIC BUY VS RENT
+# ==========================================
+# House prices, stock returns and rent inflation are drawn per year with a
+# shared correlation matrix (lognormal for prices and stocks, normal for rent
+# growth). The 5-year fixed benchmark is re-drawn at every renewal as a
+# mean-reverting step, calibrated on data/market_history.json once the log
+# spans MIN_CALIBRATION_YEARS; until then the step size is the assumed
+# DEFAULT_RESET_VOL around today's rate. The borrower keeps today's spread
+# over the benchmark. Paths run in MC_CHUNK_PATHS chunks
+# so memory stays flat no matter how many paths are requested: each chunk
+# only reports who is ahead each year and the gap at the horizon.
+RATE_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "market_history.json")
+MC_CHUNK_PATHS = 5000
+RESET_YEARS = 5
+RATE_REVERSION = 0.3        # share of the gap to the long-run benchmark closed per term
+DEFAULT_RESET_VOL = 1.25    # pp per 5-year term when the history is too short to calibrate
+RATE_FLOOR = 0.5
+MIN_CALIBRATION_YEARS = 10
+
+_rate_history_cache = {}
+
+def load_rate_history(path=RATE_HISTORY_PATH):
+    """(dates, 5-year fixed rates in %) from the local rate log, sorted by date."""
+    if path not in _rate_history_cache:
+        with open(path, "r") as f:
+            rows = sorted((r for r in json.load(f) if r.get("fixed_5") is not None), key=lambda r: r["date"])
+        _rate_history_cache[path] = (np.array([r["date"] for r in rows], dtype="datetime64[D]"),
+                                     np.array([r["fixed_5"] for r in rows], dtype=float))
+    return _rate_history_cache[path]
+
+def rate_reset_model(path=RATE_HISTORY_PATH, term_years=RESET_YEARS):
+    """
+    Latest benchmark, long-run mean and the std of term-to-term changes. The
+    mean and vol need MIN_CALIBRATION_YEARS of history; otherwise the latest
+    rate and DEFAULT_RESET_VOL are used.
+    """
+    dates, fixed = load_rate_history(path)
+    latest = float(fixed[-1])
+    span_years = (dates[-1] - dates[0]).astype(float) / 365.25 if len(dates) > 1 else 0.0
+    if span_years < MIN_CALIBRATION_YEARS:
+        return {"latest": latest, "mean": latest, "vol": DEFAULT_RESET_VOL, "calibrated": False}
+    # benchmark one term later for every observation that has one
+    later = np.searchsorted(dates, dates + np.timedelta64(int(term_years * 365.25), "D"))
+    has_later = later < len(dates)
+    changes = fixed[later[has_later]] - fixed[has_later]
+    return {"latest": latest, "mean": float(fixed.mean()), "vol": float(changes.std()), "calibrated": True}
+
+def _nearest_correlation(corr):
+    """Clip negative eigenvalues so any slider combination is a valid correlation matrix."""
+    w, v = np.linalg.eigh(corr)
+    fixed = (v * np.maximum(w, 1e-9)) @ v.T
+    d = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(d, d)
+
+def simulate_housing_paths(n_paths, years, apprec, stock_ret, rent_inc, house_vol, equity_vol, rent_vol,
+                           corr, contract_rate, rate_model, rng, reset_years=RESET_YEARS):
+    """Per-year (n_paths, years) apprec %, stock_ret % (monthly-compounded), rent_inc % and mortgage rate %."""
+    chol = np.linalg.cholesky(_nearest_correlation(np.asarray(corr, dtype=float)))
+    z = rng.standard_normal((n_paths, years, 3)) @ chol.T
+
+    def lognormal(mean_pct, vol_pct, shocks):
+        sig = np.log1p((vol_pct / 100) ** 2 / (1 + mean_pct / 100) ** 2) ** 0.5
+        return np.expm1(np.log1p(mean_pct / 100) - 0.5 * sig**2 + sig * shocks)
+
+    house = lognormal(apprec, house_vol, z[..., 0]) * 100
+    stock_annual = (1 + stock_ret / 1200) ** 12 - 1  # zero vol == the deterministic path
+    stocks = 1200 * ((1 + lognormal(stock_annual * 100, equity_vol, z[..., 1])) ** (1 / 12) - 1)
+    rents = rent_inc + rent_vol * z[..., 2]
+
+    n_terms = -(-years // reset_years)
+    bench = np.empty((n_paths, n_terms))
+    level = np.full(n_paths, rate_model["latest"])
+    for k in range(n_terms):
+        if k > 0:
+            level = level + RATE_REVERSION * (rate_model["mean"] - level) + rate_model["vol"] * rng.standard_normal(n_paths)
+            level = np.maximum(level, RATE_FLOOR)
+        bench[:, k] = level
+    rates = np.maximum(contract_rate + np.repeat(bench, reset_years, axis=1)[:, :years] - rate_model["latest"], RATE_FLOOR)
+    return house, stocks, rents, rates
+
+def _buy_rent_chunk(job):
+    params, years, n_paths, market, rate_model, seed = job
+    rng = np.random.default_rng(seed)
+    house, stocks, rents, rates = simulate_housing_paths(
+        n_paths, years, params["apprec"], params["stock_ret"], params["rent_inc"], market["house_vol"],
+        market["equity_vol"], market["rent_vol"], market["corr"], params["rate"], rate_model, rng, market["reset_years"])
+    run = dict(params, apprec=house, stock_ret=stocks, rent_inc=rents, rate=rates)
+    res = simulate_buy_rent(years=years, reset_years=market["reset_years"], **run)
+    gap = res["Owner Net Wealth"] - res["Renter Wealth"]
+    return (gap > 0).sum(axis=0), gap[:, -1]
+
+def monte_carlo_buy_rent(params, years, n_paths=10000, house_vol=8.0, equity_vol=16.0, rent_vol=1.5,
+                         corr_house_equity=0.3, corr_house_rent=0.5, corr_equity_rent=0.1,
+                         reset_years=RESET_YEARS, seed=None, workers=None, history_path=RATE_HISTORY_PATH):
+    """
+    Stochastic buy vs rent. `params` are the simulate_buy_rent scenario inputs
+    (scalars). Returns {"prob_ahead": (years,) share of paths with the owner
+    ahead at each year-end, "final_gap": (n_paths,) owner minus renter at the
+    horizon, "rate_model": the benchmark calibration used}.
+    """
+    corr = [[1.0, corr_house_equity, corr_house_rent],
+            [corr_house_equity, 1.0, corr_equity_rent],
+            [corr_house_rent, corr_equity_rent, 1.0]]
+    market = {"house_vol": house_vol, "equity_vol": equity_vol, "rent_vol": rent_vol, "corr": corr, "reset_years": int(reset_years)}
+    rate_model = rate_reset_model(history_path, reset_years)
+    years = max(int(years), 1)
+    sizes = [MC_CHUNK_PATHS] * (n_paths // MC_CHUNK_PATHS) + ([n_paths % MC_CHUNK_PATHS] if n_paths % MC_CHUNK_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(params, years, n, market, rate_model, s) for n, s in zip(sizes, seeds)]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_buy_rent_chunk, jobs))
+    else:
+        parts = map(_buy_rent_chunk, jobs)
+
+    ahead = np.zeros(years)
+    final_gap = np.empty(n_paths)
+    filled = 0
+    for counts, gap in parts:
+        ahead += counts
+        final_gap[filled:filled + len(gap)] = gap
+        filled += len(gap)
+    return {"prob_ahead": ahead / max(n_paths, 1), "final_gap": final_gap, "rate_model": rate_model}
+
+def summarize_buy_rent_mc(mc):
+    """Headline stats of the owner-minus-renter gap at the horizon."""
+    gap = mc["final_gap"]
+    return {
+        "prob_owner_ahead": float((gap > 0).mean()),
+        "median_gap": float(np.median(gap)),
+        "p10_gap": float(np.percentile(gap, 10)),
+        "p90_gap": float(np.percentile(gap, 90)),
+    }
+
+# ==========================================
+# 💸 PAY DOWN VS INVEST
+# ==========================================
+# The same extra monthly amount either prepays the mortgage (growing at the
+# mortgage rate, tax-free) or goes to an account growing at the after-tax
+# stock return. Both are month-end annuities, so a whole path is one
+# expression over month indices: FV(m) = c ((1+r)^m - 1)/r. The RRSP deposit
+# is grossed up by the refund and taxed on the way out, which cancels, so the
+# indifference mortgage rate is simply the account's after-tax return.
+INVEST_ACCOUNTS = ["Non-Registered", "TFSA", "RRSP"]
+
+def _annuity_fv(payment, annual_rate_pct, months):
+    r = np.asarray(annual_rate_pct, dtype=float) / 100 / 12
+    m = np.asarray(months, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return payment * np.where(r != 0, ((1 + r) ** m - 1) / r, m)
+
+def after_tax_return(stock_return, marginal_tax, acc_type):
+    """Annual growth (%) inside the account; non-registered growth is taxed as capital gains. Broadcasts."""
+    nonreg = np.asarray(acc_type) == "Non-Registered"
+    return np.where(nonreg, np.asarray(stock_return, dtype=float) * (1 - np.asarray(marginal_tax, dtype=float) / 100 * 0.5),
+                    np.asarray(stock_return, dtype=float))
+
+def pay_vs_invest_paths(extra_amt, mortgage_rate, stock_return, marginal_tax, acc_type, months):
+    """(mortgage path, after-tax stock path) at every month in `months`; every argument broadcasts."""
+    tax = np.asarray(marginal_tax, dtype=float) / 100
+    rrsp = np.asarray(acc_type) == "RRSP"
+    deposit = np.where(rrsp, extra_amt / (1 - tax), extra_amt)
+    stock = _annuity_fv(deposit, after_tax_return(stock_return, marginal_tax, acc_type), months) * np.where(rrsp, 1 - tax, 1.0)
+    return _annuity_fv(extra_amt, mortgage_rate, months), stock
+
+def pay_vs_invest_sweep(extra_amt, rate_values, return_values, tax_values, months):
+    """
+    Stock minus mortgage wealth at `months` over account type x marginal tax x
+    stock return x mortgage rate, shaped (3, T, K, R), plus the indifference
+    mortgage rate per (account, tax, return), shaped (3, T, K).
+    """
+    acc = np.asarray(INVEST_ACCOUNTS)[:, None, None, None]
+    tax = np.asarray(tax_values, dtype=float)[None, :, None, None]
+    ret = np.asarray(return_values, dtype=float)[None, None, :, None]
+    rates = np.asarray(rate_values, dtype=float)[None, None, None, :]
+    mortgage, stock = pay_vs_invest_paths(extra_amt, rates, ret, tax, acc, months)
+    return stock - mortgage, after_tax_return(ret, tax, acc)[..., 0]
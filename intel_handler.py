@@ -0,0 +1,116 @@
+import os
+import json
+import bisect
+from datetime import datetime
+
+# ==========================================
+# 📂 MARKET INTEL SNAPSHOT STORE
+# ==========================================
+# Every scraper sync is written once as an immutable dated snapshot:
+#   data/intel_snapshots/<snapshot_id>.json
+# plus a sorted index (data/intel_snapshots/index.json) so "intel as of date D"
+# resolves with a binary search. data/market_intel.json stays as the "latest"
+# copy for anything that still reads it directly.
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "intel_snapshots")
+INDEX_PATH = os.path.join(SNAPSHOT_DIR, "index.json")
+LATEST_PATH = os.path.join(DATA_DIR, "market_intel.json")
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_index_cache = {"mtime": None, "ids": [], "as_of": []}
+_snapshot_cache = {}
+
+# --- 1. HELPERS ---
+def make_snapshot_id(as_of):
+    """'2026-02-19 11:00:00' -> '20260219T110000' (sorts the same way as the timestamp)."""
+    return datetime.strptime(as_of, TS_FORMAT).strftime("%Y%m%dT%H%M%S")
+
+def _normalize_as_of(when):
+    if when is None:
+        return datetime.now().strftime(TS_FORMAT)
+    if isinstance(when, datetime):
+        return when.strftime(TS_FORMAT)
+    when = str(when).strip()
+    if len(when) == 10:  # bare date -> end of that day
+        return f"{when} 23:59:59"
+    return when
+
+# --- 2. INDEX ---
+def load_index():
+    """Returns (ids, as_of) as parallel sorted lists. Re-reads only when index.json changes."""
+    if not os.path.exists(INDEX_PATH):
+        return [], []
+    mtime = os.path.getmtime(INDEX_PATH)
+    if _index_cache["mtime"] != mtime:
+        try:
+            with open(INDEX_PATH, "r") as f:
+                entries = json.load(f).get("snapshots", [])
+        except Exception:
+            entries = []
+        entries.sort(key=lambda e: e["as_of"])
+        _index_cache.update({
+            "mtime": mtime,
+            "ids": [e["id"] for e in entries],
+            "as_of": [e["as_of"] for e in entries]
+        })
+    return _index_cache["ids"], _index_cache["as_of"]
+
+def resolve_snapshot_id(as_of=None):
+    """Latest snapshot taken on or before `as_of` (date, datetime or timestamp string). O(log n)."""
+    ids, stamps = load_index()
+    if not ids:
+        return None
+    pos = bisect.bisect_right(stamps, _normalize_as_of(as_of))
+    return ids[pos - 1] if pos > 0 else None
+
+def latest_snapshot_id():
+    ids, _ = load_index()
+    return ids[-1] if ids else None
+
+# --- 3. READ / WRITE ---
+def load_snapshot(snapshot_id):
+    """Snapshots never change once written, so they are cached for the life of the process."""
+    if not snapshot_id:
+        return None
+    if snapshot_id in _snapshot_cache:
+        return _snapshot_cache[snapshot_id]
+    path = os.path.join(SNAPSHOT_DIR, f"{snapshot_id}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    _snapshot_cache[snapshot_id] = data
+    return data
+
+def load_intel_as_of(as_of=None):
+    return load_snapshot(resolve_snapshot_id(as_of))
+
+def write_snapshot(intel_data):
+    """Appends a new immutable snapshot, updates the index and refreshes market_intel.json. Returns the id."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    as_of = _normalize_as_of(intel_data.get("last_updated"))
+    intel_data["last_updated"] = as_of
+    snapshot_id = make_snapshot_id(as_of)
+    intel_data["snapshot_id"] = snapshot_id
+
+    # 'x' mode: an existing snapshot is never overwritten
+    with open(os.path.join(SNAPSHOT_DIR, f"{snapshot_id}.json"), "x") as f:
+        json.dump(intel_data, f, indent=4)
+
+    entries = []
+    if os.path.exists(INDEX_PATH):
+        with open(INDEX_PATH, "r") as f:
+            entries = json.load(f).get("snapshots", [])
+    entries.append({"id": snapshot_id, "as_of": as_of})
+    entries.sort(key=lambda e: e["as_of"])
+    with open(INDEX_PATH, "w") as f:
+        json.dump({"snapshots": entries}, f, indent=4)
+
+    with open(LATEST_PATH, "w") as f:
+        json.dump(intel_data, f, indent=4)
+    return snapshot_id
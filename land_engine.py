@@ -0,0 +1,360 @@
+import numpy as np
+import pandas as pd
+from finance_engine import irr
+
+# ==========================================
+# 🏗️ LAND RESIDUAL ENGINE
+# ==========================================
+# The residual pro forma as one broadcastable function: any input can be a
+# scalar or an array, and every output line has the broadcast shape. A 200x200
+# sale $/SF x hard cost $/SF grid (or a stack of them per finance rate / FSR)
+# is a single call.
+#
+# Financing runs on a monthly draw schedule (trailing time axis): land closes
+# at month 0, soft costs spread evenly over pre-build, hard costs follow an
+# S-curve over the build and sales close evenly over the sell-out. Equity
+# (1 - LTC of total project cost) goes in first, then the loan draws and its
+# interest is capitalized on the outstanding balance until sales repay it.
+#
+# Land value L solves h(L) = L - before_finance + interest(L) = 0. h rises
+# with L and interest stops changing once L <= 0, so the root always lies in
+# [before_finance - interest(before_finance), before_finance]; a secant step kept
+# inside that bracket (bisection when it jumps out) converges on every row, and
+# rows drop out of the working set as soon as they converge.
+LAND_FIXED_POINT_ITERS = 100
+LAND_FIXED_POINT_TOL = 0.01   # $
+
+PRO_FORMA_INPUTS = [
+    "lot_size", "fsr", "avg_unit_sf", "sell_psf", "profit_margin", "hard_cost_psf",
+    "soft_cost_pct", "dcc_per_unit", "cac_per_unit", "regional_dcc_flat", "dp_fee_flat",
+    "bp_fee_pct", "finance_rate", "ltc_pct", "pre_const_months", "project_months", "sell_months"
+]
+
+def s_curve(x):
+    """Cumulative share of hard costs spent at build fraction x (slow start, peak mid-build, slow finish)."""
+    x = np.clip(x, 0.0, 1.0)
+    return (1 - np.cos(np.pi * x)) / 2
+
+def _schedule_base(total_soft, total_hard, gdv, equity, finance_rate, pre_const_months, project_months, sell_months):
+    """Everything in the draw schedule that does not depend on the land price (trailing month axis)."""
+    total_soft, total_hard, gdv, equity, pre, build, sell = (np.asarray(v, dtype=float)[..., None] for v in (
+        total_soft, total_hard, gdv, equity, pre_const_months, project_months, sell_months))
+    r = (np.asarray(finance_rate, dtype=float) / 100 / 12)[..., None]
+    horizon = int(np.ceil(np.max(pre + build + sell)))
+    m = np.arange(horizon + 1, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        soft_share = np.where(pre > 0, np.clip(m / pre, 0, 1), 1.0)
+        hard_share = np.where(build > 0, s_curve((m - pre) / build), (m >= pre).astype(float))
+        rev_share = np.where(sell > 0, np.clip((m - pre - build) / sell, 0, 1), (m >= pre + build).astype(float))
+    return {
+        "months": m, "r": r, "growth": (1 + r) ** m,
+        "cost_ex_land": total_soft * soft_share + total_hard * hard_share,
+        "cum_revenue": gdv * rev_share, "equity": equity,
+    }
+
+def _loan_balance(base, land):
+    # Equity first: the loan only funds cost beyond the equity commitment.
+    # B_t = B_{t-1}(1+r) + flow_t  ==  (1+r)^t * cumsum(flow_s / (1+r)^s); once sales clear it, it stays clear
+    cum_draw = np.maximum(base["cost_ex_land"] + (np.maximum(land, 0.0)[..., None] - base["equity"]), 0.0)
+    net_flow = np.diff(cum_draw - base["cum_revenue"], axis=-1, prepend=0.0)
+    growth = base["growth"]
+    return np.maximum(growth * np.cumsum(net_flow / growth, axis=-1), 0.0)
+
+def _finance_cost(base, land):
+    balance = _loan_balance(base, land)
+    return base["r"][..., 0] * (balance.sum(axis=-1) - balance[..., -1])
+
+def _base_rows(base, shape):
+    """The schedule base broadcast to `shape` and flattened to one row per scenario."""
+    T = len(base["months"])
+    flat = {"months": base["months"]}
+    for k, v in base.items():
+        if k != "months":
+            flat[k] = np.broadcast_to(v, shape + (v.shape[-1] if v.shape[-1] == T else 1,)).reshape(-1, v.shape[-1])
+    return flat
+
+def _solve_land(base, before_finance):
+    """Land value per scenario (NaN where the solve failed to converge) and the converged mask."""
+    shape = np.broadcast_shapes(np.shape(before_finance), base["growth"].shape[:-1], base["cost_ex_land"].shape[:-1],
+                                base["r"].shape[:-1], base["equity"].shape[:-1])
+    rows = _base_rows(base, shape)
+    bf = np.broadcast_to(before_finance, shape).ravel().astype(float)
+
+    # h(bf) = interest(bf) >= 0, and the fixed-point step x = bf - interest(bf) has h(x) <= 0
+    b, hb = bf, _finance_cost(rows, bf)
+    a = b - hb
+    ha = a - bf + _finance_cost(rows, a)
+    x = np.where(hb - ha > 0, b - hb * (b - a) / np.where(hb - ha > 0, hb - ha, 1.0), a)
+    x_prev, h_prev = a, ha
+
+    land = np.full(bf.size, np.nan)
+    active = np.arange(bf.size)
+    for _ in range(LAND_FIXED_POINT_ITERS):
+        hx = x - bf + _finance_cost(rows, x)
+        done = (np.abs(hx) < LAND_FIXED_POINT_TOL) | (b - a < LAND_FIXED_POINT_TOL)
+        land[active[done]] = x[done]
+        if done.all():
+            break
+        if done.any():  # converged rows leave the working set
+            keep = ~done
+            active, bf, x, hx, a, b, x_prev, h_prev = (v[keep] for v in (active, bf, x, hx, a, b, x_prev, h_prev))
+            rows = {k: (v if k == "months" else v[keep]) for k, v in rows.items()}
+        a, b = np.where(hx < 0, x, a), np.where(hx < 0, b, x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = x - hx * (x - x_prev) / (hx - h_prev)
+        x_prev, h_prev = x, hx
+        x = np.where(np.isfinite(step) & (step > a) & (step < b), step, (a + b) / 2)
+    return land.reshape(shape), ~np.isnan(land).reshape(shape)
+
+def draw_schedule(base, land):
+    """
+    Monthly financing arrays with a trailing time axis (month 0 = land closing):
+    cumulative cost / revenue / interest, loan balance and equity cash flow.
+    """
+    balance = _loan_balance(base, land)
+    r = base["r"]
+    prev_balance = np.concatenate([np.zeros_like(balance[..., :1]), balance[..., :-1]], axis=-1)
+    interest = r * prev_balance
+    cum_cost = base["cost_ex_land"] + np.maximum(land, 0.0)[..., None]
+    loan_flow = balance - prev_balance * (1 + r)
+    equity_cf = np.diff(base["cum_revenue"] - cum_cost, axis=-1, prepend=0.0) + loan_flow
+    return {
+        "months": base["months"], "cum_cost": cum_cost, "cum_revenue": base["cum_revenue"],
+        "loan_balance": balance, "cum_interest": np.cumsum(interest, axis=-1), "equity_cf": equity_cf,
+        "finance_cost": interest.sum(axis=-1), "peak_loan": balance.max(axis=-1),
+    }
+
+def pro_forma(lot_size, fsr, avg_unit_sf, sell_psf, profit_margin, hard_cost_psf, soft_cost_pct,
+              dcc_per_unit, cac_per_unit, regional_dcc_flat, dp_fee_flat, bp_fee_pct,
+              finance_rate, ltc_pct, pre_const_months, project_months, sell_months, monthly=False):
+    """
+    Returns every pro forma line (GDV through residual land value) as broadcast arrays.
+    Land value and interest depend on each other, so the residual is solved
+    on the draw schedule; "converged" marks the rows where that worked (the
+    others come back as NaN). `monthly=True` adds the draw_schedule arrays
+    (chart series, equity cash flows, peak loan) under "schedule".
+    """
+    lot_size, fsr, avg_unit_sf, sell_psf, profit_margin, hard_cost_psf = (np.asarray(v, dtype=float) for v in (lot_size, fsr, avg_unit_sf, sell_psf, profit_margin, hard_cost_psf))
+    buildable_sf = lot_size * fsr
+    with np.errstate(divide="ignore", invalid="ignore"):
+        est_units = np.where(avg_unit_sf > 0, buildable_sf / avg_unit_sf, 0.0)
+
+    gdv = buildable_sf * sell_psf
+    target_profit = gdv * (profit_margin / 100)
+
+    total_hard = buildable_sf * hard_cost_psf
+    pure_soft_costs = total_hard * (np.asarray(soft_cost_pct, dtype=float) / 100)
+
+    total_dcc = est_units * dcc_per_unit
+    total_cac = est_units * cac_per_unit
+    total_regional_dcc = np.asarray(regional_dcc_flat, dtype=float)
+    total_dp = np.asarray(dp_fee_flat, dtype=float)
+    total_bp = total_hard * (np.asarray(bp_fee_pct, dtype=float) / 100)
+    total_city_fees = total_dcc + total_cac + total_regional_dcc + total_dp + total_bp
+    total_soft_combined = pure_soft_costs + total_city_fees
+
+    # Total project cost (land + costs + interest) is GDV less profit whatever the split,
+    # so the loan commitment and the equity that goes in ahead of it are fixed up front
+    total_project_cost = gdv - target_profit
+    bank_loan = total_project_cost * (np.asarray(ltc_pct, dtype=float) / 100)
+    equity_required = total_project_cost - bank_loan
+
+    # Land = before_finance - interest(land): bracketed secant solve on the draw schedule
+    before_finance = total_project_cost - (total_hard + total_soft_combined)
+    base = _schedule_base(total_soft_combined, total_hard, gdv, equity_required,
+                          finance_rate, pre_const_months, project_months, sell_months)
+    land, converged = _solve_land(base, before_finance)
+    finance_cost = before_finance - land
+
+    out = {
+        "buildable_sf": buildable_sf, "est_units": est_units,
+        "gdv": gdv, "target_profit": target_profit,
+        "total_hard": total_hard, "pure_soft_costs": pure_soft_costs,
+        "total_dcc": total_dcc, "total_cac": total_cac, "total_regional_dcc": total_regional_dcc,
+        "total_dp": total_dp, "total_bp": total_bp, "total_city_fees": total_city_fees,
+        "total_soft_combined": total_soft_combined, "finance_cost": finance_cost,
+        "total_project_cost": total_project_cost, "bank_loan": bank_loan, "equity_required": equity_required,
+        "residual_land_value": land, "converged": converged,
+    }
+    if monthly:
+        out["schedule"] = draw_schedule(base, land)
+    return out
+
+def residual_land_value(**inputs):
+    return pro_forma(**inputs)["residual_land_value"]
+
+def sensitivity_cube(inputs, sale_psf_values, hard_psf_values, slice_name=None, slice_values=None):
+    """
+    Residual land value over sale $/SF (columns) x hard cost $/SF (rows), optionally
+    stacked over a third input (e.g. "finance_rate" or "fsr").
+    Shape: (len(hard), len(sale)), or (len(slice), len(hard), len(sale)) with a slice axis.
+    """
+    params = dict(inputs)
+    params["sell_psf"] = np.asarray(sale_psf_values, dtype=float)[None, :]
+    params["hard_cost_psf"] = np.asarray(hard_psf_values, dtype=float)[:, None]
+    if slice_name:
+        params["sell_psf"] = params["sell_psf"][None, :, :]
+        params["hard_cost_psf"] = params["hard_cost_psf"][None, :, :]
+        params[slice_name] = np.asarray(slice_values, dtype=float)[:, None, None]
+    return residual_land_value(**params)
+
+# ==========================================
+# 🎯 GOAL SEEK (BRACKETED, VECTORIZED)
+# ==========================================
+# For a land asking price, find the value of one input at which the residual
+# land value exactly equals the asking price. Bisection runs on whole arrays,
+# so every product type (or every site) is solved in the same iterations.
+GOAL_SEEK_BRACKETS = {
+    "sell_psf": (0.0, 10000.0),       # break-even sale $/SF (minimum)
+    "hard_cost_psf": (0.0, 5000.0),   # max hard cost $/SF
+    "finance_rate": (0.0, 50.0),      # max loan rate %
+}
+
+def goal_seek(inputs, solve_var, target_land, lo=None, hi=None, tol=1e-4, residual_fn=None):
+    """
+    Bisection for residual_fn(inputs with solve_var=x) == target_land, elementwise.
+    Cells with no sign change inside [lo, hi] come back as +inf / -inf when the
+    target is met across the whole bracket (the threshold lies past hi / below
+    lo) and NaN when it is met nowhere in it.
+    `residual_fn` defaults to residual_land_value.
+    """
+    residual_fn = residual_fn or residual_land_value
+    b_lo, b_hi = GOAL_SEEK_BRACKETS.get(solve_var, (lo, hi))
+    lo = b_lo if lo is None else lo
+    hi = b_hi if hi is None else hi
+    target_land = np.asarray(target_land, dtype=float)
+
+    def f(x):
+        params = dict(inputs)
+        params[solve_var] = x
+        value = residual_fn(**params)
+        return np.where(np.isnan(value), -np.inf, value) - target_land  # unsolved land: below any target
+
+    shape = np.broadcast(f(np.asarray(lo, dtype=float)), target_land).shape
+    a = np.broadcast_to(np.asarray(lo, dtype=float), shape).copy()
+    b = np.broadcast_to(np.asarray(hi, dtype=float), shape).copy()
+    fa, fb = f(a), f(b)
+    bracketed = np.sign(fa) != np.sign(fb)
+    # no crossing: met across the whole bracket -> past the end where f is lower; met nowhere -> NaN
+    unbracketed = np.where((fa >= 0) & (fb >= 0), np.where(fa >= fb, np.inf, -np.inf), np.nan)
+
+    iters = int(np.ceil(np.log2(max(np.max(b - a), tol) / tol)))
+    for _ in range(iters):
+        mid = (a + b) / 2
+        fm = f(mid)
+        left = np.sign(fm) == np.sign(fa)
+        a, fa = np.where(left, mid, a), np.where(left, fm, fa)
+        b = np.where(left, b, mid)
+    return np.where(bracketed, (a + b) / 2, unbracketed)
+
+def solve_thresholds(inputs, target_land, residual_fn=None):
+    """Break-even sale $/SF, max hard cost $/SF and max loan rate for every element of `inputs`."""
+    return {var: goal_seek(inputs, var, target_land, residual_fn=residual_fn) for var in GOAL_SEEK_BRACKETS}
+
+# ==========================================
+# 🗂️ MULTI-SITE BATCH SCREENING
+# ==========================================
+# A table of sites (one row each) is evaluated in chunks of SITE_CHUNK_ROWS
+# through the same broadcast pro forma. Every row is keyed by a hash of its
+# inputs plus the shared assumptions, so re-screening an edited list only
+# recomputes the rows that changed.
+SITE_CHUNK_ROWS = 500
+
+SITE_DEFAULTS = {
+    "site": "", "city": "", "lot_size": 0.0, "product_type": "", "sell_psf": 0.0,
+    "fsr": np.nan, "hard_cost_psf": np.nan, "asking_price": np.nan,
+}
+SITE_RESULT_COLUMNS = [
+    "residual_land_value", "equity_required", "target_profit", "roe", "equity_irr", "land_surplus"
+]
+SHARED_SITE_INPUTS = [
+    "avg_unit_sf", "profit_margin", "soft_cost_pct", "dcc_per_unit", "cac_per_unit", "regional_dcc_flat",
+    "dp_fee_flat", "bp_fee_pct", "finance_rate", "ltc_pct", "pre_const_months", "project_months"
+]
+
+def sites_frame(sites, build_data):
+    """
+    Raw site rows -> typed DataFrame with FSR / hard cost / sell-out filled from
+    build_data where blank. Rows with an unknown product type, no lot size or no
+    sale price are dropped. Returns (DataFrame, n_rejected).
+    """
+    df = sites.copy() if isinstance(sites, pd.DataFrame) else pd.DataFrame(list(sites))
+    for col, default in SITE_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+        elif isinstance(default, str):
+            df[col] = df[col].fillna("").astype(str).str.strip()
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            if not np.isnan(default):
+                df[col] = df[col].fillna(default)
+
+    known = df["product_type"].isin(list(build_data))
+    valid = known & (df["lot_size"] > 0) & (df["sell_psf"] > 0)
+    df = df[valid].reset_index(drop=True)
+
+    defaults = pd.DataFrame.from_dict(build_data, orient="index")
+    df["fsr"] = df["fsr"].fillna(df["product_type"].map(defaults["fsr"]))
+    df["hard_cost_psf"] = df["hard_cost_psf"].fillna(df["product_type"].map(defaults["cost"]))
+    df["sell_months"] = df["product_type"].map(defaults["sell_months"]).astype(float)
+    return df, int((~valid).sum())
+
+def site_keys(df, shared):
+    """Per-row uint64 hash of the site inputs and the shared assumptions."""
+    cols = ["lot_size", "product_type", "fsr", "sell_psf", "hard_cost_psf", "sell_months", "asking_price"]
+    keyed = df[cols].copy()
+    for name in SHARED_SITE_INPUTS:
+        keyed[name] = float(shared[name])
+    return pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+
+def evaluate_sites(df, shared):
+    """RLV, equity, profit, ROE, equity IRR and surplus over the asking price for every row of a sites_frame."""
+    params = {name: shared[name] for name in SHARED_SITE_INPUTS}
+    for col in ["lot_size", "fsr", "sell_psf", "hard_cost_psf", "sell_months"]:
+        params[col] = df[col].to_numpy(dtype=float)
+    pf = pro_forma(monthly=True, **params)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roe = np.where(pf["equity_required"] > 0, pf["target_profit"] / pf["equity_required"] * 100, 0.0)
+    rlv = pf["residual_land_value"]
+    return pd.DataFrame({
+        "residual_land_value": rlv, "equity_required": pf["equity_required"],
+        "target_profit": pf["target_profit"], "roe": roe,
+        "equity_irr": np.where(rlv > 0, irr(pf["schedule"]["equity_cf"]), np.nan),
+        "land_surplus": rlv - df["asking_price"].to_numpy(dtype=float),
+    }, index=df.index)
+
+def iter_site_results(df, shared, cache=None, chunk_rows=SITE_CHUNK_ROWS):
+    """
+    Yields (rows_done, results so far) after every chunk so large lists can be
+    shown as they fill in. `cache` is a dict {site hash: result tuple}; hits are
+    never recomputed and new results are written back to it.
+    """
+    cache = {} if cache is None else cache
+    keys = site_keys(df, shared).tolist()
+    results = pd.DataFrame(np.nan, index=df.index, columns=SITE_RESULT_COLUMNS)
+
+    hit = np.array([k in cache for k in keys], dtype=bool)
+    if hit.any():
+        results.loc[hit] = np.array([cache[k] for k, h in zip(keys, hit) if h])
+    miss = np.flatnonzero(~hit)
+    done = int(hit.sum())
+    if not len(miss):
+        yield done, results
+        return
+
+    for start in range(0, len(miss), chunk_rows):
+        rows = miss[start:start + chunk_rows]
+        part = evaluate_sites(df.iloc[rows], shared)
+        results.iloc[rows] = part[SITE_RESULT_COLUMNS].to_numpy()
+        cache.update(zip([keys[i] for i in rows], map(tuple, part[SITE_RESULT_COLUMNS].to_numpy())))
+        done += len(rows)
+        yield done, results
+
+def rank_sites(df, results, by="residual_land_value"):
+    """Sites joined with their results, ranked best-first on `by` (unviable sites last)."""
+    out = pd.concat([df, results], axis=1)
+    viable = out["residual_land_value"] > 0
+    out["Rank"] = out[by].where(viable).rank(ascending=False, method="first")
+    return out.sort_values(["Rank", by], ascending=[True, False], na_position="last").reset_index(drop=True)
@@ -0,0 +1,284 @@
+import numpy as np
+from tax_engine import load_schedule
+
+# ==========================================
+# 🍁 TFSA vs RRSP LIFECYCLE ENGINE
+# ==========================================
+# Accumulation, then a multi-decade drawdown. Balances don't depend on the
+# retiree's other income, so they are a single path per account; tax, OAS and
+# GIS clawbacks are then evaluated on a (base incomes x years) grid in one
+# broadcast, with bracket thresholds (tax_engine schedules) and benefit
+# thresholds indexed to inflation every year.
+
+OAS_THRESHOLD = 95323.0
+OAS_CLAWBACK_RATE = 0.15
+OAS_MAX_ANNUAL = 8732.0     # full OAS at 65-74; the clawback can't take more than this in total
+GIS_THRESHOLD = 22488.0
+GIS_CLAWBACK_RATE = 0.50
+BENEFIT_AGE = 65
+
+RRIF_CONVERSION_AGE = 71    # minimums start the year after conversion
+RRIF_FACTORS = {
+    71: 5.28, 72: 5.40, 73: 5.53, 74: 5.67, 75: 5.82, 76: 5.98, 77: 6.17, 78: 6.36, 79: 6.58,
+    80: 6.82, 81: 7.08, 82: 7.38, 83: 7.71, 84: 8.08, 85: 8.51, 86: 8.99, 87: 9.55, 88: 10.21,
+    89: 10.99, 90: 11.92, 91: 13.06, 92: 14.49, 93: 16.34, 94: 18.79,
+}
+RRIF_FACTOR_CAP = 20.0      # age 95+
+
+def rrif_minimum_rate(age):
+    """Minimum withdrawal as a fraction of the Jan 1 balance (0 before the RRIF starts)."""
+    age = np.asarray(age, dtype=float)
+    table = np.array([RRIF_FACTORS.get(a, RRIF_FACTOR_CAP) for a in range(RRIF_CONVERSION_AGE, 96)]) / 100
+    idx = np.clip(age - RRIF_CONVERSION_AGE, 0, len(table) - 1).astype(int)
+    return np.where(age > RRIF_CONVERSION_AGE, table[idx], 0.0)
+
+def accumulate(lump, annual, rate, years):
+    """Balance at the end of each year 0..years (contributions at year end)."""
+    y = np.arange(int(years) + 1, dtype=float)
+    g = (1 + rate) ** y
+    return lump * g + annual * ((g - 1) / rate if rate != 0 else y)
+
+def drawdown(start_balance, planned, rate, ages):
+    """
+    Year-by-year withdrawals: the planned amount, or the RRIF minimum if larger,
+    never more than the balance. Returns (withdrawals, opening balances).
+    """
+    # With the years where the RRIF minimum binds fixed, the balance is an affine
+    # recurrence with a closed form. Regimes only depend on earlier years, so
+    # re-deriving them from the balances settles at least one more year per pass.
+    min_rate = rrif_minimum_rate(ages)
+    planned = np.asarray(planned, dtype=float)
+    rrif = np.zeros(len(ages), dtype=bool)
+    for _ in range(len(ages) + 1):
+        keep = np.where(rrif, 1 - min_rate, 1.0) * (1 + rate)
+        take = np.where(rrif, 0.0, planned) * (1 + rate)
+        growth = np.concatenate(([1.0], np.cumprod(keep)))
+        taken = np.concatenate(([0.0], np.cumsum(take / growth[1:])))
+        opening = np.maximum(growth[:-1] * (start_balance - taken[:-1]), 0.0)  # exhausted balances stay at 0
+        binding = opening * min_rate > planned
+        if np.array_equal(binding, rrif):
+            break
+        rrif = binding
+    withdrawals = np.minimum(np.maximum(planned, opening * min_rate), opening)
+    return withdrawals, opening
+
+def rrsp_drag(withdrawals, base_income, ages, index, schedule):
+    """
+    Income tax, OAS and GIS clawback caused by RRSP withdrawals stacked on top of
+    base income. withdrawals/ages/index: (years,), base_income: (K, 1) -> (K, years) each.
+    """
+    base = np.asarray(base_income, dtype=float) * index
+    total = base + withdrawals
+    tax = schedule.tax(total, index) - schedule.tax(base, index)
+
+    on_benefits = ages >= BENEFIT_AGE
+    oas_line, oas_max = OAS_THRESHOLD * index, OAS_MAX_ANNUAL * index
+    # Only the part of the clawback the withdrawals add: OAS base income already took can't be lost twice
+    oas = (np.minimum(np.maximum(total - oas_line, 0.0) * OAS_CLAWBACK_RATE, oas_max)
+           - np.minimum(np.maximum(base - oas_line, 0.0) * OAS_CLAWBACK_RATE, oas_max))
+    gis_exposed = np.clip(GIS_THRESHOLD * index - base, 0.0, None)
+    gis = np.minimum(withdrawals, gis_exposed) * GIS_CLAWBACK_RATE
+    return tax, np.where(on_benefits, oas, 0.0), np.where(on_benefits, gis, 0.0)
+
+def lifecycle(invest_amt, annual_invest, current_rate_pct, expected_return, accum_years, retire_age,
+              drawdown_years, swr, inflation, base_incomes, schedule=None):
+    """
+    Full TFSA vs RRSP comparison. `base_incomes` may be a scalar or a 1-D grid
+    (today's dollars). RRSP contributions are grossed up by the current marginal
+    rate (the refund is reinvested), both accounts then draw swr% of their
+    retirement balance, indexed to inflation, with RRIF minimums on the RRSP.
+    `schedule` is a tax_engine.TaxSchedule (defaults to the BC schedule).
+    Returns a dict of year arrays; per-income arrays are shaped (K, years).
+    """
+    schedule = schedule or load_schedule()
+    r, infl = expected_return / 100, inflation / 100
+    t, d = int(accum_years), int(drawdown_years)
+    gross_up = 1 / (1 - current_rate_pct / 100)
+
+    tfsa_accum = accumulate(invest_amt, annual_invest, r, t)
+    rrsp_accum = accumulate(invest_amt * gross_up, annual_invest * gross_up, r, t)
+
+    ages = retire_age + np.arange(d, dtype=float)
+    index = (1 + infl) ** (t + np.arange(d, dtype=float))  # brackets & benefits indexed from today
+    growth = (1 + infl) ** np.arange(d, dtype=float)
+    tfsa_w, tfsa_open = drawdown(tfsa_accum[-1], tfsa_accum[-1] * swr / 100 * growth, r, ages)
+    rrsp_w, rrsp_open = drawdown(rrsp_accum[-1], rrsp_accum[-1] * swr / 100 * growth, r, ages)
+
+    base = np.atleast_1d(np.asarray(base_incomes, dtype=float))[:, None]
+    tax, oas, gis = rrsp_drag(rrsp_w, base, ages, index, schedule)
+    rrsp_net = rrsp_w - tax - oas - gis
+
+    # Whatever is left at the end: the RRIF is deemed income on top of base income
+    rrsp_end = (rrsp_open[-1] - rrsp_w[-1]) * (1 + r)
+    tfsa_end = (tfsa_open[-1] - tfsa_w[-1]) * (1 + r)
+    end_index = index[-1] * (1 + infl)
+    end_base = base[:, 0] * end_index
+    rrsp_end_net = rrsp_end - (schedule.tax(end_base + rrsp_end, end_index) - schedule.tax(end_base, end_index))
+
+    # Everything in today's dollars for the lifetime comparison
+    real = (1 + infl) ** (t + np.arange(d, dtype=float))
+    advantage = ((rrsp_net - tfsa_w) / real).sum(axis=1) + (rrsp_end_net - tfsa_end) / end_index
+    return {
+        "tfsa_accum": tfsa_accum, "rrsp_accum": rrsp_accum, "ages": ages,
+        "tfsa_withdrawal": tfsa_w, "tfsa_balance": tfsa_open,
+        "rrsp_withdrawal": rrsp_w, "rrsp_balance": rrsp_open,
+        "rrsp_tax": tax, "oas_clawback": oas, "gis_clawback": gis, "rrsp_net": rrsp_net,
+        "tfsa_end": tfsa_end, "rrsp_end": rrsp_end, "rrsp_end_net": rrsp_end_net,
+        "rrsp_advantage": advantage,
+    }
+
+def break_even_incomes(base_incomes, rrsp_advantage):
+    """
+    Base incomes on the grid where the winner flips, linearly interpolated.
+    Returns [(income, winner_above)] with winner_above "RRSP" or "TFSA".
+    """
+    base_incomes = np.asarray(base_incomes, dtype=float)
+    adv = np.asarray(rrsp_advantage, dtype=float)
+    sign = adv >= 0
+    flips = np.flatnonzero(sign[:-1] != sign[1:])
+    frac = adv[flips] / (adv[flips] - adv[flips + 1])
+    incomes = base_incomes[flips] + frac * (base_incomes[flips + 1] - base_incomes[flips])
+    return [(float(x), "RRSP" if up else "TFSA") for x, up in zip(incomes, sign[flips + 1])]
+
+# ==========================================
+# 🧮 CONTRIBUTION SPLIT OPTIMIZER
+# ==========================================
+# Each working year's savings are split: a fraction f goes into the RRSP and
+# the rest, plus the RRSP refund (tax at that year's income minus tax after
+# the deduction), goes into the TFSA up to its room (annual limit indexed to
+# inflation, unused room carried forward). Anything past the room lands in a
+# non-registered account whose growth is taxed every year as capital gains.
+# Retirement spending is the TFSA and non-registered drawdowns plus the RRSP
+# drawdown after tax and clawbacks. Those two add up linearly, so a dynamic
+# program over the RRSP total at retirement (discretized into RRSP_STATES
+# bins) keeps, for every total, the path with the most of them, carrying the
+# TFSA room each path has used. Each year is one vectorized step over
+# states x fractions; the winning path is then replayed exactly.
+RRSP_ROOM_PCT = 0.18
+RRSP_DOLLAR_LIMIT = 31560.0
+TFSA_ANNUAL_LIMIT = 7000.0       # indexed to inflation in $500 steps
+TFSA_LIMIT_STEP = 500.0
+CAPITAL_GAINS_INCLUSION = 0.5
+SPLIT_STEPS = 21                 # 0%, 5%, ... 100% to the RRSP
+RRSP_STATES = 3000
+
+def annuity_factor(rate, years):
+    """Level annual payment per $1 over `years` with withdrawals at the start of each year."""
+    if rate == 0:
+        return 1 / years
+    return rate / ((1 + rate) * (1 - (1 + rate) ** -years))
+
+def tfsa_limits(index):
+    """New TFSA room each year: TFSA_ANNUAL_LIMIT indexed to inflation, rounded to TFSA_LIMIT_STEP."""
+    return np.round(TFSA_ANNUAL_LIMIT * np.asarray(index, dtype=float) / TFSA_LIMIT_STEP) * TFSA_LIMIT_STEP
+
+def optimize_split(current_income, wage_growth, invest_amt, annual_invest, expected_return, inflation,
+                   accum_years, retire_age, drawdown_years, base_income, tfsa_room=None, schedule=None):
+    """
+    Best RRSP fraction of each year's savings for after-tax retirement spending
+    (today's dollars). `tfsa_room` is today's unused TFSA room (defaults to one
+    year's limit); TFSA overflow goes to a non-registered account. Returns the
+    schedule plus no-RRSP / all-RRSP benchmarks under the same room limits.
+    """
+    schedule = schedule or load_schedule()
+    r, infl, g = expected_return / 100, inflation / 100, wage_growth / 100
+    t, d = max(int(accum_years), 1), max(int(drawdown_years), 1)
+    y = np.arange(t, dtype=float)
+
+    income = current_income * (1 + g) ** y
+    index = (1 + infl) ** y
+    savings = np.full(t, float(annual_invest))
+    savings[0] += invest_amt
+    room = np.minimum(income * RRSP_ROOM_PCT, RRSP_DOLLAR_LIMIT * index)
+    new_tfsa_room = tfsa_limits(index)
+    new_tfsa_room[0] = TFSA_ANNUAL_LIMIT if tfsa_room is None else float(tfsa_room)
+    tfsa_room_total = np.cumsum(new_tfsa_room)
+
+    # Every (year, fraction) option: RRSP deposit, refund, and each account's value in retirement-day real dollars
+    fracs = np.linspace(0, 1, SPLIT_STEPS)
+    rrsp_dep = np.minimum(savings[:, None] * fracs, room[:, None])
+    cash_dep = savings[:, None] - rrsp_dep
+    refund = schedule.tax(income[:, None], index[:, None]) - schedule.tax(income[:, None] - rrsp_dep, index[:, None])
+    cash = cash_dep + refund
+    deflate = (1 + infl) ** t
+    fv = ((1 + r) ** (t - y))[:, None] / deflate
+    rrsp_fv = rrsp_dep * fv
+    tfsa_fv = cash_dep * fv + refund * fv / (1 + r)  # refund lands the following spring
+    taxed_growth = 1 + r * (1 - CAPITAL_GAINS_INCLUSION * schedule.marginal(income, index) / 100)
+    taxed = np.append(np.cumprod(taxed_growth[::-1])[::-1], 1.0)  # growth from year y to retirement
+    nonreg_fv = (cash_dep * taxed[:-1, None] + refund * taxed[1:, None]) / deflate
+
+    real_r = (1 + r) / (1 + infl) - 1
+    a = annuity_factor(real_r, d)
+    ret_r = r * (1 - CAPITAL_GAINS_INCLUSION * schedule.marginal(float(base_income)) / 100)
+    a_nonreg = annuity_factor((1 + ret_r) / (1 + infl) - 1, d)
+    ages = np.asarray(retire_age, dtype=float)
+
+    def spending(rrsp_total, liquid):
+        """liquid = TFSA total + non-registered total weighted by its (lower) after-tax annuity."""
+        w = rrsp_total * a
+        tax, oas, gis = rrsp_drag(w, np.asarray(base_income, dtype=float), ages, 1.0, schedule)
+        return liquid * a + w - tax - oas - gis
+
+    nonreg_w = nonreg_fv * (a_nonreg / a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tfsa_per, nonreg_per = np.where(cash > 0, tfsa_fv / cash, 0.0), np.where(cash > 0, nonreg_w / cash, 0.0)
+
+    # DP over the RRSP-total state; value = best liquid total reaching it, used = TFSA room it has taken
+    bin_width = max(rrsp_fv.max(axis=1).sum(), 1.0) / (RRSP_STATES - 1)
+    steps = np.rint(rrsp_fv / bin_width).astype(int)
+    value = np.full(RRSP_STATES, -np.inf)
+    value[0] = 0.0
+    rrsp_exact, used = np.zeros(RRSP_STATES), np.zeros(RRSP_STATES)
+    choices = np.zeros((t, RRSP_STATES), dtype=int)
+    for yr in range(t):
+        room_left = np.maximum(tfsa_room_total[yr] - used, 0.0)
+        cand_v = np.full((SPLIT_STEPS, RRSP_STATES), -np.inf)
+        cand_r = np.zeros((SPLIT_STEPS, RRSP_STATES))
+        cand_u = np.zeros((SPLIT_STEPS, RRSP_STATES))
+        for f, k in enumerate(steps[yr]):
+            src = slice(0, RRSP_STATES - k)
+            into_tfsa = np.minimum(cash[yr, f], room_left[src])
+            cand_v[f, k:] = value[src] + into_tfsa * tfsa_per[yr, f] + (cash[yr, f] - into_tfsa) * nonreg_per[yr, f]
+            cand_r[f, k:] = rrsp_exact[src] + rrsp_fv[yr, f]
+            cand_u[f, k:] = used[src] + into_tfsa
+        choices[yr] = np.argmax(cand_v, axis=0)
+        pick = choices[yr][None]
+        value = np.take_along_axis(cand_v, pick, axis=0)[0]
+        rrsp_exact = np.take_along_axis(cand_r, pick, axis=0)[0]
+        used = np.take_along_axis(cand_u, pick, axis=0)[0]
+
+    reachable = np.isfinite(value)
+    state = int(np.argmax(np.where(reachable, spending(rrsp_exact, np.where(reachable, value, 0.0)), -np.inf)))
+    dp_choice = np.zeros(t, dtype=int)
+    for yr in range(t - 1, -1, -1):
+        dp_choice[yr] = choices[yr, state]
+        state -= steps[yr, dp_choice[yr]]
+
+    rows = np.arange(t)
+    def replay(choice):
+        """Exact TFSA / non-registered deposits and retirement totals for one schedule."""
+        c = cash[rows, choice]
+        into_tfsa = np.zeros(t)
+        for yr in range(t):
+            into_tfsa[yr] = min(c[yr], max(tfsa_room_total[yr] - into_tfsa[:yr].sum(), 0.0))
+        share = np.where(c > 0, into_tfsa / np.where(c > 0, c, 1.0), 1.0)
+        return {"tfsa": into_tfsa, "nonreg": c - into_tfsa, "rrsp_total": rrsp_fv[rows, choice].sum(),
+                "tfsa_total": (tfsa_fv[rows, choice] * share).sum(), "nonreg_total": (nonreg_fv[rows, choice] * (1 - share)).sum()}
+
+    # Binning can cost a few dollars, so the DP path is re-scored exactly and has to beat the single-account paths
+    paths = {"dp": dp_choice, "all_tfsa": np.zeros(t, dtype=int), "all_rrsp": np.full(t, SPLIT_STEPS - 1)}
+    plans = {k: replay(c) for k, c in paths.items()}
+    scores = {k: float(spending(p["rrsp_total"], p["tfsa_total"] + p["nonreg_total"] * a_nonreg / a)) for k, p in plans.items()}
+    best = max(scores, key=scores.get)
+    choice, plan = paths[best], plans[best]
+
+    return {
+        "years": y, "income": income, "savings": savings, "rrsp_room": room,
+        "tfsa_room": tfsa_room_total - np.concatenate(([0.0], np.cumsum(plan["tfsa"])[:-1])),
+        "rrsp_fraction": np.where(savings > 0, rrsp_dep[rows, choice] / savings, 0.0), "rrsp_deposit": rrsp_dep[rows, choice],
+        "tfsa_deposit": plan["tfsa"], "nonreg_deposit": plan["nonreg"], "refund": refund[rows, choice],
+        "rrsp_at_retirement": plan["rrsp_total"] * deflate, "tfsa_at_retirement": plan["tfsa_total"] * deflate,
+        "nonreg_at_retirement": plan["nonreg_total"] * deflate,
+        "spending": scores[best], "all_tfsa": scores["all_tfsa"], "all_rrsp": scores["all_rrsp"],
+    }
@@ -0,0 +1,383 @@
+import numpy as np
+import pandas as pd
+from finance_engine import npv, irr
+
+# ==========================================
+# 🏢 RENTAL MULTI-TOOL UNDERWRITING ENGINE
+# ==========================================
+# Column-wise NOI / mortgage / cap rate / CoC for a whole listings table,
+# ranked with a single argsort. Works the same for 3 listings or 30,000.
+LISTING_DEFAULTS = {
+    "address": "", "lat": 0.0, "lon": 0.0, "price": 0, "tax": 0, "strata": 0, "rent": 0,
+    "beds": 1, "baths": 1, "sqft": 0, "year": 2000, "ins": 100
+}
+UNRANKED = 0   # ranks start at 1, so 0 can never be a real one
+RESERVE_PCT = 0.05
+
+def listings_frame(listings):
+    """list-of-dicts (or DataFrame) -> DataFrame with every listing column present and typed."""
+    df = listings.copy() if isinstance(listings, pd.DataFrame) else pd.DataFrame(list(listings))
+    for col, default in LISTING_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+        elif col == "address":
+            df[col] = df[col].fillna("").astype(str)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(default)
+    return df
+
+def mortgage_payment(loan, annual_rate_pct, amort_years):
+    """Monthly P&I. Broadcasts over arrays of loans."""
+    n = amort_years * 12
+    r = (annual_rate_pct / 100) / 12
+    loan = np.asarray(loan, dtype=float)
+    if r > 0:
+        return loan * (r * (1 + r)**n) / ((1 + r)**n - 1)
+    return loan / n
+
+def rank_desc(values, eligible):
+    """1-based rank by descending value among eligible rows (stable on ties), UNRANKED elsewhere."""
+    values = np.asarray(values, dtype=float)
+    eligible = np.asarray(eligible, dtype=bool)
+    rank = np.full(len(values), UNRANKED, dtype=np.int64)
+    idx = np.flatnonzero(eligible)
+    order = idx[np.argsort(-values[idx], kind="stable")]
+    rank[order] = np.arange(1, len(order) + 1)
+    return rank
+
+def underwrite_listings(listings, dp_mode, dp_val, m_rate, m_amort, mgmt_fee_pct):
+    """
+    Mapped listings (lat & lon set) -> results table with the columns the page
+    displays plus 'Rank' (1 = best CoC among priced listings).
+    """
+    df = listings_frame(listings)
+    df = df[(df["lat"] != 0) & (df["lon"] != 0)].reset_index(drop=True)
+
+    price = df["price"].to_numpy(dtype=float)
+    rent = df["rent"].to_numpy(dtype=float)
+    sqft = df["sqft"].to_numpy(dtype=float)
+    priced = price > 0
+
+    gross_inc = rent * 12
+    op_ex = df["tax"].to_numpy(dtype=float) + df["strata"].to_numpy(dtype=float) * 12 + df["ins"].to_numpy(dtype=float) * 12 \
+        + gross_inc * (mgmt_fee_pct / 100) + gross_inc * RESERVE_PCT
+
+    dp_amt = price * (dp_val / 100) if "Percent" in dp_mode else np.full(len(df), float(dp_val))
+    ann_mtg = mortgage_payment(price - dp_amt, m_rate, m_amort) * 12
+    noi = np.where(priced, gross_inc - op_ex, 0.0)
+    dp_amt = np.where(priced, dp_amt, 0.0)
+    ann_mtg = np.where(priced, ann_mtg, 0.0)
+    net_cf = noi - ann_mtg
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coc = np.where(priced & (dp_amt > 0), net_cf / dp_amt * 100, 0.0)
+        cap = np.where(priced, noi / price * 100, 0.0)
+        psf = np.where(priced & (sqft > 0), price / sqft, 0.0)
+
+    out = pd.DataFrame({
+        "Address": df["address"], "Price": price, "Area (sqft)": sqft,
+        "PSF": psf, "Gross Annual Rent": gross_inc, "Annual OpEx": op_ex,
+        "Annual Mortg": ann_mtg, "Annual Net Cash Flow": net_cf,
+        "Cap Rate %": cap, "CoC %": coc, "DP_RAW": dp_amt,
+        "lat": df["lat"].to_numpy(dtype=float), "lon": df["lon"].to_numpy(dtype=float)
+    })
+    out["Rank"] = rank_desc(coc, priced)
+    return out
+
+# ==========================================
+# 🚇 TENANT DEMAND (PROXIMITY) SCORING
+# ==========================================
+TRANSIT_WALK_M = 800       # ~10 minute walk
+TRANSIT_FAR_M = 2000       # beyond this, transit adds nothing
+GROCERY_RADIUS_M = 1000
+PROXIMITY_COLUMNS = ["SkyTrain (m)", "SkyTrain ≤800m", "Grocery ≤1km"]
+GROCERY_FULL_COUNT = 3
+
+def add_proximity_features(df, poi_indexes):
+    """Adds nearest-SkyTrain distance and SkyTrain/grocery counts for every row in one pass per POI type."""
+    df = df.copy()
+    lats, lons = df["lat"].to_numpy(dtype=float), df["lon"].to_numpy(dtype=float)
+    transit, grocery = poi_indexes.get("SkyTrain"), poi_indexes.get("Grocery")
+    if transit is not None and len(transit):
+        near, cnt = transit.proximity(lats, lons, TRANSIT_WALK_M)
+        df["SkyTrain (m)"], df["SkyTrain ≤800m"] = near, cnt
+    else:
+        df["SkyTrain (m)"], df["SkyTrain ≤800m"] = np.inf, 0
+    if grocery is not None and len(grocery):
+        _, cnt = grocery.proximity(lats, lons, GROCERY_RADIUS_M)
+        df["Grocery ≤1km"] = cnt
+    else:
+        df["Grocery ≤1km"] = 0
+    return df
+
+def demand_score(df):
+    """0-1 score: 60% transit distance (linear to 0 at 2km), 40% grocery density (3+ within 1km = full)."""
+    transit = np.clip(1 - (df["SkyTrain (m)"].to_numpy(dtype=float) - TRANSIT_WALK_M) / (TRANSIT_FAR_M - TRANSIT_WALK_M), 0, 1)
+    grocery = np.minimum(df["Grocery ≤1km"].to_numpy(dtype=float) / GROCERY_FULL_COUNT, 1)
+    return 0.6 * transit + 0.4 * grocery
+
+def demand_adjusted_rank(df, uplift_pts):
+    """Rank on CoC % plus up to `uplift_pts` percentage points for a perfect demand score."""
+    score = demand_score(df)
+    adj = df["CoC %"].to_numpy(dtype=float) + uplift_pts * score
+    return score, adj, rank_desc(adj, df["Rank"].to_numpy() != UNRANKED)
+
+# ==========================================
+# 📥 BULK LISTING IMPORT (CSV / XLSX / XLS)
+# ==========================================
+# MLS tool exports are read in chunks, header names are mapped onto our
+# listing columns, money strings ("$1,250") are parsed, and rows without a
+# usable price/address are rejected. Output is one compact, typed DataFrame.
+IMPORT_CHUNK_ROWS = 1000
+
+COLUMN_ALIASES = {
+    "address": ["address", "street address", "full address", "property address", "addr"],
+    "price": ["price", "list price", "listing price", "asking price", "lp", "current price"],
+    "rent": ["rent", "monthly rent", "est rent", "estimated rent", "market rent"],
+    "tax": ["tax", "taxes", "gross taxes", "property tax", "annual tax", "annual taxes"],
+    "strata": ["strata", "strata fee", "strata fees", "maint fee", "maintenance fee", "hoa", "condo fee"],
+    "ins": ["ins", "insurance", "monthly insurance"],
+    "beds": ["beds", "bedrooms", "br", "tot br", "total bedrooms"],
+    "baths": ["baths", "bathrooms", "ba", "tot baths", "total baths"],
+    "sqft": ["sqft", "sq ft", "square feet", "floor area", "totflarea", "fin sqft", "living area"],
+    "year": ["year", "year built", "yr blt", "yrblt", "built"],
+    "lat": ["lat", "latitude"],
+    "lon": ["lon", "lng", "long", "longitude"],
+}
+_ALIAS_LOOKUP = {alias: col for col, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+COMPACT_DTYPES = {
+    "price": "float64", "rent": "float32", "tax": "float32", "strata": "float32", "ins": "float32",
+    "beds": "int16", "baths": "float32", "sqft": "int32", "year": "int16",  # half baths are common
+    "lat": "float64", "lon": "float64",
+}
+
+def _clean_header(h):
+    return " ".join(str(h).strip().lower().replace("_", " ").replace(".", " ").split())
+
+def normalize_chunk(chunk):
+    """Raw rows -> (valid listings in our schema, number of rejected rows)."""
+    chunk = chunk.rename(columns=lambda h: _ALIAS_LOOKUP.get(_clean_header(h), _clean_header(h)))
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+    out = pd.DataFrame(index=chunk.index)
+    for col, default in LISTING_DEFAULTS.items():
+        if col not in chunk.columns:
+            out[col] = default
+        elif col == "address":
+            out[col] = chunk[col].fillna("").astype(str).str.strip()
+        else:
+            raw = chunk[col]
+            if not pd.api.types.is_numeric_dtype(raw):
+                raw = raw.astype(str).str.replace(r"[$,\s]", "", regex=True)
+            out[col] = pd.to_numeric(raw, errors="coerce").fillna(default)
+
+    has_loc = (out["address"] != "") | ((out["lat"] != 0) & (out["lon"] != 0))
+    valid = has_loc & (out["price"] > 0) & (out["rent"] >= 0)
+    out = out[valid]
+    return out.astype(COMPACT_DTYPES), int((~valid).sum())
+
+def iter_raw_chunks(file, filename, chunksize=IMPORT_CHUNK_ROWS):
+    """Yields raw DataFrames of at most `chunksize` rows without loading the whole sheet first."""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        yield from pd.read_csv(file, chunksize=chunksize, dtype=str, skipinitialspace=True)
+    elif name.endswith(".xlsx"):
+        import openpyxl
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        buf = []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+        wb.close()
+    elif name.endswith(".xls"):
+        # xlrd has no streaming reader; chunk after the single read
+        df = pd.read_excel(file, engine="xlrd")
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        raise ValueError(f"Unsupported file type: {filename}")
+
+def import_listings(file, filename, chunksize=IMPORT_CHUNK_ROWS, on_chunk=None):
+    """
+    Streams a CSV/XLSX/XLS export into a compact listings DataFrame.
+    `on_chunk(rows_read)` is called after every chunk (for a progress bar).
+    Returns (DataFrame, {"rows": n_read, "imported": n_ok, "rejected": n_bad}).
+    """
+    parts, n_read, n_bad = [], 0, 0
+    for raw in iter_raw_chunks(file, filename, chunksize):
+        good, bad = normalize_chunk(raw)
+        parts.append(good)
+        n_read += len(raw)
+        n_bad += bad
+        if on_chunk: on_chunk(n_read)
+    df = pd.concat(parts, ignore_index=True) if parts else listings_frame([]).astype(COMPACT_DTYPES)
+    return df, {"rows": n_read, "imported": len(df), "rejected": n_bad}
+
+def listings_to_columns(df):
+    """DataFrame -> {column: list} for the JSON vault (far smaller than a list of dicts)."""
+    return {col: df[col].tolist() for col in LISTING_DEFAULTS}
+
+def listings_from_columns(cols):
+    if not cols:
+        return listings_frame([]).astype(COMPACT_DTYPES)
+    return listings_frame(pd.DataFrame(cols)).astype(COMPACT_DTYPES)
+
+# ==========================================
+# 📊 RENTAL VS STOCK CASH FLOWS
+# ==========================================
+# Both paths start with the same equity (down payment + 2% closing costs).
+# The rental runs monthly: rent, opex and debt service every month, income
+# tax at each year-end, sale at the end of the hold. The stock path reinvests
+# its dividends (after tax in a non-registered account), so only the equity
+# and the sale reach the investor; dividends and their tax are reported as
+# memo lines. The mortgage balance is closed form by month and each hold
+# period only changes where the sale lands, so every hold from 1 to 40 years
+# is one set of arrays.
+ACCOUNT_TYPES = ["Non-Registered", "TFSA", "RRSP"]
+CLOSING_COST_PCT = 0.02
+RE_SELL_PCT, RE_SELL_FIXED = 0.035, 2000.0
+ST_SELL_PCT = 0.01
+CG_INCLUSION = 0.5
+RVS_AMORT_YEARS = 25
+MAX_HOLD_YEARS = 40
+
+RENTAL_FLOWS = ["equity", "rent", "opex", "debt_service", "tax", "sale"]
+STOCK_FLOWS = ["equity", "dividends", "tax", "sale"]
+
+def _amortization(loan, annual_rate_pct, amort_years, n_months):
+    """Monthly (payment, balance, interest) for months 0..n_months; payments stop once amortized."""
+    k = np.arange(n_months + 1)
+    m = annual_rate_pct / 100 / 12
+    pmt = float(mortgage_payment(loan, annual_rate_pct, amort_years)) if loan > 0 else 0.0
+    live = np.minimum(k, amort_years * 12)
+    g = (1 + m) ** live
+    balance = np.maximum(loan * g - pmt * ((g - 1) / m if m > 0 else live), 0.0)
+    payment = np.where((k >= 1) & (k <= amort_years * 12), pmt, 0.0)
+    interest = np.concatenate([[0.0], balance[:-1] * m]) * (payment > 0)
+    return payment, balance, interest
+
+def rental_vs_stock(price, inv, rate, apprec, rent, costs, total_return, s_div, tax_rate, acc_type, hold_years):
+    """
+    Take-home totals for every tax rate / account type (broadcast together
+    into S scenarios) and every hold period: {name: (S, H)} arrays, plus the
+    per-year rental tax / net cash and stock dividends as (S, max_hold) arrays.
+    """
+    holds = np.atleast_1d(np.asarray(hold_years, dtype=int))
+    n_years = int(holds.max())
+    t = np.atleast_1d(np.asarray(tax_rate, dtype=float))
+    acc = np.atleast_1d(np.asarray(acc_type))
+    t, acc = (x.ravel()[:, None] for x in np.broadcast_arrays(t, acc))
+    t = t / 100
+
+    # Rental: yearly operating lines from the monthly amortization
+    payment, balance, interest = _amortization(price - inv, rate, RVS_AMORT_YEARS, n_years * 12)
+    fixed = costs["tax"] + costs["ins"] * 12 + costs["strata"] * 12 + costs["maint"]
+    opex = fixed + rent * 12 * costs["mgmt"] / 100
+    year_interest = interest[1:].reshape(n_years, 12).sum(axis=1)
+    year_debt = payment[1:].reshape(n_years, 12).sum(axis=1)
+    re_tax = (rent * 12 - (year_interest + fixed)) * t
+    re_cash = rent * 12 - year_debt - opex - re_tax
+    cum_cash = np.cumsum(re_cash, axis=1)[:, holds - 1]
+
+    value = price * (1 + apprec / 100) ** holds
+    re_sell = value * RE_SELL_PCT + RE_SELL_FIXED
+    re_cgt = np.maximum(0, value - price - re_sell) * CG_INCLUSION * t
+    re_net = value - balance[holds * 12] - re_sell - re_cgt
+
+    # Stock: dividends reinvested after tax, price growth on top
+    start = inv + price * CLOSING_COST_PCT
+    d, g = s_div / 100, (total_return - s_div) / 100
+    nonreg, rrsp = acc == "Non-Registered", acc == "RRSP"
+    div_tax_rate = np.where(nonreg, d * t * CG_INCLUSION, 0.0)
+    years = np.arange(1, n_years + 1)
+    stock_year_start = start * ((1 + d - div_tax_rate) * (1 + g)) ** (years - 1)
+    stock_value = stock_year_start[:, holds - 1] * (1 + d - div_tax_rate) * (1 + g)
+    st_sell = stock_value * ST_SELL_PCT
+    st_tax = np.where(rrsp, stock_value * t, np.where(nonreg, np.maximum(0, stock_value - start - st_sell) * CG_INCLUSION * t, 0.0))
+    st_net = stock_value - st_sell - st_tax
+
+    return {
+        "hold_years": holds, "start_equity": start,
+        "rental_total": re_net + cum_cash, "stock_total": st_net,
+        "rental_net_sale": re_net, "stock_net_sale": st_net,
+        "rental_leak": re_cgt + re_sell, "stock_leak": st_tax + st_sell,
+        "rental_year_tax": re_tax, "rental_year_cash": re_cash,
+        "stock_year_dividends": stock_year_start * d, "stock_year_tax": stock_year_start * div_tax_rate,
+    }
+
+def rental_vs_stock_flows(price, inv, rate, apprec, rent, costs, total_return, s_div, tax_rate, acc_type,
+                          hold_years=range(1, MAX_HOLD_YEARS + 1), discount_rate=None):
+    """
+    Aligned monthly cash-flow vectors for one tax rate / account type and
+    every hold period: {"rental": {line: (H, months)}, "stock": {...}} with
+    month 0 the purchase, plus IRR (%), NPV at `discount_rate` (default: the
+    stock total return) and equity multiple per hold for both paths.
+    """
+    res = rental_vs_stock(price, inv, rate, apprec, rent, costs, total_return, s_div, tax_rate, acc_type, hold_years)
+    holds = res["hold_years"]
+    n_months = int(holds.max()) * 12
+    k = np.arange(n_months + 1)
+    alive = (k >= 1) & (k <= holds[:, None] * 12)
+    year_end = alive & (k % 12 == 0)
+    sale_month = k == holds[:, None] * 12
+    year_of = np.maximum((k - 1) // 12, 0)
+
+    payment, _, _ = _amortization(price - inv, rate, RVS_AMORT_YEARS, n_months)
+    opex_mo = (costs["tax"] + costs["ins"] * 12 + costs["strata"] * 12 + costs["maint"]) / 12 + rent * costs["mgmt"] / 100
+    equity = np.where(k == 0, -res["start_equity"], 0.0) * np.ones((len(holds), 1))
+
+    rental = {
+        "equity": equity,
+        "rent": np.where(alive, rent, 0.0),
+        "opex": np.where(alive, -opex_mo, 0.0),
+        "debt_service": np.where(alive, -payment, 0.0),
+        "tax": np.where(year_end, -res["rental_year_tax"][0][year_of], 0.0),
+        "sale": np.where(sale_month, res["rental_net_sale"][0][:, None], 0.0),
+    }
+    stock = {
+        "equity": equity,
+        "dividends": np.where(year_end, res["stock_year_dividends"][0][year_of], 0.0),
+        "tax": np.where(year_end, -res["stock_year_tax"][0][year_of], 0.0),
+        "sale": np.where(sale_month, res["stock_net_sale"][0][:, None], 0.0),
+    }
+    rental_net = sum(rental.values())
+    stock_net = stock["equity"] + stock["sale"]  # dividends and their tax stay in the account
+
+    rate_pct = total_return if discount_rate is None else discount_rate
+    out = {"months": k, "hold_years": holds, "rental": rental, "stock": stock,
+           "rental_net": rental_net, "stock_net": stock_net, "totals": res}
+    for name, flows in (("rental", rental_net), ("stock", stock_net)):
+        out[f"{name}_irr"] = irr(flows)
+        out[f"{name}_npv"] = npv(flows, rate_pct)
+        out[f"{name}_multiple"] = np.maximum(flows, 0).sum(axis=1) / np.maximum(-flows, 0).sum(axis=1)
+    return out
+
+def account_matrix(price, inv, rate, apprec, rent, costs, total_return, s_div, tax_rates, hold_years=range(1, MAX_HOLD_YEARS + 1)):
+    """
+    Every account type x marginal tax rate x hold period in one batched call.
+    Returns {"advantage": rental minus stock take-home (A, T, H), "ahead_from":
+    first hold (years) at which the rental is ahead, "behind_again": first
+    later hold at which the stock account retakes the lead (both inf when it
+    doesn't happen within hold_years; (A, T) each)} with A ordered as ACCOUNT_TYPES.
+    """
+    acc = np.asarray(ACCOUNT_TYPES)[:, None]
+    taxes = np.asarray(tax_rates, dtype=float)[None, :]
+    res = rental_vs_stock(price, inv, rate, apprec, rent, costs, total_return, s_div, taxes, acc, hold_years)
+    shape = (len(ACCOUNT_TYPES), taxes.shape[1], len(res["hold_years"]))
+    advantage = (res["rental_total"] - res["stock_total"]).reshape(shape)
+
+    # first stretch of holds where the rental leads: where it starts and where it ends
+    hold = np.asarray(res["hold_years"], dtype=float)
+    ahead = advantage >= 0
+    first = np.argmax(ahead, axis=-1)
+    fallen = ~ahead & (np.arange(shape[2]) > first[..., None])
+    ahead_from = np.where(ahead.any(axis=-1), hold[first], np.inf)
+    behind_again = np.where(ahead.any(axis=-1) & fallen.any(axis=-1), hold[np.argmax(fallen, axis=-1)], np.inf)
+    return {"hold_years": res["hold_years"], "advantage": advantage, "ahead_from": ahead_from, "behind_again": behind_again,
+            "rental_total": res["rental_total"].reshape(shape), "stock_total": res["stock_total"].reshape(shape)}
@@ -6,7 +6,7 @@ import base64
 import json
 import math
 from style_utils import inject_global_css, show_disclaimer, add_pdf_button
-from data_handler import cloud_input, sync_widget, supabase, load_user_data, init_session_state
+from data_handler import cloud_input, sync_widget, supabase, load_user_data, init_session_state, load_pinned_intel, show_intel_pin
 import time
 
 # --- 1. UNIVERSAL AUTO-LOADER ---
@@ -49,10 +49,7 @@ is_renter = prof.get('housing_status') == "Renting"
 household = f"{name1} and {name2}" if name2 else name1
 
 def load_market_intel():
-    path = os.path.join("data", "market_intel.json")
-    if os.path.exists(path):
-        with open(path, "r") as f: return json.load(f)
-    return {"rates": {"five_year_fixed_uninsured": 4.26}}
+    return load_pinned_intel("affordability", {"rates": {"five_year_fixed_uninsured": 4.26}})
 
 intel = load_market_intel()
 
@@ -161,6 +158,7 @@ st.markdown(f"""
         <h1 style='margin: 0 !important; padding: 0 !important; line-height: 1 !important;'>Mortgage Affordability Analysis</h1>
     </div>
 """, unsafe_allow_html=True)
+show_intel_pin("affordability")
 
 # RESTORED: Dynamic logic based on Renter vs Owner
 if is_renter:
@@ -6,7 +6,7 @@ import json
 import math
 import time
 from style_utils import inject_global_css, show_disclaimer, add_pdf_button
-from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase
+from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase, load_pinned_intel, show_intel_pin
 
 # --- 1. UNIVERSAL AUTO-LOADER (The Fix for Blank Pages) ---
 init_session_state()
@@ -47,10 +47,7 @@ p1_name = prof.get('p1_name', 'Primary Client')
 p2_name = prof.get('p2_name', '')
 
 def load_market_intel():
-    path = os.path.join("data", "market_intel.json")
-    if os.path.exists(path):
-        with open(path, "r") as f: return json.load(f)
-    return {"rates": {"five_year_fixed_uninsured": 4.26}, "provincial_yields": {"BC": 3.8}}
+    return load_pinned_intel("affordability_second", {"rates": {"five_year_fixed_uninsured": 4.26}, "provincial_yields": {"BC": 3.8}})
 
 intel = load_market_intel()
 
@@ -84,6 +81,7 @@ st.markdown(f"""
         <h1 style='margin: 0 !important; padding: 0 !important; line-height: 1 !important;'>Can we afford a second home?</h1>
     </div>
 """, unsafe_allow_html=True)
+show_intel_pin("affordability_second")
 
 st.markdown(f"""
 <div style="background-color: {OFF_WHITE}; padding: 20px 25px; border-radius: 12px; border: 1px solid #DEE2E6; border-left: 8px solid {PRIMARY_GOLD}; margin-bottom: 20px;">
@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import os
 import base64
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, sync_widget, supabase, load_user_data, init_session_state
 import time
+from housing_engine import simulate_buy_rent, wealth_frame, sweep_buy_rent, monte_carlo_buy_rent, summarize_buy_rent_mc, MIN_CALIBRATION_YEARS
 
 # --- UNIVERSAL AUTO-LOADER ---
 init_session_state()
@@ -64,58 +65,17 @@ if not br_store.get('initialized'):
             }).execute()
         except: pass
 
+# Monte Carlo volatility/correlation defaults (also fills in stores saved before the mode existed)
+if 'house_vol' not in br_store:
+    br_store.update({"house_vol": 8.0, "equity_vol": 16.0, "rent_vol": 1.5})
+if 'corr_he' not in br_store:
+    br_store.update({"corr_he": 0.3, "corr_hr": 0.5, "corr_er": 0.1})
+
 # --- 4. CALCULATION ENGINE ---
 def run_wealth_comparison(price, dp, rate, apprec, ann_tax, mo_maint, rent, rent_inc, stock_ret, years):
     # SAFETY: Ensure years is at least 1
     if years < 1: years = 1
-    
-    loan = price - dp
-    m_rate = (rate/100)/12
-    n_months = 30 * 12 
-    monthly_pi = loan * (m_rate * (1+m_rate)**n_months) / ((1+m_rate)**n_months - 1) if m_rate > 0 else loan / n_months
-    
-    data = []
-    total_owner_unrecoverable = 0
-    total_renter_unrecoverable = 0
-    curr_loan, curr_val, curr_rent, renter_portfolio = loan, price, rent, dp 
-    
-    for y in range(1, int(years) + 1):
-        annual_int = 0
-        for _ in range(12):
-            mo_interest = curr_loan * m_rate
-            mo_principal = monthly_pi - mo_interest
-            annual_int += mo_interest
-            curr_loan -= mo_principal
-        
-        # Sunk Costs
-        owner_lost_this_year = annual_int + ann_tax + (mo_maint * 12)
-        total_owner_unrecoverable += owner_lost_this_year
-        
-        # Value Growth
-        curr_val *= (1 + apprec/100)
-        
-        # Net Worth Calculation (Equity - Selling Costs)
-        owner_wealth_net = curr_val - max(0, curr_loan) - ((curr_val * 0.05)) # 5% Selling Cost
-        
-        # Renter Math
-        total_renter_unrecoverable += curr_rent * 12
-        owner_mo_outlay = monthly_pi + (ann_tax/12) + mo_maint
-        mo_savings_gap = owner_mo_outlay - curr_rent
-        
-        # Invest the difference (or withdraw from portfolio if rent > buy cost)
-        for _ in range(12):
-            renter_portfolio = (renter_portfolio + mo_savings_gap) * (1 + (stock_ret/100)/12)
-        
-        data.append({
-            "Year": y, 
-            "Owner Net Wealth": owner_wealth_net, 
-            "Renter Wealth": renter_portfolio,
-            "Owner Unrecoverable": total_owner_unrecoverable, 
-            "Renter Unrecoverable": total_renter_unrecoverable
-        })
-        curr_rent *= (1 + rent_inc/100)
-    
-    return pd.DataFrame(data)
+    return wealth_frame(simulate_buy_rent(price, dp, rate, apprec, ann_tax, mo_maint, rent, rent_inc, stock_ret, years))
 
 # --- 5. INLINE LOGO & TITLE ---
 def get_inline_logo(img_name="logo.png", width=75):
@@ -253,6 +213,102 @@ with ins_col2:
             st.write("### 📉 Growth Outlook")
             st.write("Under current market settings, the home is not projected to catch up in net worth.")
 
+# --- 10. SENSITIVITY MAP ---
+st.divider()
+st.subheader("🗺️ When Does Buying Win? Every Market at Once")
+st.caption("Appreciation, stock returns and rent growth are the three guesses that decide this fight. Each cell re-runs the full comparison with your other inputs.")
+
+SWEEP_APPREC = np.round(np.arange(-2.0, 8.01, 0.25), 2)
+SWEEP_STOCK = np.round(np.arange(2.0, 12.01, 0.25), 2)
+SWEEP_RENT_INC = np.round(np.arange(0.0, 6.01, 0.5), 1)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def buy_rent_sweep(price, dp, rate, ann_tax, mo_maint, rent, years):
+    base = dict(price=price, dp=dp, rate=rate, ann_tax=ann_tax, mo_maint=mo_maint, rent=rent)
+    return sweep_buy_rent(base, SWEEP_APPREC, SWEEP_STOCK, SWEEP_RENT_INC, years)
+
+be_years, be_apprec = buy_rent_sweep(price, dp, rate, ann_tax, mo_maint, rent, int(years))
+sw1, sw2 = st.columns(2)
+with sw1:
+    sweep_view = st.radio("Show", ["Break-Even Year", "Break-Even Appreciation"], horizontal=True, key="br_sweep_view")
+with sw2:
+    sweep_rent_inc = st.select_slider("Annual Rent Increase (%)", options=SWEEP_RENT_INC.tolist(),
+                                      value=float(SWEEP_RENT_INC[np.argmin(np.abs(SWEEP_RENT_INC - rent_inc))]), key="br_sweep_rent_inc",
+                                      disabled=sweep_view != "Break-Even Year")
+
+if sweep_view == "Break-Even Year":
+    gi = int(np.argmin(np.abs(SWEEP_RENT_INC - sweep_rent_inc)))
+    z = be_years[gi]
+    fig_sweep = go.Figure(go.Heatmap(
+        x=SWEEP_APPREC, y=SWEEP_STOCK, z=np.where(np.isfinite(z), z, np.nan), colorscale="Viridis", reversescale=True,
+        colorbar=dict(title="Year"), hovertemplate="Appreciation %{x}% · Stocks %{y}%<br>Owner ahead from year %{z:.0f}<extra></extra>"))
+    fig_sweep.add_trace(go.Scatter(x=[apprec], y=[stock_ret], mode="markers", marker=dict(color=PRIMARY_GOLD, size=14, symbol="x", line=dict(width=2, color=CHARCOAL))))
+    fig_sweep.update_layout(xaxis_title="Annual Appreciation (%)", yaxis_title="Stock Return (%)")
+    sweep_note = f"Blank cells: the owner never catches up within {int(years)} years."
+else:
+    z = be_apprec[:, :, 0]
+    fig_sweep = go.Figure(go.Heatmap(
+        x=SWEEP_STOCK, y=SWEEP_RENT_INC, z=z, colorscale="RdYlGn_r", colorbar=dict(title="Appreciation"),
+        hovertemplate="Stocks %{x}% · Rent growth %{y}%<br>Home must appreciate %{z:.2f}%/yr<extra></extra>"))
+    fig_sweep.add_trace(go.Scatter(x=[stock_ret], y=[rent_inc], mode="markers", marker=dict(color=PRIMARY_GOLD, size=14, symbol="x", line=dict(width=2, color=CHARCOAL))))
+    fig_sweep.update_layout(xaxis_title="Stock Return (%)", yaxis_title="Annual Rent Increase (%)")
+    sweep_note = f"The appreciation rate at which owning and renting tie after {int(years)} years. Above it, buying wins."
+fig_sweep.update_layout(height=450, margin=dict(t=20, b=20, l=0, r=20), showlegend=False)
+st.plotly_chart(fig_sweep, use_container_width=True)
+st.caption(sweep_note)
+
+# --- 11. STOCHASTIC MODE ---
+st.divider()
+st.subheader("🎲 What If the Markets Don't Cooperate?")
+st.caption("Thousands of correlated house-price, stock-return and rent paths. Your mortgage renews every 5 years at a re-drawn 5-year fixed rate (your spread over today's benchmark is kept).")
+
+with st.expander("⚙️ Market Volatility & Correlation"):
+    mv1, mv2, mv3 = st.columns(3)
+    with mv1: house_vol = cloud_input("Home Price Volatility (%)", "buy_vs_rent", "house_vol", step=0.5)
+    with mv2: equity_vol = cloud_input("Stock Volatility (%)", "buy_vs_rent", "equity_vol", step=0.5)
+    with mv3: rent_vol = cloud_input("Rent Growth Volatility (%)", "buy_vs_rent", "rent_vol", step=0.25)
+    mc1, mc2, mc3 = st.columns(3)
+    with mc1: corr_he = st.slider("Homes ↔ Stocks", -0.9, 0.9, float(br_store['corr_he']), 0.05, key="buy_vs_rent_corr_he", on_change=sync_widget, args=("buy_vs_rent:corr_he",))
+    with mc2: corr_hr = st.slider("Homes ↔ Rents", -0.9, 0.9, float(br_store['corr_hr']), 0.05, key="buy_vs_rent_corr_hr", on_change=sync_widget, args=("buy_vs_rent:corr_hr",))
+    with mc3: corr_er = st.slider("Stocks ↔ Rents", -0.9, 0.9, float(br_store['corr_er']), 0.05, key="buy_vs_rent_corr_er", on_change=sync_widget, args=("buy_vs_rent:corr_er",))
+    n_paths = st.select_slider("Simulated Paths", options=[1000, 5000, 10000, 25000, 50000], value=10000, key="br_mc_paths")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def buy_rent_mc(params, years, n_paths, house_vol, equity_vol, rent_vol, corr_he, corr_hr, corr_er):
+    mc = monte_carlo_buy_rent(dict(params), years, n_paths, house_vol, equity_vol, rent_vol, corr_he, corr_hr, corr_er, seed=42)
+    return mc, summarize_buy_rent_mc(mc)
+
+mc_params = (("price", price), ("dp", dp), ("rate", rate), ("apprec", apprec), ("ann_tax", ann_tax), ("mo_maint", mo_maint),
+             ("rent", rent), ("rent_inc", rent_inc), ("stock_ret", stock_ret))
+with st.spinner("Simulating markets..."):
+    br_mc, br_stats = buy_rent_mc(mc_params, int(years), n_paths, house_vol, equity_vol, rent_vol, corr_he, corr_hr, corr_er)
+
+mq1, mq2, mq3 = st.columns(3)
+mq1.metric(f"Owner Ahead After {int(years)} Years", f"{br_stats['prob_owner_ahead'] * 100:.0f}%")
+mq2.metric("Median Wealth Gap (Owner − Renter)", f"${br_stats['median_gap']:,.0f}")
+mq3.metric("P10 / P90 Gap", f"${br_stats['p10_gap']:,.0f} / ${br_stats['p90_gap']:,.0f}")
+
+mc_col1, mc_col2 = st.columns(2)
+with mc_col1:
+    fig_prob = go.Figure(go.Scatter(x=np.arange(1, int(years) + 1), y=br_mc["prob_ahead"] * 100, mode="lines",
+                                    line=dict(color=PRIMARY_GOLD, width=4), fill="tozeroy"))
+    fig_prob.add_hline(y=50, line_dash="dash", line_color=SLATE_ACCENT)
+    fig_prob.update_layout(title=dict(text="Probability the Owner Is Ahead", x=0.5), xaxis_title="Year", yaxis_title="% of Paths",
+                           yaxis=dict(range=[0, 100]), height=350, margin=dict(t=40, b=20, l=0, r=20))
+    st.plotly_chart(fig_prob, use_container_width=True)
+with mc_col2:
+    gap_clip = np.clip(br_mc["final_gap"], *np.percentile(br_mc["final_gap"], [1, 99]))
+    fig_gap = go.Figure(go.Histogram(x=gap_clip, nbinsx=60, marker_color=CHARCOAL))
+    fig_gap.add_vline(x=0, line_color=PRIMARY_GOLD, line_width=3)
+    fig_gap.update_layout(title=dict(text=f"Wealth Gap at Year {int(years)} (Owner − Renter)", x=0.5), xaxis_title="$", yaxis_title="Paths",
+                          xaxis=dict(tickprefix="$"), height=350, margin=dict(t=40, b=20, l=0, r=20), bargap=0.05)
+    st.plotly_chart(fig_gap, use_container_width=True)
+rate_model = br_mc["rate_model"]
+if rate_model["calibrated"]:
+    st.caption(f"Renewal rates: calibrated on the local rate log — 5-year fixed rates revert toward {rate_model['mean']:.2f}% and move ±{rate_model['vol']:.2f}% per term from today's {rate_model['latest']:.2f}%.")
+else:
+    st.caption(f"Renewal rates are an **assumption**, not calibrated: the local rate log covers less than {MIN_CALIBRATION_YEARS} years, so 5-year fixed rates are assumed to move ±{rate_model['vol']:.2f}% per term around today's {rate_model['latest']:.2f}%.")
+
 show_disclaimer()
 
 # --- FOOTER ---
@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import time
 import os
 import base64
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, load_user_data, init_session_state
+from fire_engine import (simulate_decumulation, summarize_decumulation, coast_frontier, simulate_barista,
+                         barista_quit_ages, load_real_returns, bootstrap_returns, BARISTA_SAFE_SUCCESS)
 
 # --- 1. UNIVERSAL AUTO-LOADER ---
 init_session_state()
@@ -50,6 +53,14 @@ if not cf_data.get('initialized'):
     cf_data['expected_return'] = rc_data.get('annual_return', 7.0)
     cf_data['swr'] = rc_data.get('swr', 4.0)
     cf_data['initialized'] = True
+if 'plan_to_age' not in cf_data:
+    cf_data['plan_to_age'] = 95
+if 'monthly_contribution' not in cf_data:
+    cf_data['monthly_contribution'] = rc_data.get('monthly_contribution', 1000.0)
+if 'part_time_income' not in cf_data:
+    cf_data['part_time_income'] = 30000.0
+if 'barista_end_age' not in cf_data:
+    cf_data['barista_end_age'] = cf_data.get('target_age', 65)
 
 # --- 4. INLINE LOGO & TITLE ---
 def get_inline_logo(img_name="logo.png", width=75):
@@ -113,6 +124,16 @@ with c3:
     expected_return = cloud_input("Expected Annual Return (%)", "coast_fire", "expected_return", step=0.1)
     swr = cloud_input("Safe Withdrawal Rate (%)", "coast_fire", "swr", step=0.1)
 
+b1, b2, b3, b4 = st.columns(4)
+with b1:
+    monthly_contribution = cloud_input("Monthly Savings Until You Quit ($)", "coast_fire", "monthly_contribution", step=250)
+with b2:
+    part_time_income = cloud_input("Part-Time Income ($/yr)", "coast_fire", "part_time_income", step=2500, help="What the low-stress job pays after you quit full-time work.")
+with b3:
+    barista_end_age = cloud_input("Part-Time Until Age", "coast_fire", "barista_end_age", step=1)
+with b4:
+    plan_to_age = cloud_input("Plan Until Age", "coast_fire", "plan_to_age", step=1)
+
 # --- 6. CORE MATH ENGINE (ROUNDED) ---
 r = expected_return / 100
 swr_rate = swr / 100
@@ -131,10 +152,15 @@ projected_income = round(projected_portfolio * swr_rate, -3)
 income_shortfall = round(max(0, target_spend - projected_income), -3)
 coast_shortfall = round(max(0, coast_number - current_portfolio), -3)
 
+# Barista Phases: simulate quitting full-time work at every age from today on
+quit_ages = np.arange(int(current_age), int(max(current_age, plan_to_age)) + 1)
+barista_paths, barista_depleted = simulate_barista(current_portfolio, current_age, quit_ages, barista_end_age, plan_to_age,
+                                                   monthly_contribution, target_spend, part_time_income, expected_return)
+_, safe_quit_age = barista_quit_ages(barista_depleted, quit_ages, 1.0)
+
 has_hit_coast = current_portfolio >= coast_number
-barista_threshold = 40000.0 
-is_barista = not has_hit_coast and income_shortfall <= barista_threshold
-is_accumulation = not has_hit_coast and income_shortfall > barista_threshold
+is_barista = not has_hit_coast and safe_quit_age == quit_ages[0]
+is_accumulation = not has_hit_coast and not is_barista
 
 # --- 7. VISUALS & DASHBOARD ---
 st.divider()
@@ -146,11 +172,12 @@ if has_hit_coast:
 elif is_barista:
     status_headline = "☕ YOU ARE IN BARISTA FIRE TERRITORY"
     status_color = BARISTA_BROWN
-    status_text = f"If you stop investing now, your portfolio will generate <b>${projected_income:,.0f}/yr</b>. You just need a low-stress job to cover the <b>${income_shortfall:,.0f}</b> gap!"
+    status_text = f"Quit today, earn <b>${part_time_income:,.0f}/yr</b> part-time until {barista_end_age:.0f}, and your portfolio still lasts to age {plan_to_age:.0f}."
 else:
     status_headline = "🧱 THE ACCUMULATION PHASE"
     status_color = "#2B5C8F"
-    status_text = f"Your portfolio would only generate <b>${projected_income:,.0f}/yr</b> if you stopped now. You're still in heavy accumulation mode—keep building that engine!"
+    quit_msg = f"Keep saving until <b>age {safe_quit_age:.0f}</b> and Barista FIRE works." if safe_quit_age is not None else f"Even part-time until {barista_end_age:.0f}, the money runs out before {plan_to_age:.0f} at every quit age."
+    status_text = f"Your portfolio would only generate <b>${projected_income:,.0f}/yr</b> if you stopped now. {quit_msg}"
 
 st.markdown(f"""
 <div style="text-align: center; margin-bottom: 30px;">
@@ -226,6 +253,111 @@ fig.add_trace(go.Scatter(x=ages, y=[traditional_fire_num]*len(ages), name='Tradi
 fig.update_layout(xaxis_title="Age", yaxis_title="Portfolio Value ($)", height=400, margin=dict(t=20, b=20, l=0, r=20), hovermode="x unified")
 st.plotly_chart(fig, use_container_width=True)
 
+# --- 10. BARISTA FIRE: WHEN CAN YOU QUIT? ---
+st.write("")
+st.subheader("☕ Barista FIRE: Your Earliest Safe Quit Age")
+st.caption(f"Save ${monthly_contribution:,.0f}/mo full-time, then earn ${part_time_income:,.0f}/yr part-time until {barista_end_age:.0f}, then live off the portfolio until {plan_to_age:.0f}. Every quit age is simulated month by month, against the expected return and 2,000 historical return sequences.")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def barista_risk(start, age, end_age, plan_age, contribution, spend, part_time):
+    history, _ = load_real_returns()
+    n_years = max(int(np.ceil(plan_age - age)), 1)
+    returns = bootstrap_returns(history, 2000, n_years, np.random.default_rng(42))
+    ages = np.arange(int(age), int(max(age, plan_age)) + 1)
+    _, depleted = simulate_barista(start, age, ages, end_age, plan_age, contribution, spend, part_time, returns=returns)
+    return barista_quit_ages(depleted, ages)
+
+bar_success, bar_safe_age = barista_risk(current_portfolio, current_age, barista_end_age, plan_to_age,
+                                         monthly_contribution, target_spend, part_time_income)
+bq1, bq2, bq3 = st.columns(3)
+bq1.metric("Earliest Quit Age (Expected Return)", f"{safe_quit_age:.0f}" if safe_quit_age is not None else f"Not Before {plan_to_age:.0f}")
+bq2.metric(f"Earliest Quit Age ({BARISTA_SAFE_SUCCESS:.0%} Historical Success)", f"{bar_safe_age:.0f}" if bar_safe_age is not None else f"Not Before {plan_to_age:.0f}")
+bq3.metric("Success If You Quit Today", f"{bar_success[0] * 100:.0f}%")
+
+path_ages = current_age + np.arange(barista_paths.shape[2])
+fig_bar = go.Figure()
+shown = sorted({quit_ages[0], *(a for a in (safe_quit_age, bar_safe_age) if a is not None)})
+for qa in shown:
+    is_safe = qa in (safe_quit_age, bar_safe_age)
+    fig_bar.add_trace(go.Scatter(x=path_ages, y=barista_paths[int(qa - quit_ages[0]), 0], name=f"Quit at {qa:.0f}",
+                                 line=dict(width=4 if is_safe else 2, color=BARISTA_BROWN if qa == bar_safe_age else (PRIMARY_GOLD if is_safe else "#d9534f"))))
+fig_bar.add_vrect(x0=barista_end_age, x1=plan_to_age, fillcolor=SLATE_ACCENT, opacity=0.06, line_width=0, annotation_text="Full Drawdown", annotation_position="top left")
+fig_bar.update_layout(xaxis_title="Age", yaxis_title="Portfolio Value ($, Expected Return)", height=400,
+                      margin=dict(t=20, b=20, l=0, r=20), hovermode="x unified", legend=dict(orientation="h", yanchor="bottom", y=1.02))
+st.plotly_chart(fig_bar, use_container_width=True)
+
+fig_qs = go.Figure(go.Bar(x=quit_ages, y=bar_success * 100, marker_color=np.where(bar_success >= BARISTA_SAFE_SUCCESS, PRIMARY_GOLD, BORDER_GREY)))
+fig_qs.add_hline(y=BARISTA_SAFE_SUCCESS * 100, line_dash="dash", line_color=SLATE_ACCENT)
+fig_qs.update_layout(title="Historical Success Rate by Quit Age", xaxis_title="Age You Quit Full-Time Work", yaxis_title="Money Lasts (%)",
+                     yaxis=dict(range=[0, 100]), height=320, margin=dict(t=40, b=20, l=0, r=20))
+st.plotly_chart(fig_qs, use_container_width=True)
+
+# --- 11. THE COAST FRONTIER ---
+st.write("")
+st.subheader("🗺️ The Coast Frontier: When Can You Stop Saving?")
+st.caption("Every combination of current age, retirement age, return and spending at once. Keep saving until the earliest coast age, then let compounding finish the job.")
+
+FRONTIER_AGES = np.arange(18, 71)
+FRONTIER_RETIRE = np.arange(40, 76)
+FRONTIER_RETURNS = np.round(np.arange(2.0, 12.01, 0.25), 2)
+FRONTIER_SPEND_MULT = np.round(np.arange(0.5, 2.01, 0.1), 1)
+
+@st.cache_resource(show_spinner=False, max_entries=8)  # read-only slices; skip the per-rerun copy
+def frontier_surface(portfolio, contribution, spend, swr_pct):
+    return coast_frontier(FRONTIER_AGES, FRONTIER_RETIRE, FRONTIER_RETURNS, spend * FRONTIER_SPEND_MULT, swr_pct, portfolio, contribution)
+
+fr_numbers, fr_ages = frontier_surface(current_portfolio, monthly_contribution, target_spend, swr)
+fc1, fc2, fc3 = st.columns(3)
+with fc1:
+    fr_metric = st.radio("Show", ["Earliest Coast Age", "Coast Number"], horizontal=True, key="cf_frontier_metric")
+with fc2:
+    fr_age = st.slider("Current Age", int(FRONTIER_AGES[0]), int(FRONTIER_AGES[-1]), int(np.clip(current_age, FRONTIER_AGES[0], FRONTIER_AGES[-1])), key="cf_frontier_age")
+with fc3:
+    fr_mult = st.select_slider("Retirement Spend", options=FRONTIER_SPEND_MULT.tolist(), value=1.0, key="cf_frontier_spend",
+                               format_func=lambda m: f"${target_spend * m:,.0f}")
+
+ai, si = fr_age - FRONTIER_AGES[0], int(np.argmin(np.abs(FRONTIER_SPEND_MULT - fr_mult)))
+if fr_metric == "Earliest Coast Age":
+    z = fr_ages[ai, :, :, si]
+    z = np.where(np.isfinite(z), z, np.nan)
+    fr_colorbar, fr_hover, fr_scale = "Coast Age", "Coast at %{z:.1f}", "Viridis"
+else:
+    z = fr_numbers[ai, :, :, si]
+    fr_colorbar, fr_hover, fr_scale = "Coast Number", "Need $%{z:,.0f} today", "YlOrBr"
+
+fig_fr = go.Figure(go.Heatmap(
+    x=FRONTIER_RETURNS, y=FRONTIER_RETIRE, z=z, colorscale=fr_scale, colorbar=dict(title=fr_colorbar),
+    hovertemplate="Return %{x}% · Retire at %{y}<br>" + fr_hover + "<extra></extra>"))
+fig_fr.add_trace(go.Scatter(x=[expected_return], y=[target_age], mode="markers", name="Your Plan",
+                            marker=dict(color=PRIMARY_GOLD, size=14, symbol="x", line=dict(width=2, color=CHARCOAL))))
+fig_fr.update_layout(xaxis_title="Expected Annual Return (%)", yaxis_title="Traditional Retirement Age", height=450,
+                     margin=dict(t=20, b=20, l=0, r=20), showlegend=False)
+st.plotly_chart(fig_fr, use_container_width=True)
+if fr_metric == "Earliest Coast Age":
+    st.caption("Blank cells never reach Coast FIRE before that retirement age at this savings rate.")
+
+# --- 12. DOES THE TARGET SURVIVE REAL MARKETS? ---
+st.write("")
+st.subheader("🎲 Does Your FIRE Number Survive Real Markets?")
+st.caption(f"10,000 simulated retirements starting at age {target_age} with ${traditional_fire_num:,.0f}, withdrawing ${target_spend:,.0f}/yr (inflation-adjusted).")
+cf_sim_mode = st.radio("Market Model", ["historical", "parametric"], horizontal=True, key="cf_sim_mode",
+                       format_func=lambda k: "Historical Sequences" if k == "historical" else "Monte Carlo (15% Vol)")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def coast_success_sim(start_balance, annual_spend, years, mode, mean):
+    balances, fail_year = simulate_decumulation(start_balance, annual_spend, years, 10000, mode, mean=mean, vol=15.0, seed=42)
+    return summarize_decumulation(balances, fail_year)
+
+sim_years = int(plan_to_age - target_age)
+if traditional_fire_num > 0 and sim_years >= 1:
+    cf_sim = coast_success_sim(traditional_fire_num, target_spend, sim_years, cf_sim_mode, expected_return)
+    q1, q2, q3 = st.columns(3)
+    q1.metric("Success Probability", f"{cf_sim['success_rate'] * 100:.1f}%")
+    q2.metric(f"Median Wealth at {int(plan_to_age)}", f"${cf_sim['median_terminal']:,.0f}")
+    q3.metric("Bad-Decile Wealth (P10)", f"${cf_sim['p10_terminal']:,.0f}")
+    if cf_sim['success_rate'] < 0.9:
+        st.warning(f"⚠️ In {100 - cf_sim['success_rate'] * 100:.0f}% of scenarios the money runs out before {int(plan_to_age)}. A lower withdrawal rate (bigger target) buys safety.")
+
 show_disclaimer()
 
 # --- FOOTER ---
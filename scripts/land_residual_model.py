@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import math
 import time
@@ -7,7 +8,9 @@ import os
 import base64
 import json
 from style_utils import inject_global_css, show_disclaimer
-from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase
+from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase, load_pinned_intel, show_intel_pin, trigger_auto_save
+from finance_engine import irr, npv
+from land_engine import pro_forma, sensitivity_cube, solve_thresholds, sites_frame, iter_site_results, rank_sites, SHARED_SITE_INPUTS, SITE_CHUNK_ROWS, GOAL_SEEK_BRACKETS
 
 # --- 1. UNIVERSAL AUTO-LOADER ---
 init_session_state()
@@ -39,12 +42,7 @@ def format_money(val):
 
 # --- 3. MARKET INTEL & VELOCITY MAPPING ---
 def load_market_intel():
-    for fname in ["market_intel.json", "market_intel (7).json"]:
-        if os.path.exists(fname):
-            try:
-                with open(fname, "r") as f: return json.load(f)
-            except: pass
-    return {}
+    return load_pinned_intel("land_residual", {})
 
 intel = load_market_intel()
 current_prime = intel.get("rates", {}).get("bank_prime", 4.45)
@@ -84,6 +82,7 @@ defaults = {
     'bp_fee_pct': 1.5,
     'avg_unit_sf': 850.0,
     'soft_cost_pct': 10.0,
+    'equity_discount_rate': 12.0,
     'province': 'BC',
     'city': 'Vancouver'
 }
@@ -112,6 +111,7 @@ st.markdown(f"""
         <h1 style='margin: 0 !important; padding: 0 !important; line-height: 1 !important;'>Land Residual Model</h1>
     </div>
 """, unsafe_allow_html=True)
+show_intel_pin("land_residual")
 
 prof = st.session_state.app_db.get('profile', {})
 p1_name = prof.get('p1_name', "Investor")
@@ -236,39 +236,34 @@ with f_col4:
 
 
 # --- 6. CALCULATIONS ---
-gdv = buildable_sf * sell_psf
-target_profit = gdv * (profit_margin / 100)
-
-total_hard = buildable_sf * hard_cost_psf
-pure_soft_costs = total_hard * (soft_cost_pct / 100)
-
-# Calculate City Fees based on inputs
-total_dcc = est_units * dcc_per_unit
-total_cac = est_units * cac_per_unit
-total_regional_dcc = regional_dcc_flat
-total_dp = dp_fee_flat
-total_bp = total_hard * (bp_fee_pct / 100)
-
-total_city_fees = total_dcc + total_cac + total_regional_dcc + total_dp + total_bp
-total_soft_combined = pure_soft_costs + total_city_fees
-
 pre_m = pre_const_months
 build_m = project_months
 
-# ADVANCED FINANCING LOGIC:
-# Interest-only calculation using 60% average utilization during active draw phases
-soft_interest = total_soft_combined * (finance_rate / 100) * ((pre_m / 12) * 0.6 + (build_m / 12))
-hard_interest = total_hard * (finance_rate / 100) * ((build_m / 12) * 0.6)
+lr_inputs = dict(
+    lot_size=lot_size, fsr=fsr, avg_unit_sf=avg_unit_sf, sell_psf=sell_psf, profit_margin=profit_margin,
+    hard_cost_psf=hard_cost_psf, soft_cost_pct=soft_cost_pct, dcc_per_unit=dcc_per_unit, cac_per_unit=cac_per_unit,
+    regional_dcc_flat=regional_dcc_flat, dp_fee_flat=dp_fee_flat, bp_fee_pct=bp_fee_pct,
+    finance_rate=finance_rate, ltc_pct=ltc_pct, pre_const_months=pre_m, project_months=build_m,
+    sell_months=sell_months
+)
+pf_full = pro_forma(monthly=True, **lr_inputs)
+schedule = pf_full.pop("schedule")
+pf = {k: float(v) for k, v in pf_full.items()}
+
+gdv, target_profit = pf["gdv"], pf["target_profit"]
+total_hard, pure_soft_costs = pf["total_hard"], pf["pure_soft_costs"]
+total_dcc, total_cac, total_regional_dcc = pf["total_dcc"], pf["total_cac"], pf["total_regional_dcc"]
+total_dp, total_bp = pf["total_dp"], pf["total_bp"]
+total_soft_combined = pf["total_soft_combined"]
 
-finance_cost = soft_interest + hard_interest
-total_construction = total_hard + total_soft_combined
-
-residual_land_value = gdv - target_profit - total_construction - finance_cost
+# ADVANCED FINANCING LOGIC:
+# Monthly draw schedule: equity in first, then the loan; interest capitalized on the drawn balance
+finance_cost = pf["finance_cost"]
+residual_land_value = pf["residual_land_value"]
 
 # Capital Stack
-total_project_cost = gdv - target_profit
-bank_loan = total_project_cost * (ltc_pct / 100)
-equity_required = total_project_cost - bank_loan
+total_project_cost, bank_loan, equity_required = pf["total_project_cost"], pf["bank_loan"], pf["equity_required"]
+peak_loan = float(schedule["peak_loan"])
 roe = (target_profit / equity_required) * 100 if equity_required > 0 else 0
 
 
@@ -285,7 +280,7 @@ df_pf = pd.DataFrame([
     {"Item": "(-) City Fees: Regional DCCs", "Value": format_money(-total_regional_dcc)},
     {"Item": "(-) City Fees: ACC/CACs", "Value": format_money(-total_cac)},
     {"Item": "(-) City Fees: DP & BP Permits", "Value": format_money(-(total_dp + total_bp))},
-    {"Item": f"(-) Financing Costs ({int(pre_m) + int(build_m)} Mo)", "Value": format_money(-finance_cost)},
+    {"Item": f"(-) Financing Costs ({int(pre_m) + int(build_m) + sell_months} Mo, Capitalized)", "Value": format_money(-finance_cost)},
     {"Item": "RESIDUAL LAND VALUE", "Value": format_money(residual_land_value)}
 ])
 st.table(df_pf.set_index("Item"))
@@ -295,7 +290,9 @@ st.table(df_pf.set_index("Item"))
 st.divider()
 st.subheader("📊 Acquisition Verdict")
 
-if residual_land_value <= 0:
+if np.isnan(residual_land_value):
+    st.error("⚠️ **Unviable Deal:** Financing costs could not be solved at this loan rate — interest outruns the project before sales repay the loan.")
+elif residual_land_value <= 0:
     st.error(f"⚠️ **Unviable Deal:** Land value is negative ({format_money(residual_land_value)}). Costs exceed revenue.")
 else:
     m1, m2, m3, m4 = st.columns(4)
@@ -304,71 +301,216 @@ else:
     m3.metric("Projected Profit", format_money(target_profit))
     m4.metric("ROE", f"{roe:.1f}%")
 
-    # --- S-CURVE CASH FLOW ---
+    # --- EQUITY RETURNS & DRAW SCHEDULE ---
+    disc_col, _ = st.columns([1, 3])
+    with disc_col:
+        equity_discount_rate = cloud_input("Equity Discount Rate (%)", "land_residual", "equity_discount_rate", step=0.5)
+
+    equity_cf = schedule["equity_cf"]
+    equity_irr = float(irr(equity_cf))
+    equity_npv = float(npv(equity_cf, equity_discount_rate))
+    r1, r2, r3, r4 = st.columns(4)
+    r1.metric("Equity IRR", "n/a" if np.isnan(equity_irr) else f"{equity_irr:.1f}%")
+    r2.metric(f"Equity NPV @ {equity_discount_rate:.1f}%", format_money(equity_npv))
+    r3.metric("Peak Loan Balance", format_money(peak_loan), f"Commitment {format_money(bank_loan)}", delta_color="off")
+    r4.metric("Capitalized Interest", format_money(finance_cost))
+
     pre_m_int = int(pre_m)
     const_m_int = int(build_m)
-    total_timeline = pre_m_int + const_m_int + sell_months
-    
-    monthly_soft = total_soft_combined / pre_m_int if pre_m_int > 0 else 0
-    monthly_hard = total_hard / const_m_int if const_m_int > 0 else 0
-    monthly_fin_pre = soft_interest / pre_m_int if pre_m_int > 0 else 0
-    monthly_fin_const = hard_interest / const_m_int if const_m_int > 0 else 0
-    monthly_rev = gdv / sell_months if sell_months > 0 else 0
-
-    cf_months = [0]
-    cumulative_cash = [-residual_land_value]
-    
-    for m in range(1, total_timeline + 1):
-        if m <= pre_m_int:
-            net = -(monthly_soft + monthly_fin_pre) 
-        elif m <= pre_m_int + const_m_int:
-            net = -(monthly_hard + monthly_fin_const) 
-        else:
-            net = monthly_rev 
-            
-        cf_months.append(m)
-        cumulative_cash.append(cumulative_cash[-1] + net)
+    cf_months = schedule["months"]
+    total_timeline = int(cf_months[-1])
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=cf_months, y=cumulative_cash, fill='tozeroy', line=dict(color=PRIMARY_GOLD, width=3)))
-    
+    fig.add_trace(go.Scatter(x=cf_months, y=np.cumsum(equity_cf), name="Equity Position", fill='tozeroy', line=dict(color=PRIMARY_GOLD, width=3)))
+    fig.add_trace(go.Scatter(x=cf_months, y=-schedule["loan_balance"], name="Loan Balance (incl. Interest)", line=dict(color=SLATE_ACCENT, width=2, dash="dot")))
+    fig.add_trace(go.Scatter(x=cf_months, y=-schedule["cum_cost"], name="Cumulative Cost (ex. Interest)", line=dict(color=DANGER_RED, width=1)))
+
     fig.add_vline(x=pre_m_int, line_dash="dash", line_color="gray", annotation_text="Permits Complete", annotation_position="top right")
     fig.add_vline(x=pre_m_int + const_m_int, line_dash="dash", line_color="gray", annotation_text="Build Complete", annotation_position="top right")
-    
-    fig.update_layout(title=f"Capital Timeline ({total_timeline} Months)", xaxis_title="Timeline (Months)", height=350, plot_bgcolor='rgba(0,0,0,0)')
+
+    fig.update_layout(title=f"Capital Timeline ({total_timeline} Months)", xaxis_title="Timeline (Months)", height=380, plot_bgcolor='rgba(0,0,0,0)',
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.35))
     st.plotly_chart(fig, use_container_width=True)
+    st.caption("Hard costs draw on an S-curve over the build. Equity funds the land and early costs first; the loan covers the rest up to the LTC commitment and is repaid from sales.")
 
     # --- SENSITIVITY HEATMAP ---
     st.subheader("🌡️ Risk Matrix: Price vs Cost Sensitivity")
-    sale_steps = [sell_psf * 0.9, sell_psf * 0.95, sell_psf, sell_psf * 1.05, sell_psf * 1.1]
-    cost_steps = [hard_cost_psf * 0.9, hard_cost_psf * 0.95, hard_cost_psf, hard_cost_psf * 1.05, hard_cost_psf * 1.1]
-    
-    z_data, text_data = [], []
-    for c in cost_steps:
-        row, t_row = [], []
-        for s in sale_steps:
-            t_hard_sens = buildable_sf * c
-            t_bp_sens = t_hard_sens * (bp_fee_pct / 100)
-            t_city_sens = total_dcc + total_cac + total_regional_dcc + total_dp + t_bp_sens
-            t_soft_sens = (t_hard_sens * (soft_cost_pct/100)) + t_city_sens
-            
-            # Using 60% utilization for the sensitivity matrix as well
-            s_int = t_soft_sens * (finance_rate / 100) * ((pre_m / 12) * 0.6 + (build_m / 12))
-            h_int = t_hard_sens * (finance_rate / 100) * ((build_m / 12) * 0.6)
-            
-            rlv = (buildable_sf * s) - (buildable_sf * s * (profit_margin/100)) - t_hard_sens - t_soft_sens - s_int - h_int
-            row.append(rlv)
-            t_row.append(format_money(rlv))
-        z_data.append(row)
-        text_data.append(t_row)
-
+    rm_c1, rm_c2, rm_c3 = st.columns(3)
+    with rm_c1: grid_n = st.select_slider("Grid Resolution", [5, 11, 25, 51, 101, 201], value=5, key="lr_grid_n")
+    with rm_c2: grid_span = st.slider("Range (± %)", 5, 40, 10, step=5, key="lr_grid_span")
+    with rm_c3: slice_name = st.selectbox("Third Axis (Slices)", [None, "finance_rate", "fsr"], format_func=lambda k: {None: "None", "finance_rate": "Loan Rate (%)", "fsr": "FSR"}[k], key="lr_slice_axis")
+
+    sale_steps = np.linspace(sell_psf * (1 - grid_span / 100), sell_psf * (1 + grid_span / 100), grid_n)
+    cost_steps = np.linspace(hard_cost_psf * (1 - grid_span / 100), hard_cost_psf * (1 + grid_span / 100), grid_n)
+    base_val = {"finance_rate": finance_rate, "fsr": fsr}.get(slice_name)
+    if slice_name == "finance_rate":
+        slice_values = np.round(np.arange(max(0.0, finance_rate - 3.0), finance_rate + 3.01, 0.5), 2)
+    elif slice_name == "fsr":
+        slice_values = np.round(np.linspace(max(0.1, fsr * 0.5), fsr * 1.5, 11), 2)
+    else:
+        slice_values = None
+
+    if slice_name and grid_n > 101:
+        st.caption("Slices run the full monthly draw schedule per cell, so resolution is capped at 101 with a third axis.")
+        grid_n = 101
+        sale_steps = np.linspace(sale_steps[0], sale_steps[-1], grid_n)
+        cost_steps = np.linspace(cost_steps[0], cost_steps[-1], grid_n)
+
+    cube = sensitivity_cube(lr_inputs, sale_steps, cost_steps, slice_name, slice_values)
+    if slice_name:
+        default_slice = int(np.abs(slice_values - base_val).argmin())
+        pick = st.select_slider(f"Slice: {'Loan Rate (%)' if slice_name == 'finance_rate' else 'FSR'}", list(slice_values), value=slice_values[default_slice], key=f"lr_slice_{slice_name}")
+        z_data = cube[list(slice_values).index(pick)]
+    else:
+        z_data = cube
+
+    show_text = grid_n <= 11
     fig2 = go.Figure(data=go.Heatmap(
-        z=z_data, x=[f"${s:,.0f}" for s in sale_steps], y=[f"${c:,.0f}" for c in cost_steps],
-        colorscale="RdYlGn", text=text_data, texttemplate="%{text}", hoverinfo="text"
+        z=z_data, x=sale_steps, y=cost_steps, zmid=0,
+        colorscale="RdYlGn",
+        text=[[format_money(v) for v in row] for row in z_data] if show_text else None,
+        texttemplate="%{text}" if show_text else None,
+        hovertemplate="Sale: $%{x:,.0f}/SF<br>Hard Cost: $%{y:,.0f}/SF<br>Land Value: $%{z:,.0f}<extra></extra>"
     ))
-    fig2.update_layout(xaxis_title="Final Sale Price ($/SF)", yaxis_title="Hard Costs ($/SF)", height=450)
+    fig2.update_layout(xaxis_title="Final Sale Price ($/SF)", yaxis_title="Hard Costs ($/SF)", height=450, xaxis=dict(tickprefix="$"), yaxis=dict(tickprefix="$"))
     st.plotly_chart(fig2, use_container_width=True)
 
+# --- 9. GOAL SEEK ---
+st.divider()
+st.subheader("🎯 Goal Seek: What Has to Be True at the Asking Price?")
+st.markdown("Enter the seller's asking price. For every product type, the solver finds the **lowest sale price**, **highest hard cost**, and **highest loan rate** at which the land still pencils at your target margin (everything else held at your inputs).")
+
+gs_c1, gs_c2 = st.columns([1, 2])
+with gs_c1:
+    asking_price = cloud_input("Land Asking Price ($)", "land_residual", "asking_price", step=50000.0)
+
+if asking_price > 0:
+    prod_names = list(BUILD_DATA.keys())
+    batch_inputs = dict(lr_inputs)
+    batch_inputs["fsr"] = np.array([fsr if n == prod_type else BUILD_DATA[n]["fsr"] for n in prod_names])
+    batch_inputs["hard_cost_psf"] = np.array([hard_cost_psf if n == prod_type else BUILD_DATA[n]["cost"] for n in prod_names], dtype=float)
+    batch_inputs["sell_months"] = np.array([BUILD_DATA[n]["sell_months"] for n in prod_names], dtype=float)
+
+    solved = solve_thresholds(batch_inputs, asking_price)
+    rlv_now = pro_forma(**batch_inputs)["residual_land_value"]
+
+    def fmt_solved(v, fmt, var):
+        lo, hi = GOAL_SEEK_BRACKETS[var]
+        if np.isnan(v): return "Not achievable"
+        if v == np.inf: return "> " + fmt.format(hi).replace(".00", "")   # works at the top of the search range
+        if v == -np.inf: return "< " + fmt.format(lo).replace(".00", "") if lo > 0 else "Any"
+        return fmt.format(v)
+
+    df_gs = pd.DataFrame({
+        "Product Type": [f"{n} ◀" if n == prod_type else n for n in prod_names],
+        "FSR": batch_inputs["fsr"],
+        "Hard Cost ($/SF)": [f"${v:,.0f}" for v in batch_inputs["hard_cost_psf"]],
+        "Land Value @ Your Assumptions": [format_money(v) for v in rlv_now],
+        "Break-even Sale ($/SF)": [fmt_solved(v, "${:,.0f}", "sell_psf") for v in solved["sell_psf"]],
+        "Max Hard Cost ($/SF)": [fmt_solved(v, "${:,.0f}", "hard_cost_psf") for v in solved["hard_cost_psf"]],
+        "Max Loan Rate": [fmt_solved(v, "{:.2f}%", "finance_rate") for v in solved["finance_rate"]],
+        "Verdict": ["✅ Pencils" if v >= asking_price else "❌ Overpriced" for v in rlv_now]
+    })
+    st.dataframe(df_gs, use_container_width=True, hide_index=True)
+    st.caption(f"◀ = your selected product type (uses your FSR and hard cost overrides). \"Not achievable\" means no value in the search range makes the deal work at the asking price. "
+               f"\"> {GOAL_SEEK_BRACKETS['finance_rate'][1]:g}%\" / \"> ${GOAL_SEEK_BRACKETS['hard_cost_psf'][1]:,.0f}\" mean it still works at the top of the range.")
+
+# --- 10. MULTI-SITE BATCH SCREEN ---
+st.divider()
+st.subheader("🗂️ Portfolio Screen: Multiple Sites")
+st.markdown("Screen a list of lots at once. Each site gets its own lot size, product type and sale price (FSR and hard cost default to the product type when left blank); every other assumption comes from the inputs above.")
+
+@st.cache_resource(show_spinner=False)
+def site_result_cache():
+    return {}
+
+SITE_TABLE_COLUMNS = ["site", "city", "lot_size", "product_type", "sell_psf", "fsr", "hard_cost_psf", "asking_price"]
+
+# The sites table lives in session state; the vault is only written when the editor changes
+if 'lr_sites' not in st.session_state:
+    saved_sites = st.session_state.app_db['land_residual'].get('sites') or {}
+    st.session_state.lr_sites = pd.DataFrame({c: saved_sites.get(c, []) for c in SITE_TABLE_COLUMNS})
+    if st.session_state.lr_sites.empty:
+        st.session_state.lr_sites = pd.DataFrame([{
+            "site": "Current Site", "city": city, "lot_size": float(lot_size), "product_type": prod_type,
+            "sell_psf": float(sell_psf), "fsr": float(fsr), "hard_cost_psf": float(hard_cost_psf), "asking_price": None
+        }])
+    st.session_state.lr_sites_rev = 0
+
+def save_sites(df):
+    df = df.reindex(columns=SITE_TABLE_COLUMNS).reset_index(drop=True)
+    st.session_state.lr_sites = df
+    st.session_state.lr_sites_rev += 1  # fresh editor: its pending edits are now part of lr_sites
+    st.session_state.app_db['land_residual']['sites'] = df.astype(object).where(df.notna(), None).to_dict(orient="list")
+    trigger_auto_save()
+
+def apply_site_edits(editor_key):
+    # The editor's state is a delta against lr_sites: edited cells, deleted rows, then added rows
+    delta = st.session_state[editor_key]
+    df = st.session_state.lr_sites.copy()
+    for row, changes in delta.get("edited_rows", {}).items():
+        for col, val in changes.items():
+            df.at[df.index[int(row)], col] = val
+    df = df.drop(df.index[delta.get("deleted_rows", [])])
+    if delta.get("added_rows"):
+        df = pd.concat([df, pd.DataFrame(delta["added_rows"])], ignore_index=True)
+    save_sites(df)
+
+with st.expander("📥 Import Sites (CSV)"):
+    site_file = st.file_uploader("Sites file", type=["csv"], label_visibility="collapsed", key="lr_sites_file")
+    st.caption(f"Columns: {', '.join(SITE_TABLE_COLUMNS)}. Product types must match the list above.")
+    if site_file is not None and st.button("Load Sites", key="lr_sites_load"):
+        save_sites(pd.read_csv(site_file).reindex(columns=SITE_TABLE_COLUMNS))
+        st.rerun()
+
+sites_editor_key = f"lr_sites_editor_{st.session_state.lr_sites_rev}"
+edited_sites = st.data_editor(
+    st.session_state.lr_sites, key=sites_editor_key, num_rows="dynamic", use_container_width=True, hide_index=True,
+    on_change=apply_site_edits, args=(sites_editor_key,),
+    column_config={
+        "site": "Site", "city": "City",
+        "lot_size": st.column_config.NumberColumn("Lot Size (SF)", format="%d"),
+        "product_type": st.column_config.SelectboxColumn("Product Type", options=list(BUILD_DATA.keys())),
+        "sell_psf": st.column_config.NumberColumn("Sale ($/SF)", format="$%d"),
+        "fsr": st.column_config.NumberColumn("FSR"),
+        "hard_cost_psf": st.column_config.NumberColumn("Hard Cost ($/SF)", format="$%d"),
+        "asking_price": st.column_config.NumberColumn("Asking Price", format="$%d"),
+    }
+)
+
+rank_by = st.radio("Rank By", ["residual_land_value", "roe", "equity_irr", "land_surplus"], horizontal=True, key="lr_sites_rank",
+                   format_func=lambda k: {"residual_land_value": "Land Value", "roe": "ROE", "equity_irr": "Equity IRR", "land_surplus": "Surplus vs Asking"}[k])
+
+screen_df, n_rejected = sites_frame(edited_sites, BUILD_DATA)
+if n_rejected:
+    st.caption(f"⚠️ {n_rejected} row(s) skipped (missing lot size / sale price or unknown product type).")
+
+if not screen_df.empty:
+    shared_inputs = {k: lr_inputs[k] for k in SHARED_SITE_INPUTS}
+    progress = st.progress(0.0) if len(screen_df) > SITE_CHUNK_ROWS else None
+    table_slot = st.empty()
+    for n_done, site_results in iter_site_results(screen_df, shared_inputs, cache=site_result_cache()):
+        if progress: progress.progress(n_done / len(screen_df), text=f"Screened {n_done:,} of {len(screen_df):,} sites")
+        ranked = rank_sites(screen_df, site_results, by=rank_by)
+        table_slot.dataframe(
+            ranked[["Rank", "site", "city", "product_type", "lot_size", "fsr", "residual_land_value", "asking_price",
+                    "land_surplus", "equity_required", "target_profit", "roe", "equity_irr"]],
+            use_container_width=True, hide_index=True,
+            column_config={
+                "Rank": st.column_config.NumberColumn("Rank", format="%d"), "site": "Site", "city": "City",
+                "product_type": "Product Type", "lot_size": st.column_config.NumberColumn("Lot (SF)", format="%d"),
+                "fsr": "FSR",
+                "residual_land_value": st.column_config.NumberColumn("Max Land Price", format="$%d"),
+                "asking_price": st.column_config.NumberColumn("Asking", format="$%d"),
+                "land_surplus": st.column_config.NumberColumn("Surplus vs Asking", format="$%d"),
+                "equity_required": st.column_config.NumberColumn("Equity Needed", format="$%d"),
+                "target_profit": st.column_config.NumberColumn("Profit", format="$%d"),
+                "roe": st.column_config.NumberColumn("ROE", format="%.1f%%"),
+                "equity_irr": st.column_config.NumberColumn("Equity IRR", format="%.1f%%"),
+            }
+        )
+    if progress: progress.empty()
+
 show_disclaimer()
 
 # --- FOOTER ---
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-import math
 import time
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase
+from tax_engine import marginal_rate, table_note
+from housing_engine import pay_vs_invest_paths, pay_vs_invest_sweep, after_tax_return, INVEST_ACCOUNTS
 import os
 import base64
 
@@ -29,13 +31,6 @@ OFF_WHITE = "#F8F9FA"
 SLATE_ACCENT = "#4A4E5A"
 BORDER_GREY = "#DEE2E6"
 
-def get_marginal_tax_rate(income):
-    if income <= 55867: return 20.06
-    elif income <= 111733: return 31.00
-    elif income <= 173205: return 40.70
-    elif income <= 246752: return 45.80
-    else: return 53.50
-
 # --- 3. DATA RETRIEVAL ---
 prof = st.session_state.app_db.get('profile', {})
 p1_name = prof.get('p1_name', 'Primary Client')
@@ -94,40 +89,24 @@ with col1:
 with col2:
     st.subheader("📈 The Market Variable")
     stock_return = cloud_input("Expected Stock Return (%)", "pay_vs_invest", "stock_return", step=0.1)
-    acc_type = st.selectbox("Investment Account Type", ["Non-Registered", "TFSA", "RRSP"], key="pvi_acc_type")
+    acc_type = st.selectbox("Investment Account Type", INVEST_ACCOUNTS, key="pvi_acc_type")
     
     st.markdown("**Whose tax bracket applies?**")
-    t1, t2 = get_marginal_tax_rate(p1_inc), get_marginal_tax_rate(p2_inc)
+    t1, t2 = marginal_rate(p1_inc, prof.get('province')), marginal_rate(p2_inc, prof.get('province'))
     tax_map = {f"{p1_name} ({t1}%)": t1, f"{p2_name} ({t2}%)": t2}
     tax_owner = st.radio("Select Owner", list(tax_map.keys()), horizontal=True, key="pvi_tax_owner")
     marginal_tax = tax_map[tax_owner]
+    st.caption(table_note(prof.get('province')))
 
 # --- 6. CORE MATH ENGINE (Fixed for 0%) ---
 n_months = int(amort * 12)
-r_m_mo = (m_rate / 100) / 12
-if r_m_mo > 0:
-    fv_mortgage = extra_amt * (((1 + r_m_mo)**n_months - 1) / r_m_mo)
-else:
-    fv_mortgage = extra_amt * n_months # Fix for 0%
-interest_saved = fv_mortgage - (extra_amt * n_months)
-
-if acc_type == "TFSA":
-    net_growth_ann = stock_return
-elif acc_type == "Non-Registered":
-    net_growth_ann = stock_return * (1 - (marginal_tax / 100 * 0.5))
-else: # RRSP
-    net_growth_ann = stock_return
-
-r_s_mo = (net_growth_ann / 100) / 12
-effective_monthly_dep = extra_amt / (1 - (marginal_tax/100)) if acc_type == "RRSP" else extra_amt
+months = np.arange(1, n_months + 1)
+net_growth_ann = float(after_tax_return(stock_return, marginal_tax, acc_type))
+mortgage_path, stock_path = pay_vs_invest_paths(extra_amt, m_rate, stock_return, marginal_tax, acc_type, months)
 
-if r_s_mo > 0:
-    fv_stock = effective_monthly_dep * (((1 + r_s_mo)**n_months - 1) / r_s_mo)
-else:
-    fv_stock = effective_monthly_dep * n_months # Fix for 0% growth
-
-if acc_type == "RRSP":
-    fv_stock *= (1 - (marginal_tax / 100))
+fv_mortgage = float(mortgage_path[-1]) if n_months > 0 else 0.0
+fv_stock = float(stock_path[-1]) if n_months > 0 else 0.0
+interest_saved = fv_mortgage - (extra_amt * n_months)
 
 # --- 7. VISUALS ---
 st.divider()
@@ -139,14 +118,7 @@ with k2:
 with k3:
     st.metric("Total Wealth (Stock)", f"${fv_stock:,.0f}")
 
-history = []
-for m in range(1, n_months + 1):
-    val_m = extra_amt * (((1 + r_m_mo)**m - 1) / r_m_mo) if r_m_mo > 0 else extra_amt * m
-    val_s = effective_monthly_dep * (((1 + r_s_mo)**m - 1) / r_s_mo) if r_s_mo > 0 else effective_monthly_dep * m
-    if acc_type == "RRSP": val_s *= (1 - (marginal_tax / 100))
-    history.append({"Year": m/12, "Mortgage Path": val_m, "Stock Path": val_s})
-
-df = pd.DataFrame(history)
+df = pd.DataFrame({"Year": months / 12, "Mortgage Path": mortgage_path, "Stock Path": stock_path})
 fig = go.Figure()
 # Synced with your brand's color palette
 fig.add_trace(go.Scatter(x=df['Year'], y=df['Stock Path'], name='Option B: Stock Portfolio', line=dict(color=CHARCOAL, width=4)))
@@ -192,6 +164,46 @@ st.info(f"""
 it is identical to compounding wealth. If the rates were equal, the outcome is the same.
 """)
 
+# --- 10. THE INDIFFERENCE FRONTIER ---
+st.subheader("🗺️ The Indifference Frontier")
+st.caption("Every mortgage rate and stock return at once. Above a line, paying down the mortgage wins for that account; below it, investing wins.")
+
+SWEEP_RATES = np.round(np.arange(0.0, 10.01, 0.1), 1)
+SWEEP_RETURNS = np.round(np.arange(0.0, 12.01, 0.1), 1)
+SWEEP_TAXES = np.round(np.arange(20.0, 54.01, 0.5), 1)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def pvi_sweep(extra, months):
+    return pay_vs_invest_sweep(extra, SWEEP_RATES, SWEEP_RETURNS, SWEEP_TAXES, months)
+
+if n_months > 0:
+    sweep_adv, frontier = pvi_sweep(extra_amt, n_months)
+    fs1, fs2 = st.columns(2)
+    with fs1:
+        sweep_acc = st.radio("Heatmap Account", INVEST_ACCOUNTS, index=INVEST_ACCOUNTS.index(acc_type), horizontal=True, key="pvi_sweep_acc")
+    with fs2:
+        sweep_tax = st.select_slider("Marginal Tax Rate (%)", options=SWEEP_TAXES.tolist(),
+                                     value=float(SWEEP_TAXES[np.argmin(np.abs(SWEEP_TAXES - marginal_tax))]), key="pvi_sweep_tax")
+    ai, ti = INVEST_ACCOUNTS.index(sweep_acc), int(np.argmin(np.abs(SWEEP_TAXES - sweep_tax)))
+    z = sweep_adv[ai, ti].T  # rows: mortgage rate, columns: stock return
+    lim = float(np.abs(z).max()) or 1.0
+
+    fig_fr = go.Figure(go.Heatmap(
+        x=SWEEP_RETURNS, y=SWEEP_RATES, z=z, colorscale="RdBu", zmid=0, zmin=-lim, zmax=lim, colorbar=dict(title="Stock − Mortgage"),
+        hovertemplate="Stocks %{x}% · Mortgage %{y}%<br>Investing ahead by $%{z:,.0f}<extra></extra>"))
+    for acc, dash in zip(INVEST_ACCOUNTS, ["solid", "dash", "dot"]):
+        fig_fr.add_trace(go.Scatter(x=SWEEP_RETURNS, y=frontier[INVEST_ACCOUNTS.index(acc), ti], mode="lines", name=f"{acc} break-even",
+                                    line=dict(color=PRIMARY_GOLD if acc == sweep_acc else CHARCOAL, width=3, dash=dash)))
+    fig_fr.add_trace(go.Scatter(x=[stock_return], y=[m_rate], mode="markers", name="You",
+                                marker=dict(color=PRIMARY_GOLD, size=14, symbol="x", line=dict(width=2, color=CHARCOAL))))
+    fig_fr.update_layout(xaxis_title="Expected Stock Return (%)", yaxis_title="Mortgage Interest Rate (%)", height=480,
+                         yaxis=dict(range=[SWEEP_RATES[0], SWEEP_RATES[-1]]), margin=dict(l=0, r=0, t=20, b=20),
+                         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+    st.plotly_chart(fig_fr, use_container_width=True)
+    st.caption(f"At {sweep_tax}% tax, a {stock_return}% stock return breaks even with a "
+               f"{float(after_tax_return(stock_return, sweep_tax, 'Non-Registered')):.2f}% mortgage in a Non-Registered account, "
+               f"versus {stock_return}% in a TFSA or RRSP.")
+
 show_disclaimer()
 
 # --- FOOTER ---
@@ -1,10 +1,14 @@
 import requests
 import json
 import os
+import sys
 from datetime import datetime
 from bs4 import BeautifulSoup
 from openai import OpenAI
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from intel_handler import write_snapshot
+
 # Initialize OpenAI Client (Ensure OPENAI_API_KEY is in your environment)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
@@ -109,11 +113,6 @@ def get_monthly_provincial_yields():
 
 # --- 5. MAIN SYNC ENGINE ---
 def update_market_intel():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, "..", "data")
-    if not os.path.exists(data_dir): os.makedirs(data_dir)
-    file_path = os.path.join(data_dir, "market_intel.json")
-
     print("📡 Syncing 2026 Market Rates...")
     
     # Scrape Interest Rates
@@ -194,9 +193,9 @@ def update_market_intel():
         }
     }
 
-    with open(file_path, "w") as f:
-        json.dump(intel_data, f, indent=4)
-    print(f"✅ Market Sync Complete. Variable Rate: {variable_5}%")
+    # Immutable dated snapshot + index; market_intel.json is refreshed as the "latest" copy
+    snapshot_id = write_snapshot(intel_data)
+    print(f"✅ Market Sync Complete. Snapshot {snapshot_id}. Variable Rate: {variable_5}%")
 
 if __name__ == "__main__":
     update_market_intel()
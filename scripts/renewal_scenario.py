@@ -4,9 +4,8 @@ import numpy as np
 import plotly.graph_objects as go
 import os
 import base64
-import json
 from style_utils import inject_global_css, show_disclaimer
-from data_handler import cloud_input, sync_widget, supabase
+from data_handler import cloud_input, sync_widget, supabase, load_pinned_intel, show_intel_pin
 
 # 1. Inject Style
 inject_global_css()
@@ -24,11 +23,7 @@ BORDER_GREY = "#DEE2E6"
 
 # --- 2. DATA RETRIEVAL ---
 def load_market_intel():
-    path = os.path.join("data", "market_intel.json")
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    return {"rates": {"five_year_variable": 5.50, "five_year_fixed_uninsured": 4.79}}
+    return load_pinned_intel("renewal_analysis", {"rates": {"five_year_variable": 5.50, "five_year_fixed_uninsured": 4.79}})
 
 intel = load_market_intel()
 prof = st.session_state.app_db.get('profile', {})
@@ -74,6 +69,7 @@ st.markdown(f"""
         <h1 style='margin: 0 !important; padding: 0 !important; line-height: 1 !important;'>Renewal Strategy: Fixed vs. Variable</h1>
     </div>
 """, unsafe_allow_html=True)
+show_intel_pin("renewal_analysis")
 
 # --- 5. STORYTELLING ---
 name1_only = name1.split()[0]
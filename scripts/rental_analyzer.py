@@ -5,8 +5,11 @@ import pydeck as pdk
 import requests 
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, sync_widget, init_session_state, load_user_data
+from geo_handler import geocode_cached, batch_geocode, load_poi_indexes, poi_refresh_error, extract_covers, radius_bbox, live_poi_indexes, outside_poi_areas, POI_ICONS
+from rental_engine import underwrite_listings, listings_frame, add_proximity_features, demand_adjusted_rank, LISTING_DEFAULTS, UNRANKED, COMPACT_DTYPES, import_listings, listings_to_columns, listings_from_columns, PROXIMITY_COLUMNS, TRANSIT_FAR_M
 import os
 import base64
+import hashlib
 
 # --- 1. CONFIG & AUTH ---
 init_session_state()
@@ -82,6 +85,14 @@ def sync_listing(index, field, key):
     st.session_state.rental_listings[index][field] = st.session_state[key]
     force_cloud_save()
 
+# Bulk-imported listings live in one columnar DataFrame (vault: {column: [values]})
+if 'rental_import' not in st.session_state:
+    st.session_state.rental_import = listings_from_columns(st.session_state.app_db['rental_analyzer'].get('imported'))
+
+def save_imported():
+    st.session_state['rental_analyzer_imported'] = listings_to_columns(st.session_state.rental_import)
+    sync_widget("rental_analyzer:imported")
+
 # --- 4. PERSONALIZED STORYTELLING ---
 prof = st.session_state.app_db.get('profile', {})
 name1 = prof.get('p1_name') or "Primary Client"
@@ -125,6 +136,13 @@ with st.container(border=True):
     with g_col6:
         if curr_mgmt:
             cloud_input("Management Fee (%)", "rental_analyzer", "mgmt_fee", step=0.5)
+    with g_col7:
+        curr_demand = st.session_state.app_db['rental_analyzer'].get('use_demand', False)
+        st.checkbox("Rank by Tenant Demand (SkyTrain & Grocery proximity)?", value=curr_demand,
+                    key="rental_analyzer_use_demand", on_change=sync_widget, args=('rental_analyzer:use_demand',))
+        if curr_demand:
+            st.session_state.app_db['rental_analyzer'].setdefault('demand_uplift', 2.0)
+            cloud_input("Max Demand Uplift (CoC pts)", "rental_analyzer", "demand_uplift", step=0.5)
 
 # --- 6. LISTING MANAGEMENT UI ---
 def geocode_address(index):
@@ -132,25 +150,50 @@ def geocode_address(index):
     addr = st.session_state.rental_listings[index]['address']
     if addr:
         try:
-            location = geolocator.geocode(addr, addressdetails=True)
-            if location:
-                st.session_state.rental_listings[index]['lat'] = location.latitude
-                st.session_state.rental_listings[index]['lon'] = location.longitude
-                raw_addr = location.raw.get('address', {})
-                h_num = raw_addr.get('house_number', '')
-                road = raw_addr.get('road', '')
-                city = raw_addr.get('city', raw_addr.get('town', raw_addr.get('suburb', raw_addr.get('municipality', ''))))
-                
-                clean_addr = f"{h_num} {road}, {city}".strip() if road and city else ", ".join(location.address.split(",")[:2])
+            result = geocode_cached(geolocator, addr)
+            if result:
+                lat, lon, clean_addr = result
+                st.session_state.rental_listings[index]['lat'] = lat
+                st.session_state.rental_listings[index]['lon'] = lon
                 st.session_state.rental_listings[index]['address'] = clean_addr
                 force_cloud_save() 
                 st.toast(f"📍 Mapped & Saved: {clean_addr}")
+            else:
+                st.toast(f"⚠️ Address not found: {addr}")
         except Exception as e:
             st.warning(f"Map Service Error: {e}")
 
+# Nominatim allows 1 request/second, so a click maps at most this many addresses
+GEOCODE_BATCH_SIZE = 20
+
+def geocode_progress(label):
+    bar = st.progress(0.0, text=label)
+    return lambda done, total: bar.progress(done / total, text=f"{label} {done} of {total}")
+
+def geocode_all_unmapped():
+    if not geolocator: return
+    unmapped = [i for i, l in enumerate(st.session_state.rental_listings) if l.get('address') and not (l.get('lat') and l.get('lon'))]
+    todo = unmapped[:GEOCODE_BATCH_SIZE]
+    if not todo: return
+    try:
+        found = batch_geocode(geolocator, [st.session_state.rental_listings[i]['address'] for i in todo], progress=geocode_progress("📍 Looking up"))
+    except Exception as e:
+        st.warning(f"Map Service Error: {e}")
+        return
+    mapped = 0
+    for i in todo:
+        result = found.get(st.session_state.rental_listings[i]['address'])
+        if result:
+            lat, lon, clean_addr = result
+            st.session_state.rental_listings[i].update({'lat': lat, 'lon': lon, 'address': clean_addr})
+            mapped += 1
+    force_cloud_save()
+    left = len(unmapped) - len(todo)
+    st.toast(f"📍 Mapped {mapped} of {len(todo)} listings" + (f", {left} still pending" if left else ""))
+
 st.subheader("🏠 Property Underwriting")
 
-if len(st.session_state.rental_listings) == 0:
+if len(st.session_state.rental_listings) == 0 and st.session_state.rental_import.empty:
     st.info("No properties in your portfolio yet. Click below to start underwriting.")
 
 for i, listing in enumerate(st.session_state.rental_listings):
@@ -167,7 +210,7 @@ for i, listing in enumerate(st.session_state.rental_listings):
         r2_c1, r2_c2, r2_c3, r2_c4, r2_c5 = st.columns([2.6, 0.6, 0.6, 1, 1])
         with r2_c1: st.number_input("Listing Price ($)", value=listing['price'], key=f"pr_{i}", on_change=sync_listing, args=(i, 'price', f"pr_{i}"))
         with r2_c2: st.number_input("Beds", value=listing.get('beds', 1), key=f"bd_{i}", on_change=sync_listing, args=(i, 'beds', f"bd_{i}"))
-        with r2_c3: st.number_input("Baths", value=listing.get('baths', 1), key=f"ba_{i}", on_change=sync_listing, args=(i, 'baths', f"ba_{i}"))
+        with r2_c3: st.number_input("Baths", value=float(listing.get('baths', 1)), step=0.5, key=f"ba_{i}", on_change=sync_listing, args=(i, 'baths', f"ba_{i}"))
         with r2_c4: st.number_input("Sqft", value=listing.get('sqft', 0), key=f"sq_{i}", on_change=sync_listing, args=(i, 'sqft', f"sq_{i}"))
         with r2_c5: st.number_input("Year Built", value=listing.get('year', 2000), key=f"yr_{i}", on_change=sync_listing, args=(i, 'year', f"yr_{i}"))
 
@@ -177,124 +220,192 @@ for i, listing in enumerate(st.session_state.rental_listings):
         with r3_c3: st.number_input("Strata Fees ($)", value=listing['strata'], key=f"st_{i}", on_change=sync_listing, args=(i, 'strata', f"st_{i}"))
         with r3_c4: st.number_input("Monthly Insurance ($)", value=listing.get('ins', 100), key=f"in_{i}", on_change=sync_listing, args=(i, 'ins', f"in_{i}"))
 
-if len(st.session_state.rental_listings) < 10:
-    if st.button("➕ Add New Listing"):
-        st.session_state.rental_listings.append({
-            "address": "", "lat": 0.0, "lon": 0.0, "price": 0, "tax": 0, "strata": 0, "rent": 0, 
-            "beds": 1, "baths": 1, "sqft": 0, "year": 2000, "ins": 100
-        })
-        force_cloud_save()
-        st.rerun()
+unmapped_count = sum(1 for l in st.session_state.rental_listings if l.get('address') and not (l.get('lat') and l.get('lon')))
+if unmapped_count > 1:
+    st.button(f"📍 Map All Unmapped ({unmapped_count})" if unmapped_count <= GEOCODE_BATCH_SIZE else f"📍 Map Next {GEOCODE_BATCH_SIZE} of {unmapped_count} Unmapped",
+              on_click=geocode_all_unmapped)
 
-# --- 7. CALCULATIONS ENGINE ---
-full_analysis_list = []
-gs = st.session_state.app_db['rental_analyzer']
-calc_dp_mode, calc_dp_val, calc_m_rate, calc_m_amort = gs.get('dp_mode', 'Percentage (%)'), float(gs.get('dp_val', 20)), float(gs.get('m_rate', 5.1)), float(gs.get('m_amort', 25))
-calc_mgmt_fee = float(gs.get('mgmt_fee', 8.0)) if gs.get('use_mgmt', False) else 0.0
+if st.button("➕ Add New Listing"):
+    st.session_state.rental_listings.append(dict(LISTING_DEFAULTS))
+    force_cloud_save()
+    st.rerun()
 
-for idx, l in enumerate(st.session_state.rental_listings):
-    if l.get('lat') and l.get('lon'):
-        noi, dp_amt, ann_mtg, net_cf, coc_ret, psf = 0, 0, 0, 0, 0, 0
-        gross_inc = l['rent'] * 12
-        mgmt_cost = (l['rent'] * 12 * (calc_mgmt_fee / 100))
-        reserves = (l['rent'] * 12 * 0.05) 
-        op_ex = l['tax'] + (l['strata'] * 12) + (l.get('ins', 100) * 12) + mgmt_cost + reserves
-        
-        if l['price'] > 0:
-            noi = gross_inc - op_ex
-            dp_amt = (l['price'] * (calc_dp_val / 100)) if "Percent" in calc_dp_mode else calc_dp_val
-            loan = l['price'] - dp_amt
-            r = (calc_m_rate / 100) / 12
-            pmt = loan * (r * (1 + r)**(calc_m_amort*12)) / ((1 + r)**(calc_m_amort*12) - 1) if r > 0 else loan / (calc_m_amort*12)
-            ann_mtg = pmt * 12
-            net_cf = noi - ann_mtg
-            coc_ret = (net_cf / dp_amt) * 100 if dp_amt > 0 else 0
-            psf = l['price'] / l['sqft'] if l.get('sqft', 0) > 0 else 0
-
-        full_analysis_list.append({
-            "Address": l['address'], "Price": l['price'], "Area (sqft)": l.get('sqft', 0),
-            "PSF": psf, "Gross Annual Rent": gross_inc, "Annual OpEx": op_ex,
-            "Annual Mortg": ann_mtg, "Annual Net Cash Flow": net_cf,
-            "Cap Rate %": (noi / l['price']) * 100 if l['price']>0 else 0,
-            "CoC %": coc_ret, "DP_RAW": dp_amt, "lat": l['lat'], "lon": l['lon']
-        })
-
-# --- 8. FAST POI FETCHER (SKYTRAIN FIX) ---
-@st.cache_data(ttl=86400, show_spinner=False) 
-def pull_osm_data(lat, lon, radius, poi_type):
-    headers = {"User-Agent": "AnalystInAPocket/1.0"}
-    
-    # THE FIX: SkyTrains are often relations/ways, Groceries are usually nodes.
-    if poi_type == "SkyTrain":
-        query = f"""
-        [out:json][timeout:15];
-        (
-          nwr["railway"="station"](around:{radius},{lat},{lon});
-          nwr["station"="subway"](around:{radius},{lat},{lon});
-        );
-        out center;
-        """
-    elif poi_type == "Grocery":
-        query = f"""
-        [out:json][timeout:10];
-        nwr["shop"="supermarket"](around:{radius},{lat},{lon});
-        out center;
-        """
-    else: return pd.DataFrame()
+# --- 6b. BULK IMPORT (MLS CSV / EXCEL EXPORTS) ---
+IMPORT_PAGE_SIZE = 50
 
+def geocode_imported(limit=GEOCODE_BATCH_SIZE):
+    if not geolocator: return
+    df = st.session_state.rental_import
+    unmapped = df.index[(df['address'] != "") & ((df['lat'] == 0) | (df['lon'] == 0))]
+    todo = unmapped[:limit]
+    if len(todo) == 0: return
     try:
-        response = requests.get("https://overpass-api.de/api/interpreter", params={'data': query}, headers=headers, timeout=10)
-        data = response.json()
-        pois = []
-        for el in data.get('elements', []):
-            p_lat = el.get('lat', el.get('center', {}).get('lat'))
-            p_lon = el.get('lon', el.get('center', {}).get('lon'))
-            if p_lat and p_lon:
-                name = el.get('tags', {}).get('name', poi_type)
-                pois.append({'lat': p_lat, 'lon': p_lon, 'HoverText': f"{poi_type}: {name}", 'icon': "T" if poi_type == "SkyTrain" else "G"})
-        return pd.DataFrame(pois)
-    except:
-        return pd.DataFrame()
-
-# --- 9. VISUALS & RANKING ---
-if full_analysis_list:
-    df_results = pd.DataFrame(full_analysis_list)
-    df_ranked = df_results[df_results['Price'] > 0].sort_values(by="CoC %", ascending=False).reset_index(drop=True)
-    
-    st.divider()
-    st.subheader("🗺️ Geographic Portfolio Distribution")
-    
-    layer_col1, layer_col2, layer_col3 = st.columns([1.5, 1.5, 3])
-    with layer_col1: show_skytrain = st.checkbox("🚇 SkyTrain Stations")
-    with layer_col2: show_grocery = st.checkbox("🛒 Grocery Stores")
-    with layer_col3:
-        st.markdown(f'<div style="display: flex; gap: 10px; font-size: 0.8em; justify-content: flex-end; margin-top: 5px;"><span style="color: #CEB36F;">●</span> Top Pick <span style="color: #2E2B28;">●</span> Others</div>', unsafe_allow_html=True)
-
-    df_results['Rank'] = df_results['Address'].map(lambda x: df_ranked[df_ranked['Address'] == x].index[0] + 1 if x in df_ranked['Address'].values else 99)
-    df_results['Rank_str'] = df_results['Rank'].apply(lambda x: str(x) if x != 99 else "-")
-    df_results['HoverText'] = df_results.apply(lambda row: f"Rank #{row['Rank_str']}: {row['Address']} (${row['Price']:,.0f})", axis=1)
+        found = batch_geocode(geolocator, df.loc[todo, 'address'].tolist(), progress=geocode_progress("📍 Looking up"))
+    except Exception as e:
+        st.warning(f"Map Service Error: {e}")
+        return
+    mapped = 0
+    for i in todo:
+        result = found.get(df.at[i, 'address'])
+        if result:
+            df.at[i, 'lat'], df.at[i, 'lon'], df.at[i, 'address'] = result
+            mapped += 1
+    save_imported()
+    left = len(unmapped) - len(todo)
+    st.toast(f"📍 Mapped {mapped} of {len(todo)} imported listings" + (f", {left:,} still pending" if left else ""))
+
+with st.expander("📥 Bulk Import from MLS Export (CSV / Excel)"):
+    up_file = st.file_uploader("Listings file", type=["csv", "xlsx", "xls"], label_visibility="collapsed")
+    imp_c1, imp_c2 = st.columns([2, 1])
+    with imp_c1: imp_mode = st.radio("Import Mode", ["Replace imported listings", "Append"], horizontal=True, label_visibility="collapsed")
+    with imp_c2: do_import = st.button("📥 Import Listings", disabled=up_file is None, use_container_width=True)
+    st.caption("Recognized columns include Address, List Price, Rent, Taxes, Strata Fee, Bedrooms, Bathrooms, Floor Area, Year Built, Latitude, Longitude.")
+
+    if do_import and up_file is not None:
+        prog = st.progress(0.0, text="Reading rows...")
+        try:
+            new_df, stats = import_listings(up_file, up_file.name, on_chunk=lambda n: prog.progress(0.5, text=f"Validated {n:,} rows..."))
+        except Exception as e:
+            prog.empty()
+            st.error(f"Import Error: {e}")
+        else:
+            if imp_mode == "Append" and not st.session_state.rental_import.empty:
+                new_df = pd.concat([st.session_state.rental_import, new_df], ignore_index=True).astype(COMPACT_DTYPES)
+            st.session_state.rental_import = new_df
+            save_imported()
+            prog.progress(1.0, text="Done")
+            st.success(f"✅ Imported {stats['imported']:,} of {stats['rows']:,} rows ({stats['rejected']:,} rejected: missing price or address).")
+
+imp_df = st.session_state.rental_import
+if not imp_df.empty:
+    st.markdown(f"**📋 Imported Listings ({len(imp_df):,})**")
+    n_pages = max(1, -(-len(imp_df) // IMPORT_PAGE_SIZE))
+    pg_c1, pg_c2, pg_c3 = st.columns([1, 1.5, 1.5])
+    with pg_c1: page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+    start = (page - 1) * IMPORT_PAGE_SIZE
+    page_df = imp_df.iloc[start:start + IMPORT_PAGE_SIZE]
+
+    edited = st.data_editor(
+        page_df, key=f"rental_import_page_{page}", use_container_width=True, hide_index=True,
+        column_config={
+            "address": "Address", "lat": None, "lon": None,
+            "price": st.column_config.NumberColumn("Price", format="$%d"),
+            "rent": st.column_config.NumberColumn("Rent / Mo", format="$%d"),
+            "tax": st.column_config.NumberColumn("Tax / Yr", format="$%d"),
+            "strata": st.column_config.NumberColumn("Strata / Mo", format="$%d"),
+            "ins": st.column_config.NumberColumn("Ins / Mo", format="$%d"),
+            "beds": "Beds", "baths": "Baths", "sqft": "Sqft", "year": "Year Built"
+        }
+    )
+    if not edited.equals(page_df):
+        imp_df.loc[edited.index, edited.columns] = edited
+        st.session_state.rental_import = imp_df.astype(COMPACT_DTYPES)
+        save_imported()
+
+    n_unmapped = int(((imp_df['address'] != "") & ((imp_df['lat'] == 0) | (imp_df['lon'] == 0))).sum())
+    with pg_c2:
+        if n_unmapped:
+            st.button(f"📍 Map Next {min(n_unmapped, GEOCODE_BATCH_SIZE)} of {n_unmapped:,} Unmapped", on_click=geocode_imported, use_container_width=True)
+    with pg_c3:
+        if st.button("🗑️ Clear Imported", use_container_width=True):
+            st.session_state.rental_import = listings_from_columns(None)
+            save_imported()
+            st.rerun()
 
-    df_best = df_results[df_results['Rank'] == 1].copy()
-    df_others = df_results[df_results['Rank'] > 1].copy()
+# --- 7. CALCULATIONS ENGINE ---
+gs = st.session_state.app_db['rental_analyzer']
+calc_dp_mode, calc_dp_val, calc_m_rate, calc_m_amort = gs.get('dp_mode', 'Percentage (%)'), float(gs.get('dp_val', 20)), float(gs.get('m_rate', 5.1)), float(gs.get('m_amort', 25))
+calc_mgmt_fee = float(gs.get('mgmt_fee', 8.0)) if gs.get('use_mgmt', False) else 0.0
 
-    center_lat, center_lon = df_results['lat'].mean(), df_results['lon'].mean()
+all_listings = pd.concat([listings_frame(st.session_state.rental_listings), st.session_state.rental_import], ignore_index=True)
+df_results = underwrite_listings(all_listings, calc_dp_mode, calc_dp_val, calc_m_rate, calc_m_amort, calc_mgmt_fee)
+
+# --- 8. LOCAL POI INDEX (NO PER-VIEW OVERPASS CALLS) ---
+# geo_handler keeps the parsed extract until the file changes and refreshes it in
+# the background; only areas outside the extract go to Overpass.
+poi_warnings = set()
+def poi_warning(msg):
+    if msg not in poi_warnings:
+        poi_warnings.add(msg)
+        st.warning(msg)
+
+def get_poi_indexes():
+    indexes = load_poi_indexes(auto_refresh=True)
+    if poi_refresh_error() is not None:
+        poi_warning(f"Map Service Error: couldn't refresh SkyTrain & grocery data, using the saved copy ({poi_refresh_error()})")
+    return indexes
+
+def pull_local_pois(lat, lon, radius, poi_type):
+    indexes = get_poi_indexes()
+    if not extract_covers(lat, lon, poi_type):
+        try:
+            indexes = live_poi_indexes(radius_bbox(lat, lon, radius))
+        except Exception as e:
+            poi_warning(f"Map Service Error: {e}")
+            return pd.DataFrame()
+    idx = indexes.get(poi_type)
+    if idx is None or len(idx) == 0: return pd.DataFrame()
+    ids, _ = idx.query_radius(lat, lon, radius)
+    return pd.DataFrame({
+        'lat': idx.lats[ids], 'lon': idx.lons[ids],
+        'HoverText': [f"{poi_type}: {n}" for n in idx.names[ids]],
+        'icon': POI_ICONS[poi_type]
+    })
+
+# --- 8b. MAP LAYER CACHE ---
+# The map only depends on listing coordinates/labels and ranks. Both are hashed:
+# the coordinate frame is rebuilt only when listings move, rank labels are
+# re-applied to it when only the order changes, and the Deck object is reused
+# when neither changed. The map itself lives in a fragment, so toggling a POI
+# layer reruns (and resends) only the map, not the whole page; inputs outside
+# the fragment still rerun the page and resend the chart with it.
+def listing_coord_key(df):
+    h = hashlib.sha1()
+    h.update(df[['lat', 'lon', 'Price']].to_numpy(dtype=float).tobytes())
+    h.update("\x1f".join(df['Address'].astype(str)).encode())
+    return h.hexdigest()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def listing_map_base(coord_key, _df):
+    base = _df[['lat', 'lon']].reset_index(drop=True)
+    base['label'] = [f": {a} (${p:,.0f})" for a, p in zip(_df['Address'], _df['Price'])]
+    return base
+
+def add_bulletproof_badge(map_layers, df, radius, color_rgb):
+    if not df.empty:
+        df['color_col'] = [color_rgb] * len(df)
+        map_layers.append(pdk.Layer("ScatterplotLayer", df, get_position='[lon, lat]', get_fill_color='color_col', get_radius=radius, pickable=True))
+        map_layers.append(pdk.Layer("TextLayer", df, get_position='[lon, lat]', get_text='icon', get_size=20, get_color=[255, 255, 255, 255], get_alignment_baseline="'center'", get_text_anchor="'middle'", pickable=False))
+
+def poi_layer_frames(df, show_skytrain, show_grocery):
+    """POI points around the map centre, pulled outside the deck cache so a failed live query isn't kept."""
+    center_lat, center_lon = df['lat'].mean(), df['lon'].mean()
+    df_train = pull_local_pois(center_lat, center_lon, 5000, "SkyTrain") if show_skytrain else pd.DataFrame()
+    df_groc = pull_local_pois(center_lat, center_lon, 2000, "Grocery") if show_grocery else pd.DataFrame()
+    h = hashlib.sha1()
+    for frame in (df_train, df_groc):
+        h.update(frame[['lat', 'lon']].to_numpy(dtype=float).tobytes() if not frame.empty else b"\x1f")
+    return df_train, df_groc, h.hexdigest()
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def listing_map_deck(coord_key, rank_key, poi_key, _df, _df_train, _df_groc):
+    df_map = listing_map_base(coord_key, _df).copy()
+    rank = _df['Rank'].to_numpy()
+    df_map['Rank'] = rank
+    df_map['Rank_str'] = np.where(rank != UNRANKED, rank.astype(str), "-")
+    df_map['HoverText'] = "Rank #" + df_map['Rank_str'] + df_map['label']
+    df_map = df_map.drop(columns=['label'])
+
+    df_best = df_map[df_map['Rank'] == 1]
+    df_others = df_map[df_map['Rank'] != 1]
+
+    center_lat, center_lon = df_map['lat'].mean(), df_map['lon'].mean()
     view_state = pdk.ViewState(latitude=center_lat, longitude=center_lon, zoom=13)
     
     map_layers = []
 
-    def add_bulletproof_badge(df, radius, color_rgb):
-        if not df.empty:
-            df['color_col'] = [color_rgb] * len(df)
-            map_layers.append(pdk.Layer("ScatterplotLayer", df, get_position='[lon, lat]', get_fill_color='color_col', get_radius=radius, pickable=True))
-            map_layers.append(pdk.Layer("TextLayer", df, get_position='[lon, lat]', get_text='icon', get_size=20, get_color=[255, 255, 255, 255], get_alignment_baseline="'center'", get_text_anchor="'middle'", pickable=False))
-
-    if show_skytrain:
-        df_train = pull_osm_data(center_lat, center_lon, 5000, "SkyTrain")
-        add_bulletproof_badge(df_train, 150, [0, 102, 204, 255]) 
-
-    if show_grocery:
-        df_groc = pull_osm_data(center_lat, center_lon, 2000, "Grocery")
-        add_bulletproof_badge(df_groc, 100, [40, 167, 69, 255]) 
+    add_bulletproof_badge(map_layers, _df_train.copy(), 150, [0, 102, 204, 255])
+    add_bulletproof_badge(map_layers, _df_groc.copy(), 100, [40, 167, 69, 255])
 
     if not df_best.empty:
         map_layers.append(pdk.Layer("ScatterplotLayer", df_best, get_position='[lon, lat]', get_fill_color=[206, 179, 111, 255], get_radius=220, pickable=True))
@@ -304,11 +415,45 @@ if full_analysis_list:
         map_layers.append(pdk.Layer("ScatterplotLayer", df_others, get_position='[lon, lat]', get_fill_color=[46, 43, 40, 255], get_radius=180, pickable=True))
         map_layers.append(pdk.Layer("TextLayer", df_others, get_position='[lon, lat]', get_text="Rank_str", get_size=16, get_color=[255, 255, 255, 255], get_alignment_baseline="'center'", get_text_anchor="'middle'", pickable=False))
 
-    st.pydeck_chart(pdk.Deck(
+    return pdk.Deck(
         map_style=None, initial_view_state=view_state, 
         layers=map_layers,
         tooltip={"text": "{HoverText}"} 
-    ))
+    )
+
+@st.fragment
+def listing_map(df, coord_key, rank_key):
+    layer_col1, layer_col2, layer_col3 = st.columns([1.5, 1.5, 3])
+    with layer_col1: show_skytrain = st.checkbox("🚇 SkyTrain Stations")
+    with layer_col2: show_grocery = st.checkbox("🛒 Grocery Stores")
+    with layer_col3:
+        st.markdown(f'<div style="display: flex; gap: 10px; font-size: 0.8em; justify-content: flex-end; margin-top: 5px;"><span style="color: #CEB36F;">●</span> Top Pick <span style="color: #2E2B28;">●</span> Others</div>', unsafe_allow_html=True)
+
+    df_train, df_groc, poi_key = poi_layer_frames(df, show_skytrain, show_grocery)
+    st.pydeck_chart(listing_map_deck(coord_key, rank_key, poi_key, _df=df, _df_train=df_train, _df_groc=df_groc))
+
+# --- 9. VISUALS & RANKING ---
+if not df_results.empty:
+    if gs.get('use_demand', False):
+        df_results = add_proximity_features(df_results, get_poi_indexes())
+        for bbox, rows in outside_poi_areas(df_results['lat'], df_results['lon'], TRANSIT_FAR_M):
+            try:
+                live = add_proximity_features(df_results.iloc[rows], live_poi_indexes(bbox))
+            except Exception as e:
+                poi_warning(f"Map Service Error: {e}")
+                continue
+            for col in PROXIMITY_COLUMNS:
+                df_results.loc[df_results.index[rows], col] = live[col].to_numpy()
+        df_results['Demand Score'], df_results['Demand-Adj CoC %'], df_results['Rank'] = demand_adjusted_rank(df_results, float(gs.get('demand_uplift', 2.0)))
+        df_results['SkyTrain (m)'] = df_results['SkyTrain (m)'].replace(np.inf, np.nan)
+    df_ranked = df_results[df_results['Rank'] != UNRANKED].sort_values(by="Rank").reset_index(drop=True)
+    
+    st.divider()
+    st.subheader("🗺️ Geographic Portfolio Distribution")
+    
+    coord_key = listing_coord_key(df_results)
+    rank_key = hashlib.sha1(df_results['Rank'].to_numpy(dtype=np.int64).tobytes()).hexdigest()
+    listing_map(df_results, coord_key, rank_key)
 
     # --- 10. RANKING TABLE ---
     if not df_ranked.empty:
@@ -326,7 +471,10 @@ if full_analysis_list:
                 "Annual Mortg": st.column_config.NumberColumn(format="$%d"),
                 "Annual Net Cash Flow": st.column_config.NumberColumn(format="$%d"),
                 "Cap Rate %": st.column_config.NumberColumn(format="%.2f%%"),
-                "CoC %": st.column_config.NumberColumn(format="%.2f%%")
+                "CoC %": st.column_config.NumberColumn(format="%.2f%%"),
+                "SkyTrain (m)": st.column_config.NumberColumn(format="%d"),
+                "Demand Score": st.column_config.NumberColumn(format="%.2f"),
+                "Demand-Adj CoC %": st.column_config.NumberColumn(format="%.2f%%")
             }
         )
 
@@ -4,6 +4,8 @@ import numpy as np
 import plotly.graph_objects as go
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, sync_widget
+from tax_engine import marginal_rate, table_note
+from rental_engine import rental_vs_stock, rental_vs_stock_flows, account_matrix, ACCOUNT_TYPES, MAX_HOLD_YEARS
 import os
 import base64
 
@@ -30,20 +32,12 @@ p2_name = prof.get('p2_name', 'Client 2')
 household = f"{p1_name} & {p2_name}" if p2_name else p1_name
 
 # --- DYNAMIC TAX LOGIC START ---
-def get_marginal_tax_rate(income):
-    # BC 2025 Combined Federal/Provincial Estimates
-    if income <= 55867: return 20.06
-    elif income <= 111733: return 31.00
-    elif income <= 173205: return 40.70
-    elif income <= 246752: return 45.80
-    else: return 53.50
-
 # Calculate Real-Time Income Sums from Profile
 p1_inc = float(prof.get('p1_t4', 0)) + float(prof.get('p1_bonus', 0)) + float(prof.get('p1_commission', 0))
 p2_inc = float(prof.get('p2_t4', 0)) + float(prof.get('p2_bonus', 0)) + float(prof.get('p2_commission', 0))
 
-p1_tax = get_marginal_tax_rate(p1_inc)
-p2_tax = get_marginal_tax_rate(p2_inc)
+p1_tax = marginal_rate(p1_inc, prof.get('province'))
+p2_tax = marginal_rate(p2_inc, prof.get('province'))
 # --- DYNAMIC TAX LOGIC END ---
 
 # --- 3. PERSISTENCE & INITIALIZATION ---
@@ -103,60 +97,17 @@ st.markdown(f"""
 
 # --- 5. CALCULATION ENGINE ---
 def run_wealth_engine(price, inv, rate, apprec, r_income, costs, total_return, s_div, years, tax_rate, acc_type):
-    loan = price - inv
-    m_rate = (rate/100)/12
-    n_mo = 25 * 12
-    m_pi = loan * (m_rate * (1+m_rate)**n_mo) / ((1+m_rate)**n_mo - 1) if loan > 0 else 0
-    
-    price_growth_rate = (total_return - s_div) / 100
-    curr_val, curr_loan, stock_val = price, loan, inv + (price * 0.02)
-    cum_re_cash = 0
-    data = []
-    
-    for y in range(1, years + 1):
-        # Rental Path
-        ann_int = 0
-        for _ in range(12):
-            i_mo = curr_loan * m_rate
-            ann_int += i_mo
-            curr_loan -= (m_pi - i_mo)
-        
-        tax_deductibles = ann_int + costs['tax'] + (costs['ins']*12) + (costs['strata']*12) + costs['maint']
-        total_cash_opex = costs['tax'] + (costs['ins']*12) + (costs['strata']*12) + costs['maint'] + (r_income*12*(costs['mgmt']/100))
-        taxable_re = (r_income * 12) - tax_deductibles
-        re_tax_impact = taxable_re * (tax_rate/100)
-        net_re_cash = (r_income * 12) - (m_pi * 12) - total_cash_opex - re_tax_impact
-        cum_re_cash += net_re_cash
-        
-        # Stock Path (Reinvestment)
-        div_gross = stock_val * (s_div/100)
-        if acc_type == "Non-Registered":
-            st_tax_impact = div_gross * (tax_rate/100) * 0.5 
-            reinvest_amt = div_gross - st_tax_impact
-        else:
-            st_tax_impact = 0 
-            reinvest_amt = div_gross
-            
-        stock_val = (stock_val + reinvest_amt) * (1 + price_growth_rate)
-        data.append({"Year": y, "RE_Cash": net_re_cash/12, "RE_Tax": re_tax_impact, "ST_Tax": st_tax_impact, "ST_Div_Mo": div_gross/12})
-        curr_val *= (1 + apprec/100)
-
-    # Sale Day Logic
-    re_sell_costs = (curr_val * 0.035) + 2000
-    re_cap_gain_tax = max(0, curr_val - price - re_sell_costs) * 0.5 * (tax_rate/100)
-    net_proceeds_re = curr_val - curr_loan - re_sell_costs - re_cap_gain_tax
-    
-    st_sell_costs = stock_val * 0.01
-    if acc_type == "TFSA":
-        st_tax = 0 
-    elif acc_type == "RRSP":
-        st_tax = stock_val * (tax_rate/100) 
-    else:
-        st_profit = stock_val - (inv + (price * 0.02)) - st_sell_costs
-        st_tax = max(0, st_profit) * 0.5 * (tax_rate/100) 
-        
-    net_proceeds_st = stock_val - st_sell_costs - st_tax
-    return pd.DataFrame(data), (net_proceeds_re + cum_re_cash), net_proceeds_st, (re_cap_gain_tax + re_sell_costs), (st_tax + st_sell_costs), net_proceeds_re, net_proceeds_st
+    res = rental_vs_stock(price, inv, rate, apprec, r_income, costs, total_return, s_div, tax_rate, acc_type, years)
+    df = pd.DataFrame({
+        "Year": np.arange(1, years + 1),
+        "RE_Cash": res["rental_year_cash"][0] / 12,
+        "RE_Tax": res["rental_year_tax"][0],
+        "ST_Tax": res["stock_year_tax"][0],
+        "ST_Div_Mo": res["stock_year_dividends"][0] / 12,
+    })
+    pick = lambda k: float(res[k][0, -1])
+    return (df, pick("rental_total"), pick("stock_total"), pick("rental_leak"), pick("stock_leak"),
+            pick("rental_net_sale"), pick("stock_net_sale"))
 
 # --- 6. INPUTS ---
 col1, col2 = st.columns(2)
@@ -184,6 +135,7 @@ with col2:
     years = st.select_slider("Horizon (Years)", options=[5, 10, 15, 20], value=int(rvs_data.get('years', 10)))
     tax_options = {f"{p1_name} ({p1_tax}%)": p1_tax, f"{p2_name} ({p2_tax}%)": p2_tax}
     tax_rate_input = tax_options[st.radio("Select Owner Marginal Tax Rate", list(tax_options.keys()), horizontal=True)]
+    st.caption(table_note(prof.get('province')))
 
 # --- 7. SNAPSHOT ---
 costs = {'tax': tax_cost, 'ins': ins_cost, 'strata': strata_cost, 'maint': maint_cost, 'mgmt': mgmt_pct}
@@ -215,6 +167,79 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# --- 9. EVERY HOLD PERIOD ---
+st.write("")
+st.subheader("⏳ Does the Answer Change If You Hold Longer?")
+st.caption(f"Month-by-month cash flows for both paths at every hold from 1 to {MAX_HOLD_YEARS} years. NPV is discounted at the stock total return ({s_total_return}%).")
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def hold_sweep(price, inv, rate, apprec, rent, costs, total_return, s_div, tax_rate, acc_type):
+    return rental_vs_stock_flows(price, inv, rate, apprec, rent, costs, total_return, s_div, tax_rate, acc_type)
+
+flows = hold_sweep(price, inv, rate, apprec, rent, costs, s_total_return, s_div, tax_rate_input, st_acc)
+h = years - 1
+h1, h2, h3 = st.columns(3)
+h1.metric(f"Rental IRR ({years} Yrs)", f"{flows['rental_irr'][h]:.1f}%", f"{flows['rental_irr'][h] - flows['stock_irr'][h]:+.1f} pts vs Stock", delta_color="normal")
+h2.metric(f"Stock IRR ({years} Yrs)", f"{flows['stock_irr'][h]:.1f}%")
+h3.metric("Equity Multiple (Rental / Stock)", f"{flows['rental_multiple'][h]:.2f}x / {flows['stock_multiple'][h]:.2f}x")
+
+hold_metric = st.radio("Compare", ["IRR", "NPV", "Equity Multiple"], horizontal=True, key="rvs_hold_metric")
+key, fmt = {"IRR": ("irr", "%"), "NPV": ("npv", "$"), "Equity Multiple": ("multiple", "x")}[hold_metric]
+fig_hold = go.Figure()
+fig_hold.add_trace(go.Scatter(x=flows["hold_years"], y=flows[f"rental_{key}"], name="🏠 Rental", line=dict(color=PRIMARY_GOLD, width=4)))
+fig_hold.add_trace(go.Scatter(x=flows["hold_years"], y=flows[f"stock_{key}"], name=f"📈 Stock ({st_acc})", line=dict(color=CHARCOAL, width=3, dash="dash")))
+fig_hold.add_vline(x=years, line_dash="dot", line_color=SLATE_ACCENT, annotation_text="Your Horizon", annotation_position="top left")
+fig_hold.update_layout(xaxis_title="Hold Period (Years)", yaxis_title=hold_metric, height=400, hovermode="x unified",
+                       yaxis=dict(tickprefix="$" if fmt == "$" else "", ticksuffix=fmt if fmt != "$" else ""),
+                       margin=dict(t=20, b=20, l=0, r=20), legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+st.plotly_chart(fig_hold, use_container_width=True)
+
+with st.expander(f"📋 Rental Cash Flow Lines ({years}-Year Hold)"):
+    lines = {name.replace("_", " ").title(): v[h][1:years * 12 + 1].reshape(years, 12).sum(axis=1) for name, v in flows["rental"].items() if name != "equity"}
+    line_df = pd.DataFrame(lines, index=pd.Index(np.arange(1, years + 1), name="Year"))
+    line_df["Net"] = line_df.sum(axis=1)
+    st.dataframe(line_df.style.format("${:,.0f}"), use_container_width=True)
+
+# --- 10. ACCOUNT TYPE x TAX RATE MATRIX ---
+st.write("")
+st.subheader("🧮 Which Stock Account Does the Rental Have to Beat?")
+st.caption("All three account types at every marginal tax rate and every hold period, in one run.")
+
+MATRIX_TAX_RATES = np.round(np.arange(20.0, 54.01, 0.5), 1)
+
+@st.cache_data(show_spinner=False, max_entries=16)  # keyed on a hash of every input, so view toggles never recompute
+def tax_account_matrix(price, inv, rate, apprec, rent, costs, total_return, s_div):
+    return account_matrix(price, inv, rate, apprec, rent, costs, total_return, s_div, MATRIX_TAX_RATES)
+
+mx = tax_account_matrix(price, inv, rate, apprec, rent, costs, s_total_return, s_div)
+mx_view = st.radio("View", ["Break-Even Hold", "Advantage by Hold Period"], horizontal=True, key="rvs_matrix_view")
+
+if mx_view == "Break-Even Hold":
+    z = np.where(np.isfinite(mx["ahead_from"]), mx["ahead_from"], np.nan)
+    until = np.where(np.isfinite(mx["behind_again"]), "Stock back ahead from year " + mx["behind_again"].astype(int).astype(str),
+                     f"Stays ahead through year {MAX_HOLD_YEARS}")
+    fig_mx = go.Figure(go.Heatmap(
+        x=MATRIX_TAX_RATES, y=ACCOUNT_TYPES, z=z, customdata=until, colorscale="Viridis", reversescale=True, colorbar=dict(title="Years"),
+        hovertemplate="%{y} · %{x}% tax<br>Rental ahead from year %{z:.0f}<br>%{customdata}<extra></extra>"))
+    fig_mx.add_vline(x=tax_rate_input, line_dash="dash", line_color=PRIMARY_GOLD)
+    fig_mx.update_layout(xaxis_title="Marginal Tax Rate (%)", height=300)
+    mx_note = (f"Colour: the shortest hold at which the rental comes out ahead; hover to see when (if ever) the stock account retakes the lead. "
+               f"Blank cells: the stock account is ahead at every hold from 1 to {MAX_HOLD_YEARS} years.")
+else:
+    mx_acc = st.radio("Stock Account", ACCOUNT_TYPES, index=ACCOUNT_TYPES.index(st_acc), horizontal=True, key="rvs_matrix_acc")
+    z = mx["advantage"][ACCOUNT_TYPES.index(mx_acc)]
+    lim = float(np.abs(z).max()) or 1.0
+    fig_mx = go.Figure(go.Heatmap(
+        x=mx["hold_years"], y=MATRIX_TAX_RATES, z=z, colorscale="RdBu", zmid=0, zmin=-lim, zmax=lim, colorbar=dict(title="Rental − Stock"),
+        hovertemplate="Hold %{x} yrs · %{y}% tax<br>Rental advantage $%{z:,.0f}<extra></extra>"))
+    fig_mx.add_trace(go.Scatter(x=[years], y=[tax_rate_input], mode="markers", showlegend=False,
+                                marker=dict(color=PRIMARY_GOLD, size=14, symbol="x", line=dict(width=2, color=CHARCOAL))))
+    fig_mx.update_layout(xaxis_title="Hold Period (Years)", yaxis_title="Marginal Tax Rate (%)", height=420)
+    mx_note = "Blue: the rental wins. Red: the stock account wins."
+fig_mx.update_layout(margin=dict(t=20, b=20, l=0, r=20))
+st.plotly_chart(fig_mx, use_container_width=True)
+st.caption(mx_note)
+
 show_disclaimer()
 
 # --- FOOTER ---
@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import time
 import os
 import base64
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, load_user_data, init_session_state
+from fire_engine import MAX_MONTHS, months_to_target, balance_at, fire_age_grid, simulate_decumulation, summarize_decumulation, load_real_returns
 
 # --- 1. UNIVERSAL AUTO-LOADER ---
 init_session_state()
@@ -58,6 +60,9 @@ if not rc_data.get('initialized'):
     rc_data['annual_return'] = 7.0
     rc_data['swr'] = 4.0
     rc_data['initialized'] = True
+if 'retirement_years' not in rc_data:
+    rc_data['retirement_years'] = 50.0
+    rc_data['sim_volatility'] = 15.0
 
 # --- 4. INLINE LOGO & TITLE ---
 def get_inline_logo(img_name="logo.png", width=75):
@@ -117,30 +122,22 @@ with st.expander("⚙️ Advanced Math Assumptions (Optional)"):
 target_spend = monthly_income * 12
 
 # Calculate the FIRE Number
-fire_number = target_spend / (swr / 100) if swr > 0 else 0
-
-# Compounding Loop
-months = 0
-current_balance = starting_assets
-history = [{"Age": current_age, "Net Worth": current_balance}]
-
-r_mo = (annual_return / 100) / 12
-
-# Prevent infinite loops if return is deeply negative
-max_months = 1200 # 100 years
-
-if fire_number > 0 and current_balance < fire_number:
-    while current_balance < fire_number and months < max_months:
-        months += 1
-        current_balance = current_balance * (1 + r_mo) + monthly_contribution
-        
-        # Save data point every 12 months for the chart
-        if months % 12 == 0:
-            history.append({"Age": current_age + (months / 12), "Net Worth": current_balance})
-
-    # Add final crossing point if it didn't land exactly on a year
-    if months % 12 != 0:
-        history.append({"Age": current_age + (months / 12), "Net Worth": current_balance})
+fire_number = float(target_spend / (swr / 100)) if swr > 0 else 0
+
+# Crossing month solved directly (annuity future-value inverse), no month-by-month loop
+max_months = MAX_MONTHS # 100 years
+months = float(months_to_target(starting_assets, monthly_contribution, annual_return, fire_number)) if fire_number > 0 else 0.0
+if np.isinf(months):
+    months = max_months
+
+# Yearly chart points plus the final crossing point if it didn't land exactly on a year
+chart_months = np.arange(0, months + 1, 12, dtype=float)
+if months % 12 != 0:
+    chart_months = np.append(chart_months, months)
+history = pd.DataFrame({
+    "Age": current_age + chart_months / 12,
+    "Net Worth": balance_at(starting_assets, monthly_contribution, annual_return, chart_months)
+})
 
 years_to_fire = months / 12
 fire_age = current_age + years_to_fire
@@ -160,7 +157,7 @@ else:
         st.metric("Age at Retirement", f"{fire_age:.1f} Years Old")
 
     # --- 8. THE COMPOUNDING CHART ---
-    df = pd.DataFrame(history)
+    df = history
     fig = go.Figure()
 
     # The Wealth Growth Line
@@ -199,72 +196,91 @@ st.divider()
 st.subheader("🌪️ FIRE Stress Test (Sensitivity Analysis)")
 st.markdown("<p style='color: #4A4E5A; margin-bottom: 20px;'>How do shifts in market performance and withdrawal strategies impact your timeline?</p>", unsafe_allow_html=True)
 
-def calculate_scenario(ret_rate, withdrawal_rate):
-    if withdrawal_rate <= 0: return float('inf'), float('inf')
-    scenario_fire_num = target_spend / (withdrawal_rate / 100)
-    
-    if ret_rate <= 0:
-        if monthly_contribution <= 0: return scenario_fire_num, float('inf')
-        m = (scenario_fire_num - starting_assets) / monthly_contribution
-        return scenario_fire_num, max(0, m/12)
-        
-    mo_ret = (ret_rate / 100) / 12
-    bal = starting_assets
-    m = 0
-    while bal < scenario_fire_num and m < 1200:
-        m += 1
-        bal = bal * (1 + mo_ret) + monthly_contribution
-    return scenario_fire_num, (m / 12)
-
-# Define Scenarios (-2% Return & -0.5% SWR for Conservative, etc.)
-cons_ret = max(0, annual_return - 2.0)
-cons_swr = max(1.0, swr - 0.5)
-
-agg_ret = annual_return + 2.0
-agg_swr = swr + 0.5
-
-cons_num, cons_years = calculate_scenario(cons_ret, cons_swr)
-agg_num, agg_years = calculate_scenario(agg_ret, agg_swr)
-
-# Round the FIRE numbers to the nearest thousand
-cons_num_rounded = round(cons_num, -3)
-baseline_num_rounded = round(fire_number, -3)
-agg_num_rounded = round(agg_num, -3)
-
-# Format the output cards (Backslashes removed!)
+sc1, sc2 = st.columns(2)
+with sc1:
+    ret_span = st.slider("Return Range (± %)", 1.0, 6.0, 3.0, step=0.5, key="rc_ret_span")
+with sc2:
+    swr_range = st.slider("Withdrawal Rate Range (%)", 2.0, 7.0, (float(np.clip(swr - 1.5, 2.0, 6.5)), float(np.clip(swr + 1.5, 2.5, 7.0))), step=0.1, key="rc_swr_range")
+
+ret_steps = np.round(np.arange(annual_return - ret_span, annual_return + ret_span + 1e-9, 0.1), 2)
+swr_steps = np.round(np.arange(swr_range[0], swr_range[1] + 1e-9, 0.05), 2)
+grid_fire_nums, grid_ages = fire_age_grid(current_age, starting_assets, monthly_contribution, target_spend, ret_steps, swr_steps)
+
+z_ages = np.where(np.isinf(grid_ages), np.nan, grid_ages)
+hover_text = [[f"${n:,.0f}" for _ in ret_steps] for n in grid_fire_nums]
+fig_st = go.Figure(data=go.Heatmap(
+    z=z_ages, x=ret_steps, y=swr_steps, customdata=hover_text,
+    colorscale="RdYlGn_r", colorbar=dict(title="FIRE Age"),
+    hovertemplate="Return: %{x:.1f}%<br>SWR: %{y:.2f}%<br>FIRE Number: %{customdata}<br>FIRE Age: %{z:.1f}<extra></extra>"
+))
+fig_st.add_trace(go.Scatter(
+    x=[annual_return], y=[swr], mode="markers+text", text=["You"], textposition="top center",
+    marker=dict(color=CHARCOAL, size=12, symbol="x"), showlegend=False, hoverinfo="skip"
+))
+fig_st.update_layout(xaxis_title="Annual Market Return (%)", yaxis_title="Safe Withdrawal Rate (%)", height=450, margin=dict(l=0, r=0, t=30, b=20))
+st.plotly_chart(fig_st, use_container_width=True)
+
+# Headline corners of the grid: worst (low return, low SWR) and best (high return, high SWR)
+worst_age, best_age = grid_ages[0, 0], grid_ages[-1, -1]
+fmt_age = lambda a: "Unreachable" if np.isinf(a) else f"Age {a:.1f}"
 s1, s2, s3 = st.columns(3)
+s1.metric(f"Conservative ({ret_steps[0]:.1f}% / {swr_steps[0]:.2f}%)", fmt_age(worst_age))
+s2.metric(f"Baseline ({annual_return:.1f}% / {swr:.1f}%)", fmt_age(fire_age) if years_to_fire < max_months / 12 else "Unreachable")
+s3.metric(f"Aggressive ({ret_steps[-1]:.1f}% / {swr_steps[-1]:.2f}%)", fmt_age(best_age))
+if np.isinf(grid_ages).any():
+    st.caption("Blank cells can't reach the FIRE number within 100 years.")
 
-with s1:
-    st.markdown(f"""
-    <div style="background-color: {OFF_WHITE}; padding: 15px; border-radius: 10px; border: 1px solid {BORDER_GREY}; border-top: 5px solid #d9534f;">
-        <h4 style="margin-top:0; color: {CHARCOAL};">Conservative</h4>
-        <div style="font-size: 0.9em; color: {SLATE_ACCENT}; margin-bottom: 10px;">Return: <b>{cons_ret:.1f}%</b> | SWR: <b>{cons_swr:.1f}%</b></div>
-        <h2 style="margin:0; color: {CHARCOAL};">${cons_num_rounded:,.0f}</h2>
-        <div style="color: #d9534f; font-weight: bold;">{cons_years:.1f} Years to FIRE</div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-with s2:
-    st.markdown(f"""
-    <div style="background-color: {OFF_WHITE}; padding: 15px; border-radius: 10px; border: 1px solid {PRIMARY_GOLD}; border-top: 5px solid {PRIMARY_GOLD}; transform: scale(1.02); box-shadow: 0 4px 6px rgba(0,0,0,0.05);">
-        <h4 style="margin-top:0; color: {CHARCOAL};">Baseline (Current)</h4>
-        <div style="font-size: 0.9em; color: {SLATE_ACCENT}; margin-bottom: 10px;">Return: <b>{annual_return:.1f}%</b> | SWR: <b>{swr:.1f}%</b></div>
-        <h2 style="margin:0; color: {CHARCOAL};">${baseline_num_rounded:,.0f}</h2>
-        <div style="color: {PRIMARY_GOLD}; font-weight: bold;">{years_to_fire:.1f} Years to FIRE</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with s3:
-    st.markdown(f"""
-    <div style="background-color: {OFF_WHITE}; padding: 15px; border-radius: 10px; border: 1px solid {BORDER_GREY}; border-top: 5px solid #5cb85c;">
-        <h4 style="margin-top:0; color: {CHARCOAL};">Aggressive</h4>
-        <div style="font-size: 0.9em; color: {SLATE_ACCENT}; margin-bottom: 10px;">Return: <b>{agg_ret:.1f}%</b> | SWR: <b>{agg_swr:.1f}%</b></div>
-        <h2 style="margin:0; color: {CHARCOAL};">${agg_num_rounded:,.0f}</h2>
-        <div style="color: #5cb85c; font-weight: bold;">{agg_years:.1f} Years to FIRE</div>
-    </div>
-    """, unsafe_allow_html=True)
+# --- 10. WILL THE MONEY LAST? (SEQUENCE RISK) ---
+st.divider()
+st.subheader("🎲 Will the Money Last? (Sequence-of-Returns Test)")
+st.markdown("<p style='color: #4A4E5A; margin-bottom: 20px;'>The SWR above assumes the same return every year. Real markets don't. This replays thousands of retirements that start with your FIRE number and withdraw your target income (inflation-adjusted) every year.</p>", unsafe_allow_html=True)
+
+_, (hist_first, hist_last) = load_real_returns()
+m1, m2, m3 = st.columns(3)
+with m1:
+    sim_mode = st.radio("Market Model", ["historical", "parametric"], key="rc_sim_mode",
+                        format_func=lambda k: f"Historical ({hist_first}-{hist_last})" if k == "historical" else "Monte Carlo")
+with m2:
+    retirement_years = cloud_input("Years in Retirement", "retire_calc", "retirement_years", step=1.0)
+with m3:
+    n_paths = st.select_slider("Simulated Retirements", [1000, 5000, 10000, 25000, 50000, 100000], value=10000, key="rc_sim_paths")
+if sim_mode == "parametric":
+    sim_vol = cloud_input("Annual Volatility (%)", "retire_calc", "sim_volatility", step=1.0, help="How much returns swing year to year. Stocks have historically been around 15-20%.")
+else:
+    sim_vol = 0.0
+    st.caption("Historical mode strings together random 10-year stretches of real (after-inflation) S&P 500 returns, so crashes and recoveries arrive in the order they actually happened.")
 
-# --- 10. ERRORS & OMISSIONS DISCLAIMER ---
+@st.cache_data(show_spinner=False, max_entries=8)
+def run_success_sim(start_balance, annual_spend, years, paths, mode, mean, vol):
+    workers = min(4, os.cpu_count() or 1) if paths >= 50000 else None
+    balances, fail_year = simulate_decumulation(start_balance, annual_spend, years, paths, mode, mean=mean, vol=vol, seed=42, workers=workers)
+    return summarize_decumulation(balances, fail_year)
+
+if fire_number > 0 and retirement_years >= 1:
+    sim = run_success_sim(fire_number, target_spend, int(retirement_years), n_paths, sim_mode, annual_return, sim_vol)
+
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Success Probability", f"{sim['success_rate'] * 100:.1f}%")
+    k2.metric("Median Ending Wealth (Today's $)", f"${sim['median_terminal']:,.0f}")
+    k3.metric("Typical Year Money Runs Out", "Never" if sim['median_fail_year'] is None else f"Year {sim['median_fail_year']:.0f}", "in failed scenarios only", delta_color="off")
+
+    years_axis = fire_age + np.arange(sim['bands'].shape[1])
+    p10, p50, p90 = sim['bands']
+    fig_sim = go.Figure()
+    fig_sim.add_trace(go.Scatter(x=years_axis, y=p90, line=dict(width=0), showlegend=False, hoverinfo="skip"))
+    fig_sim.add_trace(go.Scatter(x=years_axis, y=p10, name="10th-90th Percentile", fill='tonexty', fillcolor='rgba(206, 179, 111, 0.25)', line=dict(width=0)))
+    fig_sim.add_trace(go.Scatter(x=years_axis, y=p50, name="Median Portfolio", line=dict(color=PRIMARY_GOLD, width=3)))
+    fig_sim.update_layout(xaxis_title="Age", yaxis_title="Portfolio Value (Today's $)", height=400, margin=dict(l=0, r=0, t=30, b=20), hovermode="x unified",
+                          legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+    st.plotly_chart(fig_sim, use_container_width=True)
+
+    if sim['fail_counts'].sum() > 0:
+        fail_pct = sim['fail_counts'] / n_paths * 100
+        fig_fail = go.Figure(go.Bar(x=fire_age + np.arange(1, len(fail_pct) + 1), y=fail_pct, marker_color="#d9534f"))
+        fig_fail.update_layout(title="When the Money Runs Out (Failed Scenarios)", xaxis_title="Age", yaxis_title="% of All Scenarios", height=300, margin=dict(l=0, r=0, t=40, b=20))
+        st.plotly_chart(fig_fail, use_container_width=True)
+
+# --- 11. ERRORS & OMISSIONS DISCLAIMER ---
 show_disclaimer()
 
 # --- FOOTER ---
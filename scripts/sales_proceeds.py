@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from style_utils import inject_global_css, show_disclaimer 
 from data_handler import cloud_input, sync_widget
+from tax_engine import marginal_rate, table_note
 import os
 import base64
 
@@ -125,14 +126,7 @@ with c2:
         st.markdown("**🏛️ Capital Gains / Tax Details**")
         adjusted_cost_base = cloud_input("Original Purchase Price + Renos (ACB) $", "sales_proceeds", "acb", step=5000.0)
         
-        # --- DYNAMIC TAX CALCULATOR (BC 2025 Est) ---
-        def get_marginal_tax_rate(income):
-            if income <= 55867: return 20.06
-            elif income <= 111733: return 31.00
-            elif income <= 173205: return 40.70
-            elif income <= 246752: return 45.80
-            else: return 53.50
-
+        # --- DYNAMIC TAX CALCULATOR (profile province, tax_engine tables) ---
         prof = st.session_state.app_db.get('profile', {})
         p1 = prof.get('p1_name', 'Client 1')
         p2 = prof.get('p2_name', 'Client 2')
@@ -141,8 +135,8 @@ with c2:
         p1_inc = float(prof.get('p1_t4', 0)) + float(prof.get('p1_bonus', 0)) + float(prof.get('p1_commission', 0))
         p2_inc = float(prof.get('p2_t4', 0)) + float(prof.get('p2_bonus', 0)) + float(prof.get('p2_commission', 0))
         
-        t1 = get_marginal_tax_rate(p1_inc)
-        t2 = get_marginal_tax_rate(p2_inc)
+        t1 = marginal_rate(p1_inc, prof.get('province'))
+        t2 = marginal_rate(p2_inc, prof.get('province'))
         
         tax_map = {
             f"{p1} (Inc: ${p1_inc/1000:.0f}k → ~{t1}%)": t1, 
@@ -153,6 +147,7 @@ with c2:
         st.markdown("**Whose marginal tax bracket applies?**")
         sel_owner = st.radio("Registered Owner", list(tax_map.keys()), key="sp_tax_owner_radio", label_visibility="collapsed")
         marginal_tax_rate = tax_map[sel_owner]
+        st.caption(table_note(prof.get('province')))
         # --------------------------------------
 
 # --- 3. CALCULATION ENGINE ---
@@ -8,7 +8,7 @@ import base64
 import json
 import time
 from style_utils import inject_global_css, show_disclaimer 
-from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase
+from data_handler import cloud_input, sync_widget, load_user_data, init_session_state, supabase, load_pinned_intel, show_intel_pin
 
 # --- UNIVERSAL AUTO-LOADER ---
 init_session_state()
@@ -67,12 +67,7 @@ if 'down' not in sm_data or sm_data['down'] == 0:
 
 # 2. Pull Market Rate
 def load_market_intel():
-    path = os.path.join("data", "market_intel.json")
-    if os.path.exists(path):
-        try:
-            with open(path, "r") as f: return json.load(f)
-        except: pass
-    return {"rates": {"five_year_fixed_uninsured": 4.50}}
+    return load_pinned_intel("simple_mortgage", {"rates": {"five_year_fixed_uninsured": 4.50}})
 
 if 'rate' not in sm_data:
     intel = load_market_intel()
@@ -100,6 +95,7 @@ st.markdown(f"""
         <h1 style='margin: 0 !important; padding: 0 !important; line-height: 1 !important;'>Mortgage Calculator</h1>
     </div>
 """, unsafe_allow_html=True)
+show_intel_pin("simple_mortgage")
 
 
 st.markdown(f"""
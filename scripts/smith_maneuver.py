@@ -1,10 +1,12 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import os
 import base64
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, sync_widget, supabase
+from tax_engine import marginal_rate, table_note
+from smith_engine import simulate_smith, annual_frame, sweep_grid, SWEEP_AXES, monte_carlo_smith, summarize_mc, MC_SHARD_PATHS
 
 # 1. Inject Style
 inject_global_css()
@@ -25,16 +27,10 @@ p2_income = float(prof.get('p2_t4', 0)) + float(prof.get('p2_bonus', 0)) + float
 
 household_names = f"{client_name1} & {client_name2}" if client_name2 else client_name1
 
-def get_marginal_tax_rate(income):
-    # BC 2025 Combined Federal/Provincial Estimates
-    if income <= 55867: return 20.06
-    elif income <= 111733: return 31.00
-    elif income <= 173205: return 40.70
-    elif income <= 246752: return 45.80
-    else: return 53.50
-
-t1 = get_marginal_tax_rate(p1_income)
-t2 = get_marginal_tax_rate(p2_income)
+# Combined federal + provincial marginal rates for the profile's province
+province = prof.get('province', 'BC')
+t1 = marginal_rate(p1_income, province)
+t2 = marginal_rate(p2_income, province)
 
 # Determine Strategy Lead (Higher Earner) for the recommendation note
 if p1_income >= p2_income:
@@ -185,6 +181,7 @@ with st.container(border=True):
          
          sel_tax_label = st.radio("Marginal Tax Rate (%)*", tax_labels, index=default_tax_idx, horizontal=False, key="sm_tax_owner_radio")
          tax_rate = tax_values[tax_labels.index(sel_tax_label)]
+         st.caption(table_note(province))
          # ----------------------------------------
     with c8:
         initial_lump = cloud_input("Initial HELOC Room ($)", "smith_maneuver", "initial_lump", step=5000.0)
@@ -196,61 +193,12 @@ with st.container(border=True):
 
 # --- 9. CALC ENGINE ---
 sim_years = max(amortization, strategy_horizon)
-n_months = sim_years * 12
-r_m = mortgage_rate / 100 / 12
-n_m_amort = amortization * 12 
-monthly_payment = mortgage_amt * (r_m * (1 + r_m)**n_m_amort) / ((1 + r_m)**n_m_amort - 1)
-
-balance, heloc_balance, portfolio = mortgage_amt, 0.0, 0.0
-if initial_lump > 0:
-    heloc_balance += initial_lump
-    portfolio += initial_lump
-
-base_balance = mortgage_amt
-annual_data = []
-current_year_heloc_interest, year_refund, current_year_borrows, year_heloc_interest_cost = 0.0, 0.0, 0.0, 0.0
-
-for month in range(1, n_months + 1):
-    # Baseline
-    if base_balance > 0:
-        base_balance -= (monthly_payment - (base_balance * r_m))
-    base_net_worth = (mortgage_amt - max(0, base_balance))
-
-    # Active
-    principal_m = 0.0
-    if balance > 0:
-        interest_m = balance * r_m
-        principal_m = monthly_payment - interest_m
-        if principal_m > balance: principal_m = balance
-        balance -= principal_m
-    new_borrowing = principal_m 
-    interest_heloc = heloc_balance * (loc_rate / 100 / 12)
-    current_year_heloc_interest += interest_heloc
-    year_heloc_interest_cost += interest_heloc
-    
-    if month % 12 == 1 and month > 1:
-        refund_amount = current_year_heloc_interest * (tax_rate / 100)
-        if balance > 0:
-            balance -= refund_amount
-            new_borrowing += refund_amount 
-        else:
-            portfolio += refund_amount
-        current_year_heloc_interest, year_refund = 0.0, refund_amount
-
-    heloc_balance += new_borrowing
-    portfolio = (portfolio + new_borrowing) * (1 + inv_return / 100 / 12)
-
-    if month % 12 == 0:
-        annual_data.append({
-            "Year": month // 12, "Mortgage Balance": max(0, balance), "Investment Loan": heloc_balance,
-            "Portfolio Value": portfolio, "Annual Tax Refund": year_refund, "Dividend Income": portfolio * (div_yield / 100),
-            "Annual Interest Cost": year_heloc_interest_cost,
-            "Net Equity (Active)": portfolio - heloc_balance + (mortgage_amt - balance),
-            "Baseline Net Worth": base_net_worth, "Baseline Mortgage": max(0, base_balance)
-        })
-        year_refund, year_heloc_interest_cost = 0.0, 0.0
-
-df_annual = pd.DataFrame(annual_data)
+sm_params = dict(
+    mortgage_amt=mortgage_amt, amortization=amortization, mortgage_rate=mortgage_rate,
+    loc_rate=loc_rate, inv_return=inv_return, div_yield=div_yield,
+    tax_rate=tax_rate, initial_lump=initial_lump
+)
+df_annual = annual_frame(simulate_smith(years=sim_years, **sm_params))
 df_view = df_annual[df_annual['Year'] <= strategy_horizon].copy()
 
 # --- 10. CASH FLOW ---
@@ -289,6 +237,38 @@ with col_res2:
     fig_wealth.update_layout(title="Total Net Worth", height=300, yaxis=dict(tickprefix="$"))
     st.plotly_chart(fig_wealth, use_container_width=True)
 
+# --- 12b. SENSITIVITY SURFACE ---
+st.divider()
+st.subheader("🧭 Sensitivity Surface: Net Equity Advantage")
+st.markdown(f"Each cell re-runs the full {sim_years}-year simulation and shows how far the strategy finishes **ahead of (or behind) doing nothing** at Year {strategy_horizon}.")
+
+SWEEP_RANGES = {
+    "loc_rate": (max(0.0, loc_rate - 3.0), loc_rate + 3.0),
+    "inv_return": (inv_return - 5.0, inv_return + 5.0),
+    "tax_rate": (20.0, 53.5),
+    "initial_lump": (0.0, max(100000.0, initial_lump * 2)),
+}
+axis_names = list(SWEEP_AXES.keys())
+sw1, sw2, sw3 = st.columns([1, 1, 1])
+with sw1: x_axis = st.selectbox("X Axis", axis_names, index=0, format_func=SWEEP_AXES.get, key="sm_sweep_x")
+with sw2: y_axis = st.selectbox("Y Axis", [a for a in axis_names if a != x_axis], index=0, format_func=SWEEP_AXES.get, key="sm_sweep_y")
+with sw3: grid_n = st.select_slider("Grid Resolution", [10, 25, 50, 100], value=25, key="sm_sweep_n")
+
+x_vals = np.linspace(*SWEEP_RANGES[x_axis], grid_n)
+y_vals = np.linspace(*SWEEP_RANGES[y_axis], grid_n)
+surface = sweep_grid(sm_params, x_axis, x_vals, y_axis, y_vals, sim_years, strategy_horizon)
+
+fig_surf = go.Figure(go.Heatmap(
+    x=x_vals, y=y_vals, z=surface, zmid=0,
+    colorscale=[[0, "#DC2626"], [0.5, "#FFFFFF"], [1, PRIMARY_GOLD]],
+    colorbar=dict(title="Advantage", tickprefix="$"),
+    hovertemplate=f"{SWEEP_AXES[x_axis]}: %{{x:,.2f}}<br>{SWEEP_AXES[y_axis]}: %{{y:,.2f}}<br>Advantage: $%{{z:,.0f}}<extra></extra>"
+))
+fig_surf.add_trace(go.Scatter(x=[sm_params[x_axis]], y=[sm_params[y_axis]], mode="markers", marker=dict(color=INTEREST_COLOR, size=12, symbol="x"), name="Your Scenario", hoverinfo="skip"))
+fig_surf.update_layout(height=450, xaxis_title=SWEEP_AXES[x_axis], yaxis_title=SWEEP_AXES[y_axis], showlegend=False)
+st.plotly_chart(fig_surf, use_container_width=True)
+st.caption(f"Red cells finish behind the baseline. {int((surface < 0).sum())} of {surface.size} scenarios lose money vs. doing nothing.")
+
 # --- 13. STRESS TEST ---
 st.markdown("---")
 st.subheader("⚠️ Stress Test Simulator")
@@ -335,6 +315,45 @@ with st.container(border=True):
     except Exception:
         st.write(f"Simulation data unavailable for Year {crash_start}")
 
+# --- 14. MONTE CARLO MODE ---
+st.markdown("---")
+st.subheader("🎲 Monte Carlo: Thousands of Possible Markets")
+st.markdown("""
+Instead of one constant return and one hand-picked crash, this simulates thousands of **random market paths**.
+Portfolio returns swing around your Total Return, and the HELOC rate drifts with prime (correlated with the market) before reverting to your HELOC Rate.
+""")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def run_smith_mc(params, years, horizon, n_paths, inv_vol, rate_vol, corr):
+    workers = os.cpu_count() if n_paths > MC_SHARD_PATHS else None
+    return summarize_mc(monte_carlo_smith(params, years, horizon, n_paths=n_paths, inv_vol=inv_vol,
+                                          rate_vol=rate_vol, corr=corr, seed=42, workers=workers))
+
+with st.container(border=True):
+    mc1, mc2, mc3, mc4 = st.columns(4)
+    with mc1: mc_paths = st.select_slider("Simulated Paths", [1000, 10000, 50000], value=10000, key="sm_mc_paths")
+    with mc2: mc_vol = st.slider("Market Volatility (%/yr)", 5.0, 30.0, 15.0, step=1.0, key="sm_mc_vol")
+    with mc3: mc_rate_vol = st.slider("Prime Rate Volatility (pts/yr)", 0.0, 3.0, 1.0, step=0.25, key="sm_mc_rate_vol")
+    with mc4: mc_corr = st.slider("Rate / Market Correlation", -0.9, 0.9, 0.2, step=0.1, key="sm_mc_corr")
+
+    with st.spinner(f"Simulating {mc_paths:,} market paths..."):
+        mc = run_smith_mc(sm_params, sim_years, strategy_horizon, mc_paths, mc_vol, mc_rate_vol, mc_corr)
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Median Advantage", f"${mc['median']:,.0f}")
+    m2.metric("Worst 10% (Average)", f"${mc['worst_decile_mean']:,.0f}", delta=f"P10: ${mc['p10']:,.0f}", delta_color="off")
+    m3.metric("Chance of Finishing Behind", f"{mc['prob_behind']:.1%}")
+    m4.metric("Chance Underwater at Year " + str(strategy_horizon), f"{mc['prob_underwater_end']:.1%}", delta=f"{mc['prob_underwater_any']:.0%} dip underwater at some year-end", delta_color="off")
+
+    yrs = np.arange(1, strategy_horizon + 1)
+    fig_mc = go.Figure()
+    fig_mc.add_trace(go.Scatter(x=yrs, y=mc['bands'][2], line=dict(width=0), showlegend=False, hoverinfo="skip"))
+    fig_mc.add_trace(go.Scatter(x=yrs, y=mc['bands'][0], fill="tonexty", fillcolor="rgba(206,179,111,0.25)", line=dict(width=0), name="P10 - P90"))
+    fig_mc.add_trace(go.Scatter(x=yrs, y=mc['bands'][1], line=dict(color=PRINCIPAL_COLOR, width=3), name="Median"))
+    fig_mc.add_hline(y=0, line_dash="dot", line_color=INTEREST_COLOR)
+    fig_mc.update_layout(title="Net Equity Advantage vs. Baseline (Range of Outcomes)", height=350, yaxis=dict(tickprefix="$"), xaxis_title="Year")
+    st.plotly_chart(fig_mc, use_container_width=True)
+
 show_disclaimer()
 
 # --- FOOTER ---
@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import time
 import os
 import base64
 from style_utils import inject_global_css, show_disclaimer
 from data_handler import cloud_input, load_user_data, init_session_state
+from registered_engine import lifecycle, break_even_incomes, optimize_split
+from tax_engine import load_schedule, table_note
 
 # --- 1. UNIVERSAL AUTO-LOADER ---
 init_session_state()
@@ -45,12 +48,8 @@ greeting_names = f"{p1_raw} & {p2_raw}" if p1_raw and p2_raw else (p1_raw or "Pr
 current_t4 = float(prof.get('p1_t4', 0)) + float(prof.get('p1_bonus', 0)) + float(prof.get('p1_commission', 0))
 if current_t4 == 0: current_t4 = 90000.0
 
-def get_marginal_tax_rate(income):
-    if income <= 55867: return 20.0
-    elif income <= 111733: return 31.0
-    elif income <= 173205: return 40.0
-    elif income <= 246752: return 46.0
-    else: return 53.0
+# Combined federal + provincial brackets for the profile's province
+tax_schedule = load_schedule(prof.get('province'))
 
 if not tr_data.get('initialized'):
     tr_data['current_income'] = current_t4
@@ -63,6 +62,11 @@ if not tr_data.get('initialized'):
 # Ensure new variables exist to prevent errors
 if 'base_income' not in tr_data: tr_data['base_income'] = 25000.0
 if 'swr' not in tr_data: tr_data['swr'] = 4.0
+if 'retire_age' not in tr_data: tr_data['retire_age'] = 65.0
+if 'drawdown_years' not in tr_data: tr_data['drawdown_years'] = 30.0
+if 'inflation' not in tr_data: tr_data['inflation'] = 2.0
+if 'wage_growth' not in tr_data: tr_data['wage_growth'] = 2.0
+if 'tfsa_room' not in tr_data: tr_data['tfsa_room'] = 7000.0
 
 # --- 4. INLINE LOGO & TITLE ---
 def get_inline_logo(img_name="logo.png", width=75):
@@ -102,11 +106,12 @@ with col1:
     base_income = cloud_input("Base Retirement Income ($)", "tfsa_rrsp", "base_income", step=2000, help="Your estimated CPP, OAS, Pensions, or part-time work.")
     
     # Calculate both marginal rates
-    curr_rate = get_marginal_tax_rate(current_income)
-    base_retire_rate = get_marginal_tax_rate(base_income)
+    curr_rate = round(tax_schedule.marginal(current_income), 2)
+    base_retire_rate = round(tax_schedule.marginal(base_income), 2)
     
     # Using explicitly written spaces and \n to force the 3 stacked lines
     st.info(f"**Tax Bracket Analysis:** \nMarginal Rate (today): **{curr_rate}%** \nRetirement Tax Rate: **{base_retire_rate}%**")
+    st.caption(table_note(prof.get('province')))
 
 with col2:
     st.subheader("📈 The Accumulation")
@@ -119,6 +124,12 @@ with col3:
     expected_return = cloud_input("Expected Return (%)", "tfsa_rrsp", "expected_return", step=0.1)
     swr = cloud_input("Safe Withdrawal Rate (%)", "tfsa_rrsp", "swr", step=0.1, help="The percentage of the portfolio you will withdraw annually.")
 
+with st.expander("⚙️ Lifecycle Assumptions (Drawdown Years, RRIF, Indexation)"):
+    la1, la2, la3 = st.columns(3)
+    with la1: retire_age = cloud_input("Age at Retirement", "tfsa_rrsp", "retire_age", step=1.0, help="Sets when OAS/GIS apply (65) and when RRIF minimums kick in (72).")
+    with la2: drawdown_years = cloud_input("Years of Drawdown", "tfsa_rrsp", "drawdown_years", step=1.0)
+    with la3: inflation = cloud_input("Inflation (%)", "tfsa_rrsp", "inflation", step=0.1, help="Withdrawals, tax brackets and benefit thresholds all rise with inflation every year.")
+
 # --- 6. CORE MATH ENGINE ---
 r = expected_return / 100
 t = int(years)
@@ -136,16 +147,9 @@ rrsp_gross = (rrsp_deposit * ((1 + r) ** t)) + (rrsp_annual * (((1 + r) ** t - 1
 tfsa_withdraw = tfsa_gross * swr_rate
 rrsp_withdraw = rrsp_gross * swr_rate
 
-def get_tax(income):
-    if income <= 55867: return income * 0.20
-    elif income <= 111733: return (55867 * 0.20) + ((income - 55867) * 0.31)
-    elif income <= 173205: return (55867 * 0.20) + (55866 * 0.31) + ((income - 111733) * 0.40)
-    elif income <= 246752: return (55867 * 0.20) + (55866 * 0.31) + (61472 * 0.40) + ((income - 173205) * 0.46)
-    else: return (55867 * 0.20) + (55866 * 0.31) + (61472 * 0.40) + (73547 * 0.46) + ((income - 246752) * 0.53)
-
 # Calculate exactly how much tax is generated BY the RRSP withdrawal
-base_tax = get_tax(base_income)
-total_tax = get_tax(base_income + rrsp_withdraw)
+base_tax = tax_schedule.tax(base_income)
+total_tax = tax_schedule.tax(base_income + rrsp_withdraw)
 rrsp_income_tax = total_tax - base_tax
 
 # Calculate Hidden Taxes (Clawbacks based on 2026 Thresholds)
@@ -227,38 +231,22 @@ with c2:
     </div>
     """, unsafe_allow_html=True)
 
-# --- THE CHART (ACCUMULATION & DECUMULATION) ---
+# --- THE LIFECYCLE ENGINE (EVERY YEAR OF THE DRAWDOWN) ---
 st.write("")
 st.subheader("📈 The Lifecycle: Accumulation & Decumulation")
 
-years_list = list(range(t + 1))
-tfsa_balances = []
-rrsp_balances = []
-
-# Accumulation Phase
-for y in years_list:
-    if r > 0:
-        t_val = (invest_amt * ((1 + r) ** y)) + (annual_invest * (((1 + r) ** y - 1) / r))
-        r_val = (rrsp_deposit * ((1 + r) ** y)) + (rrsp_annual * (((1 + r) ** y - 1) / r))
-    else:
-        t_val = invest_amt + (annual_invest * y)
-        r_val = rrsp_deposit + (rrsp_annual * y)
-    
-    tfsa_balances.append(t_val)
-    rrsp_balances.append(r_val)
-
-# Decumulation Phase (Next 10 Years)
-for d in range(1, 11):
-    years_list.append(t + d)
-    prev_tfsa = tfsa_balances[-1]
-    prev_rrsp = rrsp_balances[-1]
-    
-    # Balance decreases by withdrawal, remainder grows by expected return
-    tfsa_new = (prev_tfsa - tfsa_withdraw) * (1 + r) if (prev_tfsa - tfsa_withdraw) > 0 else 0
-    rrsp_new = (prev_rrsp - rrsp_withdraw) * (1 + r) if (prev_rrsp - rrsp_withdraw) > 0 else 0
-    
-    tfsa_balances.append(tfsa_new)
-    rrsp_balances.append(rrsp_new)
+income_grid = np.arange(0, 200001, 500, dtype=float)
+life = lifecycle(invest_amt, annual_invest, curr_rate, expected_return, t, retire_age, drawdown_years, swr, inflation,
+                 np.append(income_grid, base_income), schedule=tax_schedule)
+user_row = -1
+crossings = break_even_incomes(income_grid, life["rrsp_advantage"][:-1])
+
+d_years = int(drawdown_years)
+accum_x = np.arange(t + 1)
+draw_x = t + 1 + np.arange(d_years)
+years_list = np.concatenate([accum_x, draw_x])
+tfsa_balances = np.concatenate([life["tfsa_accum"], life["tfsa_balance"][1:], [life["tfsa_end"]]])
+rrsp_balances = np.concatenate([life["rrsp_accum"], life["rrsp_balance"][1:], [life["rrsp_end"]]])
 
 fig = go.Figure()
 
@@ -268,12 +256,15 @@ fig.add_trace(go.Scatter(
 ))
 
 fig.add_trace(go.Scatter(
-    x=years_list, y=rrsp_balances, mode='lines', name='RRSP Balance', 
+    x=years_list, y=rrsp_balances, mode='lines', name='RRSP / RRIF Balance', 
     line=dict(color=RRSP_COLOR, width=4) 
 ))
 
 # Add a vertical line to mark Retirement Day
 fig.add_vline(x=t, line_width=2, line_dash="dash", line_color=SLATE_ACCENT, annotation_text="Retirement Day", annotation_position="top left")
+rrif_year = t + max(0, int(72 - retire_age))
+if t < rrif_year < t + d_years:
+    fig.add_vline(x=rrif_year, line_width=1, line_dash="dot", line_color=RRSP_COLOR, annotation_text="RRIF Minimums", annotation_position="top right")
 
 fig.update_layout(
     xaxis=dict(title="Years"),
@@ -286,6 +277,81 @@ fig.update_layout(
 
 st.plotly_chart(fig, use_container_width=True)
 
+# Net spendable every year of retirement at your base income
+lc1, lc2, lc3 = st.columns(3)
+real = (1 + inflation / 100) ** (t + np.arange(d_years))
+lc1.metric("Lifetime TFSA Spending (Today's $)", f"${(life['tfsa_withdrawal'] / real).sum():,.0f}")
+lc2.metric("Lifetime RRSP Spending After Tax (Today's $)", f"${(life['rrsp_net'][user_row] / real).sum():,.0f}")
+adv_user = life["rrsp_advantage"][user_row]
+lc3.metric("Lifetime Winner (incl. Estate)", "RRSP" if adv_user > 0 else "TFSA", f"${abs(adv_user):,.0f} ahead", delta_color="off")
+
+ages = life["ages"]
+fig_net = go.Figure()
+fig_net.add_trace(go.Scatter(x=ages, y=life["tfsa_withdrawal"], name="TFSA Net Spendable", line=dict(color=PRIMARY_GOLD, width=3)))
+fig_net.add_trace(go.Scatter(x=ages, y=life["rrsp_net"][user_row], name="RRSP Net Spendable", line=dict(color=RRSP_COLOR, width=3)))
+fig_net.add_trace(go.Bar(x=ages, y=life["rrsp_tax"][user_row], name="RRSP Income Tax", marker_color="#d9534f", opacity=0.5))
+fig_net.add_trace(go.Bar(x=ages, y=life["oas_clawback"][user_row] + life["gis_clawback"][user_row], name="OAS / GIS Clawback", marker_color="#8B0000", opacity=0.5))
+fig_net.update_layout(barmode="stack", title="Net Spendable Each Year of Retirement (Nominal $)", xaxis_title="Age", yaxis_title="$ / Year",
+                      height=400, margin=dict(t=40, b=20, l=0, r=40), hovermode="x unified",
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.35))
+st.plotly_chart(fig_net, use_container_width=True)
+
+# Break-even base income: where the lifetime winner flips
+st.subheader("⚖️ Which Account Wins at Every Retirement Income?")
+fig_be = go.Figure()
+fig_be.add_trace(go.Scatter(x=income_grid, y=life["rrsp_advantage"][:-1], name="RRSP Lifetime Advantage", fill='tozeroy', line=dict(color=RRSP_COLOR, width=3)))
+fig_be.add_hline(y=0, line_color=SLATE_ACCENT)
+fig_be.add_vline(x=base_income, line_dash="dash", line_color=PRIMARY_GOLD, annotation_text="Your Base Income", annotation_position="top right")
+for inc, _ in crossings:
+    fig_be.add_vline(x=inc, line_dash="dot", line_color="gray")
+fig_be.update_layout(xaxis_title="Base Retirement Income (Today's $)", yaxis_title="RRSP minus TFSA (Today's $)", height=380,
+                     margin=dict(t=30, b=20, l=0, r=40), xaxis=dict(tickprefix="$"), yaxis=dict(tickprefix="$"))
+st.plotly_chart(fig_be, use_container_width=True)
+if crossings:
+    st.markdown("  \n".join(f"• Above **${inc:,.0f}** of base income, the **{w}** pulls ahead." for inc, w in crossings))
+else:
+    st.markdown(f"• The **{'RRSP' if life['rrsp_advantage'][0] > 0 else 'TFSA'}** wins at every base income up to $200,000.")
+
+# Optimal split: how much of each year's savings should go to the RRSP
+st.subheader("🧮 The Optimal Split: TFSA, RRSP, or Both?")
+st.caption("Searches every year's split of your savings (refunds reinvested, RRSP room capped at 18% of income, TFSA room at the indexed annual limit plus carry-forward) for the highest after-tax retirement spending at your base income. Whatever doesn't fit in the TFSA goes to a non-registered account.")
+sp1, sp2 = st.columns(2)
+with sp1: wage_growth = cloud_input("Annual Raise (%)", "tfsa_rrsp", "wage_growth", step=0.5, help="Your income grows by this much every year, which moves your refund bracket.")
+with sp2: tfsa_room = cloud_input("Unused TFSA Room Today ($)", "tfsa_rrsp", "tfsa_room", step=1000, help="Your carry-forward room including this year's limit (see CRA My Account). New room is added every January.")
+
+plan = optimize_split(current_income, wage_growth, invest_amt, annual_invest, expected_return, inflation,
+                      t, retire_age, drawdown_years, base_income, tfsa_room=tfsa_room, schedule=tax_schedule)
+oc1, oc2, oc3 = st.columns(3)
+oc1.metric("Optimal Split Spending (Today's $)", f"${plan['spending']:,.0f} / yr",
+           f"${plan['spending'] - max(plan['all_tfsa'], plan['all_rrsp']):,.0f} vs best single account")
+oc2.metric("No RRSP: TFSA + Non-Reg (Today's $)", f"${plan['all_tfsa']:,.0f} / yr")
+oc3.metric("All RRSP + Refunds (Today's $)", f"${plan['all_rrsp']:,.0f} / yr")
+
+plan_years = plan["years"] + 1
+fig_split = go.Figure()
+fig_split.add_trace(go.Bar(x=plan_years, y=plan["rrsp_deposit"], name="RRSP Deposit", marker_color=RRSP_COLOR))
+fig_split.add_trace(go.Bar(x=plan_years, y=plan["tfsa_deposit"], name="TFSA Deposit (incl. refund)", marker_color=PRIMARY_GOLD))
+fig_split.add_trace(go.Bar(x=plan_years, y=plan["nonreg_deposit"], name="Non-Registered Overflow", marker_color=SLATE_ACCENT, opacity=0.6))
+fig_split.update_layout(barmode="stack", title="Optimal Contribution Schedule (Nominal $)", xaxis_title="Year", yaxis_title="$ / Year",
+                        height=380, margin=dict(t=40, b=20, l=0, r=40), hovermode="x unified",
+                        legend=dict(orientation="h", yanchor="bottom", y=-0.35))
+st.plotly_chart(fig_split, use_container_width=True)
+
+with st.expander("📋 Year-by-Year Contribution Plan"):
+    st.dataframe(pd.DataFrame({
+        "Year": plan_years.astype(int),
+        "Income": plan["income"],
+        "RRSP Room": plan["rrsp_room"],
+        "RRSP Share": plan["rrsp_fraction"] * 100,
+        "RRSP Deposit": plan["rrsp_deposit"],
+        "Refund": plan["refund"],
+        "TFSA Room": plan["tfsa_room"],
+        "TFSA Deposit": plan["tfsa_deposit"],
+        "Non-Registered": plan["nonreg_deposit"],
+    }).style.format({"Income": "${:,.0f}", "RRSP Room": "${:,.0f}", "RRSP Share": "{:.0f}%", "RRSP Deposit": "${:,.0f}",
+                     "Refund": "${:,.0f}", "TFSA Room": "${:,.0f}", "TFSA Deposit": "${:,.0f}", "Non-Registered": "${:,.0f}"}),
+        use_container_width=True, hide_index=True)
+
 st.info("""
 **💡 The Clawback Trap:** Because TFSA withdrawals are invisible to the CRA, they do not trigger government clawbacks. RRSP withdrawals, however, are stacked directly on top of your Base Income. If that combined total pushes you over the OAS threshold, or kicks you out of GIS eligibility, your RRSP is subjected to massive "Hidden Taxes."
 """)
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+from finance_engine import monthly_payment
+
+# ==========================================
+# 💰 SMITH MANEUVER SIMULATION ENGINE
+# ==========================================
+# Every input may be a scalar or an array; inputs are broadcast together and
+# each element is an independent scenario. The month loop only advances the
+# state vectors, so 1 scenario or 10,000 cost about the same number of steps.
+ANNUAL_COLUMNS = [
+    "Mortgage Balance", "Investment Loan", "Portfolio Value", "Annual Tax Refund",
+    "Dividend Income", "Annual Interest Cost", "Net Equity (Active)",
+    "Baseline Net Worth", "Baseline Mortgage"
+]
+
+SWEEP_AXES = {
+    "loc_rate": "HELOC Rate (%)",
+    "inv_return": "Total Return (%)",
+    "tax_rate": "Marginal Tax Rate (%)",
+    "initial_lump": "Initial HELOC Room ($)",
+}
+
+def simulate_smith(mortgage_amt, amortization, mortgage_rate, loc_rate, inv_return,
+                   div_yield, tax_rate, initial_lump, years, monthly_returns=None):
+    """
+    Runs the baseline (just pay the mortgage) and active (re-borrow principal,
+    invest, apply refunds as prepayments) paths for every scenario.
+
+    `monthly_returns`, if given, is an (S, years*12) array of portfolio returns
+    per month that replaces the constant inv_return/12 (used by Monte Carlo);
+    `loc_rate` may likewise be an (S, years*12) array of HELOC rates in %.
+
+    Returns {column: array of shape (S, years)} for ANNUAL_COLUMNS.
+    """
+    n_months = int(years) * 12
+    loc_rate = np.asarray(loc_rate, dtype=float)
+    loc_path = loc_rate if loc_rate.ndim == 2 else None
+    params = [np.atleast_1d(np.asarray(v, dtype=float)) for v in (
+        mortgage_amt, amortization, mortgage_rate,
+        loc_path[:, 0] if loc_path is not None else loc_rate,
+        inv_return, div_yield, tax_rate, initial_lump)]
+    shapes = [p.shape for p in params]
+    if monthly_returns is not None:
+        shapes.append((len(monthly_returns),))
+    shape = np.broadcast_shapes(*shapes)
+    mortgage_amt, amortization, mortgage_rate, loc0, inv_return, div_yield, tax_rate, initial_lump = (np.broadcast_to(p, shape).ravel() for p in params)
+    S = len(mortgage_amt)
+
+    r_m = mortgage_rate / 100 / 12
+    pmt = monthly_payment(mortgage_amt, mortgage_rate, amortization)
+    tax = tax_rate / 100
+    inv_m = inv_return / 100 / 12
+
+    balance = mortgage_amt.copy()
+    base_balance = mortgage_amt.copy()
+    heloc = np.where(initial_lump > 0, initial_lump, 0.0)
+    portfolio = heloc.copy()
+    year_interest = np.zeros(S)
+    year_refund = np.zeros(S)
+    year_cost = np.zeros(S)
+
+    out = {col: np.empty((S, int(years))) for col in ANNUAL_COLUMNS}
+
+    for month in range(1, n_months + 1):
+        # Baseline
+        base_balance = np.where(base_balance > 0, base_balance - (pmt - base_balance * r_m), base_balance)
+
+        # Active
+        live = balance > 0
+        principal = np.where(live, np.minimum(pmt - balance * r_m, balance), 0.0)
+        balance = balance - principal
+        new_borrowing = principal
+
+        loc_m = (loc_path[:, month - 1] if loc_path is not None else loc0) / 100 / 12
+        interest = heloc * loc_m
+        year_interest += interest
+        year_cost += interest
+
+        if month % 12 == 1 and month > 1:
+            refund = year_interest * tax
+            live = balance > 0
+            balance = np.where(live, balance - refund, balance)
+            new_borrowing = new_borrowing + np.where(live, refund, 0.0)
+            portfolio = portfolio + np.where(live, 0.0, refund)
+            year_interest = np.zeros(S)
+            year_refund = refund
+
+        heloc = heloc + new_borrowing
+        growth = monthly_returns[:, month - 1] if monthly_returns is not None else inv_m
+        portfolio = (portfolio + new_borrowing) * (1 + growth)
+
+        if month % 12 == 0:
+            y = month // 12 - 1
+            out["Mortgage Balance"][:, y] = np.maximum(0, balance)
+            out["Investment Loan"][:, y] = heloc
+            out["Portfolio Value"][:, y] = portfolio
+            out["Annual Tax Refund"][:, y] = year_refund
+            out["Dividend Income"][:, y] = portfolio * (div_yield / 100)
+            out["Annual Interest Cost"][:, y] = year_cost
+            out["Net Equity (Active)"][:, y] = portfolio - heloc + (mortgage_amt - balance)
+            out["Baseline Net Worth"][:, y] = mortgage_amt - np.maximum(0, base_balance)
+            out["Baseline Mortgage"][:, y] = np.maximum(0, base_balance)
+            year_refund = np.zeros(S)
+            year_cost = np.zeros(S)
+    return out
+
+def annual_frame(result, scenario=0):
+    """One scenario of a simulate_smith result as the page's year-by-year DataFrame."""
+    years = result["Portfolio Value"].shape[1]
+    df = pd.DataFrame({col: result[col][scenario] for col in ANNUAL_COLUMNS})
+    df.insert(0, "Year", np.arange(1, years + 1))
+    return df
+
+def equity_advantage(result, horizon):
+    """Active net equity minus baseline net worth at the end of `horizon` years, per scenario."""
+    return result["Net Equity (Active)"][:, horizon - 1] - result["Baseline Net Worth"][:, horizon - 1]
+
+def sweep_grid(base, x_name, x_values, y_name, y_values, years, horizon):
+    """
+    Net equity advantage over a 2-D grid of any two SWEEP_AXES parameters,
+    all other inputs held at `base`. Returns an array of shape (len(y), len(x)).
+    """
+    X, Y = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+    params = dict(base)
+    params[x_name], params[y_name] = X.ravel(), Y.ravel()
+    result = simulate_smith(years=years, **params)
+    return equity_advantage(result, horizon).reshape(X.shape)
+
+# ==========================================
+# 🎲 MONTE CARLO MARKET PATHS
+# ==========================================
+# Monthly portfolio returns are lognormal around inv_return; the HELOC rate
+# drifts with a mean-reverting prime shock (AR(1) back to loc_rate) whose
+# innovations are correlated with the equity shocks. All paths are advanced
+# together through simulate_smith; big runs can be sharded over processes.
+MC_SHARD_PATHS = 10000
+
+def simulate_market_paths(n_paths, n_months, inv_return, inv_vol, loc_rate, rate_vol, rate_reversion, corr, rng):
+    """Returns (monthly_returns, heloc_rate_pct), both shaped (n_paths, n_months)."""
+    dt = 1 / 12
+    z_eq = rng.standard_normal((n_paths, n_months))
+    z_rt = corr * z_eq + np.sqrt(1 - corr**2) * rng.standard_normal((n_paths, n_months))
+
+    sig = inv_vol / 100
+    drift = 12 * np.log1p(inv_return / 100 / 12) - 0.5 * sig**2  # zero vol == the deterministic path
+    monthly_returns = np.expm1(drift * dt + sig * np.sqrt(dt) * z_eq)
+
+    phi = 1 - rate_reversion * dt
+    shocks = rate_vol * np.sqrt(dt) * z_rt
+    heloc_rate = np.maximum(loc_rate + ar1_paths(phi, shocks), 0.0)
+    return monthly_returns, heloc_rate
+
+AR1_SCALE_LIMIT = 1e100   # largest phi^-k factor allowed inside one block
+
+def ar1_paths(phi, shocks):
+    """
+    x_t = phi * x_{t-1} + e_t from x_0 = 0 along the last axis. Within a block,
+    x_{s+k} = phi^k * (x_s + cumsum(e_{s+j} * phi^-j)); blocks are short enough
+    that phi^-k never overflows, and each one starts from the last block's end.
+    """
+    if phi == 1:
+        return np.cumsum(shocks, axis=-1)
+    if phi == 0:
+        return shocks.copy()
+    n = shocks.shape[-1]
+    block = max(1, min(n, int(np.log(AR1_SCALE_LIMIT) / abs(np.log(abs(phi))))))
+    k = np.arange(1, block + 1, dtype=float)
+    grow, shrink = phi**k, phi**(-k)
+    dev = np.empty_like(shocks, dtype=float)
+    carry = np.zeros(shocks.shape[:-1])
+    for start in range(0, n, block):
+        m = min(block, n - start)
+        dev[..., start:start + m] = grow[:m] * (carry[..., None] + np.cumsum(shocks[..., start:start + m] * shrink[:m], axis=-1))
+        carry = dev[..., start + m - 1]
+    return dev
+
+def _mc_shard(job):
+    params, years, horizon, n_paths, market, seed = job
+    rng = np.random.default_rng(seed)
+    rets, loc_path = simulate_market_paths(n_paths, years * 12, params["inv_return"], market["inv_vol"],
+                                           params["loc_rate"], market["rate_vol"], market["rate_reversion"],
+                                           market["corr"], rng)
+    run = dict(params, loc_rate=loc_path)
+    res = simulate_smith(years=years, monthly_returns=rets, **run)
+    adv = res["Net Equity (Active)"][:, :horizon] - res["Baseline Net Worth"][:, :horizon]
+    cushion = res["Portfolio Value"][:, :horizon] - res["Investment Loan"][:, :horizon]
+    return adv, cushion[:, -1] < 0, (cushion < 0).any(axis=1)
+
+def monte_carlo_smith(params, years, horizon, n_paths=10000, inv_vol=15.0, rate_vol=1.0,
+                      rate_reversion=0.25, corr=0.2, seed=None, workers=None):
+    """
+    Stochastic Smith Maneuver. `params` are the simulate_smith scenario inputs
+    (scalars). Runs are split into MC_SHARD_PATHS-path shards with independent
+    seeds; with workers > 1 the shards go to a process pool.
+    Returns {"advantage": (n_paths, horizon), "underwater_end": bool, "underwater_any": bool}.
+    """
+    market = {"inv_vol": inv_vol, "rate_vol": rate_vol, "rate_reversion": rate_reversion, "corr": corr}
+    sizes = [MC_SHARD_PATHS] * (n_paths // MC_SHARD_PATHS) + ([n_paths % MC_SHARD_PATHS] if n_paths % MC_SHARD_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(params, int(years), int(horizon), n, market, s) for n, s in zip(sizes, seeds)]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_mc_shard, jobs))
+    else:
+        parts = [_mc_shard(j) for j in jobs]
+
+    return {
+        "advantage": np.concatenate([p[0] for p in parts]),
+        "underwater_end": np.concatenate([p[1] for p in parts]),
+        "underwater_any": np.concatenate([p[2] for p in parts]),
+    }
+
+def summarize_mc(mc):
+    """Headline stats at the horizon plus yearly P10/P50/P90 bands of the advantage."""
+    final = mc["advantage"][:, -1]
+    p10 = np.percentile(final, 10)
+    return {
+        "median": float(np.median(final)),
+        "p10": float(p10),
+        "p90": float(np.percentile(final, 90)),
+        "worst_decile_mean": float(final[final <= p10].mean()),
+        "prob_behind": float((final < 0).mean()),
+        "prob_underwater_end": float(mc["underwater_end"].mean()),
+        "prob_underwater_any": float(mc["underwater_any"].mean()),
+        "bands": np.percentile(mc["advantage"], [10, 50, 90], axis=0),
+    }
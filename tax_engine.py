@@ -0,0 +1,123 @@
+import os
+import json
+import bisect
+import numpy as np
+
+# ==========================================
+# 🧾 INCOME TAX BRACKET ENGINE
+# ==========================================
+# Bracket tables live in data/tax_brackets.json (per year: federal plus each
+# province). A province/year is compiled once into a single combined schedule:
+# sorted lower bounds, the combined marginal rate above each bound and the
+# cumulative tax owed at each bound. Tax is then one lookup plus one multiply:
+# bisect for a scalar, np.searchsorted for an array of incomes.
+TAX_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tax_brackets.json")
+DEFAULT_PROVINCE = "BC"
+
+_tables = {}
+_compiled = {}
+
+def load_tables(path=TAX_TABLE_PATH):
+    if path not in _tables:
+        with open(path, "r") as f:
+            _tables[path] = {k: v for k, v in json.load(f).items() if k.isdigit()}
+    return _tables[path]
+
+def latest_year():
+    return max(int(y) for y in load_tables())
+
+def _piecewise(table, scale=1.0):
+    """One bracket table -> (bounds, rates) with the basic personal amount as a 0% first bracket."""
+    bounds = [float(b) for b in table["thresholds"]]
+    rates = [float(r) / 100 * scale for r in table["rates"]]
+    bpa = float(table.get("bpa", 0))
+    if 0 < bpa < (bounds[1] if len(bounds) > 1 else np.inf):
+        # credit of bpa x lowest rate == no tax on the first bpa dollars
+        bounds = [0.0, bpa] + bounds[1:]
+        rates = [0.0] + rates
+    return bounds, rates
+
+class TaxSchedule:
+    """Combined federal + provincial schedule for one province and year."""
+
+    def __init__(self, province, year, bounds, rates):
+        self.province, self.year = province, year
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        self.base = np.concatenate([[0.0], np.cumsum(np.diff(self.bounds) * self.rates[:-1])])
+        self._bounds_list = self.bounds.tolist()
+
+    def _bracket(self, real):
+        if np.ndim(real) == 0:
+            return bisect.bisect_right(self._bounds_list, float(real)) - 1
+        return np.searchsorted(self.bounds, real, side="right") - 1
+
+    def tax(self, income, index=1.0):
+        """Total tax on `income`; `index` scales every threshold (bracket indexation). Broadcasts."""
+        real = np.maximum(np.asarray(income, dtype=float) / index, 0.0)
+        i = self._bracket(real)
+        out = (self.base[i] + (real - self.bounds[i]) * self.rates[i]) * index
+        return float(out) if np.ndim(out) == 0 else out
+
+    def marginal(self, income, index=1.0):
+        """Combined marginal rate in % at `income`. Broadcasts."""
+        real = np.maximum(np.asarray(income, dtype=float) / index, 0.0)
+        out = self.rates[self._bracket(real)] * 100
+        return float(out) if np.ndim(out) == 0 else out
+
+    def average(self, income, index=1.0):
+        income = np.asarray(income, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.where(income > 0, self.tax(income, index) / income * 100, 0.0)
+        return float(out) if np.ndim(out) == 0 else out
+
+def resolve_table(province=None, year=None):
+    """(province, year, fallbacks) actually used for a request.
+
+    Only the years in the JSON are bundled: a missing year falls back to the
+    latest one and an unknown province to DEFAULT_PROVINCE. `fallbacks` lists
+    each substitution in words so pages can show it instead of hiding it.
+    """
+    tables = load_tables()
+    fallbacks = []
+    used_year = str(year or latest_year())
+    if used_year not in tables:
+        used_year = str(latest_year())
+        fallbacks.append(f"no {year} table, using {used_year}")
+    provinces = tables[used_year]["provinces"]
+    used_province = province if province in provinces else DEFAULT_PROVINCE
+    if province and used_province != province:
+        fallbacks.append(f"no {province} table, using {used_province}")
+    return used_province, used_year, fallbacks
+
+def table_note(province=None, year=None):
+    """One-line caption naming the bracket table a page is using, including any fallback."""
+    used_province, used_year, fallbacks = resolve_table(province, year)
+    note = f"Tax brackets: {used_province} {used_year} federal + provincial tables"
+    if year is None:
+        note += " (latest bundled year)"
+    return note + "".join(f"; ⚠️ {f}" for f in fallbacks) + "."
+
+def load_schedule(province=None, year=None):
+    """Compiled schedule for a province (profile spelling, e.g. "BC", "Ontario") and year; cached.
+
+    See resolve_table for what happens when the year or province isn't bundled.
+    """
+    tables = load_tables()
+    province, year, _ = resolve_table(province, year)
+    key = (province, year)
+    if key not in _compiled:
+        abatement = tables[year].get("federal_abatement", {}).get(province, 0.0) / 100
+        pieces = [_piecewise(tables[year]["federal"], 1 - abatement), _piecewise(tables[year]["provinces"][province])]
+        bounds = sorted({b for piece_bounds, _ in pieces for b in piece_bounds})
+        rates = [sum(r[bisect.bisect_right(b, x) - 1] for b, r in pieces) for x in bounds]
+        _compiled[key] = TaxSchedule(province, int(year), bounds, rates)
+    return _compiled[key]
+
+def marginal_rate(income, province=None, year=None):
+    """Combined marginal rate (%), rounded to 2 places for display when scalar."""
+    rate = load_schedule(province, year).marginal(income)
+    return round(rate, 2) if isinstance(rate, float) else rate
+
+def income_tax(income, province=None, year=None, index=1.0):
+    return load_schedule(province, year).tax(income, index)